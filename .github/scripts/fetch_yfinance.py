@@ -7,8 +7,10 @@ Called by GitHub Actions workflow.
 import argparse
 import json
 import sys
+import threading
 from datetime import datetime, timezone
 import yfinance as yf
+import pandas as pd
 import firebase_admin
 from firebase_admin import credentials, firestore
 
@@ -53,6 +55,76 @@ def map_range_to_interval(range_key):
     return interval_map.get(range_key, '1d')
 
 
+# Tickers per yf.download call in fetch_yfinance_batch; yfinance still
+# sends one HTTP request per ticker, the batch only shares the call
+BATCH_SIZE = 20
+# Timezone of the .SA tickers, for download results without one
+EXCHANGE_TIMEZONE = 'America/Sao_Paulo'
+
+_print_lock = threading.Lock()
+
+
+def log(message):
+    """Print a whole line at once so concurrent workers don't interleave."""
+    with _print_lock:
+        print(message, flush=True)
+
+
+def with_sa_suffix(symbol):
+    """Ensure symbol has .SA suffix for Brazilian stocks."""
+    if not symbol.endswith('.SA') and len(symbol) <= 6:
+        return f"{symbol}.SA"
+    return symbol
+
+
+def error_document(symbol, range_key, error):
+    """Build the document saved when fetching a symbol fails."""
+    return {
+        'status': 'error',
+        'error': error,
+        'fetchedAt': datetime.now(timezone.utc).isoformat(),
+        'symbol': symbol,
+        'range': range_key,
+        'data': []
+    }
+
+
+def history_to_document(symbol, range_key, hist):
+    """
+    Convert a yfinance history frame into the Firestore document format.
+    
+    Args:
+        symbol: Stock symbol as requested (without forced suffix)
+        range_key: Range identifier
+        hist: DataFrame with Open/High/Low/Close/Volume columns
+    
+    Returns:
+        dict: Document in the format described in fetch_yfinance_data
+    """
+    if hist.empty:
+        return error_document(symbol, range_key, f'No data found for symbol {symbol}')
+    
+    # Convert to list of dicts
+    data_list = []
+    for index, row in hist.iterrows():
+        data_list.append({
+            'date': int(index.timestamp()),  # Unix timestamp
+            'open': float(row['Open']),
+            'high': float(row['High']),
+            'low': float(row['Low']),
+            'close': float(row['Close']),
+            'volume': int(row['Volume'])
+        })
+    
+    return {
+        'status': 'completed',
+        'data': data_list,
+        'fetchedAt': datetime.now(timezone.utc).isoformat(),
+        'symbol': symbol,
+        'range': range_key
+    }
+
+
 def fetch_yfinance_data(symbol, range_key):
     """
     Fetch historical data from yfinance.
@@ -73,14 +145,10 @@ def fetch_yfinance_data(symbol, range_key):
                 'range': str
             }
     """
-    print(f"Fetching data for {symbol} with range {range_key}")
+    log(f"Fetching data for {symbol} with range {range_key}")
     
     try:
-        # Ensure symbol has .SA suffix for Brazilian stocks
-        if not symbol.endswith('.SA') and len(symbol) <= 6:
-            symbol_with_suffix = f"{symbol}.SA"
-        else:
-            symbol_with_suffix = symbol
+        symbol_with_suffix = with_sa_suffix(symbol)
         
         # Create ticker object
         ticker = yf.Ticker(symbol_with_suffix)
@@ -89,53 +157,89 @@ def fetch_yfinance_data(symbol, range_key):
         period = map_range_to_period(range_key)
         interval = map_range_to_interval(range_key)
         
-        print(f"YFinance params: symbol={symbol_with_suffix}, period={period}, interval={interval}")
+        log(f"YFinance params: symbol={symbol_with_suffix}, period={period}, interval={interval}")
         
         # Fetch historical data
         hist = ticker.history(period=period, interval=interval)
         
-        if hist.empty:
-            return {
-                'status': 'error',
-                'error': f'No data found for symbol {symbol}',
-                'fetchedAt': datetime.now(timezone.utc).isoformat(),
-                'symbol': symbol,
-                'range': range_key,
-                'data': []
-            }
+        document = history_to_document(symbol, range_key, hist)
+        if document['status'] == 'completed':
+            log(f"Successfully fetched {len(document['data'])} data points")
+        return document
         
-        # Convert to list of dicts
-        data_list = []
-        for index, row in hist.iterrows():
-            data_list.append({
-                'date': int(index.timestamp()),  # Unix timestamp
-                'open': float(row['Open']),
-                'high': float(row['High']),
-                'low': float(row['Low']),
-                'close': float(row['Close']),
-                'volume': int(row['Volume'])
-            })
+    except Exception as e:
+        log(f"Error fetching data: {str(e)}")
+        return error_document(symbol, range_key, str(e))
+
+
+def fetch_yfinance_batch(symbols, range_key, batch_size=BATCH_SIZE):
+    """
+    Fetch historical data for many symbols with one yf.download call per group.
+    
+    Each call makes one Yahoo request per ticker (concurrently), so callers
+    rate limiting requests must count every symbol, not every call.
+    
+    Args:
+        symbols: Stock symbols (e.g., ['PETR4', 'VALE3.SA'])
+        range_key: Range identifier ('1w', '1mo', etc.)
+        batch_size: Maximum tickers per download call
+    
+    Returns:
+        dict: {symbol: document}, each document in the format returned by
+            fetch_yfinance_data
+    """
+    period = map_range_to_period(range_key)
+    interval = map_range_to_interval(range_key)
+    documents = {}
+    
+    for start in range(0, len(symbols), batch_size):
+        group = symbols[start:start + batch_size]
+        tickers = {symbol: with_sa_suffix(symbol) for symbol in group}
         
-        print(f"Successfully fetched {len(data_list)} data points")
+        log(f"YFinance batch: {len(group)} symbols, period={period}, interval={interval}")
         
-        return {
-            'status': 'completed',
-            'data': data_list,
-            'fetchedAt': datetime.now(timezone.utc).isoformat(),
-            'symbol': symbol,
-            'range': range_key
-        }
+        try:
+            frame = yf.download(
+                tickers=list(tickers.values()),
+                period=period,
+                interval=interval,
+                group_by='ticker',
+                auto_adjust=True,
+                threads=True,
+                progress=False,
+                # Keep exchange timezones so dates match Ticker.history
+                ignore_tz=False
+            )
+        except Exception as e:
+            log(f"Error fetching batch: {str(e)}")
+            for symbol in group:
+                documents[symbol] = error_document(symbol, range_key, str(e))
+            continue
         
-    except Exception as e:
-        print(f"Error fetching data: {str(e)}")
-        return {
-            'status': 'error',
-            'error': str(e),
-            'fetchedAt': datetime.now(timezone.utc).isoformat(),
-            'symbol': symbol,
-            'range': range_key,
-            'data': []
-        }
+        for symbol, ticker in tickers.items():
+            try:
+                # Columns are (ticker, field) when several tickers are downloaded
+                if isinstance(frame.columns, pd.MultiIndex):
+                    if ticker not in frame.columns.get_level_values(0):
+                        documents[symbol] = error_document(symbol, range_key, f'No data found for symbol {symbol}')
+                        continue
+                    hist = frame[ticker]
+                else:
+                    hist = frame
+                
+                # Rows of the shared index where this ticker did not trade are NaN
+                hist = hist.dropna(subset=['Close']).fillna({'Volume': 0})
+                if hist.index.tz is None:
+                    # Naive dates are B3 wall time, not UTC
+                    hist = hist.tz_localize(EXCHANGE_TIMEZONE)
+                documents[symbol] = history_to_document(symbol, range_key, hist)
+            except Exception as e:
+                documents[symbol] = error_document(symbol, range_key, str(e))
+    
+    fetched = sum(1 for document in documents.values() if document['status'] == 'completed')
+    log(f"Successfully fetched {fetched} of {len(symbols)} symbols")
+    
+    return documents
 
 
 def save_to_firestore(db, symbol, range_key, data):
@@ -151,7 +255,7 @@ def save_to_firestore(db, symbol, range_key, data):
     # Document ID format: {symbol}_{range}
     doc_id = f"{symbol}_{range_key}"
     
-    print(f"Saving to Firestore document: historical-data/{doc_id}")
+    log(f"Saving to Firestore document: historical-data/{doc_id}")
     
     try:
         # Reference to the document
@@ -160,10 +264,10 @@ def save_to_firestore(db, symbol, range_key, data):
         # Save the data
         doc_ref.set(data)
         
-        print(f"Successfully saved data to Firestore")
+        log(f"Successfully saved data to Firestore")
         
     except Exception as e:
-        print(f"Error saving to Firestore: {str(e)}")
+        log(f"Error saving to Firestore: {str(e)}")
         raise
 
 
@@ -5,15 +5,18 @@ Runs as a scheduled GitHub Actions job to keep data fresh.
 """
 
 import sys
+import time
+import threading
 import firebase_admin
 from firebase_admin import credentials, firestore
 from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import argparse
 
 # Import the fetch function from the main script
 import os
 sys.path.insert(0, os.path.dirname(__file__))
-from fetch_yfinance import fetch_yfinance_data, save_to_firestore
+from fetch_yfinance import fetch_yfinance_batch, save_to_firestore, error_document, log, BATCH_SIZE
 
 
 def parse_arguments():
@@ -23,9 +26,66 @@ def parse_arguments():
                        help='Path to Firebase service account JSON file')
     parser.add_argument('--max-symbols', type=int, default=50,
                        help='Maximum number of symbols to update (default: 50)')
+    parser.add_argument('--workers', type=int, default=8,
+                       help='Freshness checks and download batches run concurrently (default: 8)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                       help=f'Symbols per YFinance download call (default: {BATCH_SIZE})')
+    parser.add_argument('--yfinance-rate', type=float, default=4.0,
+                       help='Maximum YFinance requests per second; a download batch '
+                            'makes one request per symbol (default: 4)')
+    parser.add_argument('--yfinance-burst', type=int, default=8,
+                       help='YFinance requests allowed in a burst (default: 8)')
+    parser.add_argument('--firestore-concurrency', type=int, default=4,
+                       help='Maximum concurrent Firestore operations (default: 4)')
     return parser.parse_args()
 
 
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting how often a call may be made.
+    
+    Tokens refill continuously at `rate` per second up to `capacity`;
+    acquire(n) takes n tokens, blocking until they are available. A request
+    for more than `capacity` waits for a full bucket and leaves it in debt,
+    so the long-run rate still holds.
+    """
+    
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self, tokens=1):
+        """Block until `tokens` tokens are available and take them."""
+        needed = min(tokens, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= needed:
+                    self.tokens -= tokens
+                    return
+                wait = (needed - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RefreshLimits:
+    """Rate and concurrency limits shared by all refresh workers."""
+    
+    def __init__(self, yfinance_rate, yfinance_burst, firestore_concurrency):
+        self.yfinance = TokenBucket(yfinance_rate, yfinance_burst)
+        self.firestore = threading.BoundedSemaphore(firestore_concurrency)
+        self.firestore_concurrency = firestore_concurrency
+
+
+# Outcomes of a symbol refresh
+REFRESHED = 'refreshed'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
 def get_all_symbols_from_firestore(db):
     """
     Get all unique symbols from Firestore historical-data collection.
@@ -87,49 +147,86 @@ def should_refresh(doc_data):
         return True
 
 
-def refresh_symbol(db, symbol):
+def needs_refresh(db, symbol, limits):
     """
-    Refresh historical data for a specific symbol.
+    Check whether a symbol's stored data should be refreshed.
     
     Args:
         db: Firestore database instance
         symbol: Stock symbol
+        limits: RefreshLimits shared with the other workers
     
     Returns:
-        bool: True if successful
+        bool: True if the symbol should be downloaded again
     """
-    print(f"\n{'='*60}")
-    print(f"Refreshing {symbol}...")
-    
     try:
-        # Check if we should refresh
-        doc_id = f"{symbol}_max"
-        doc_ref = db.collection('historical-data').document(doc_id)
-        doc = doc_ref.get()
-        
-        if doc.exists:
-            if not should_refresh(doc.to_dict()):
-                print(f"  ✓ {symbol} data is fresh (< 12 hours old), skipping")
-                return True
+        doc_ref = db.collection('historical-data').document(f"{symbol}_max")
+        with limits.firestore:
+            doc = doc_ref.get()
         
-        # Fetch fresh data
-        print(f"  → Fetching data from YFinance...")
-        data = fetch_yfinance_data(symbol, 'max')
+        if doc.exists and not should_refresh(doc.to_dict()):
+            log(f"  ✓ {symbol} data is fresh (< 12 hours old), skipping")
+            return False
+        return True
         
-        if data['status'] == 'completed':
-            print(f"  → Saving to Firestore...")
-            save_to_firestore(db, symbol, 'max', data)
-            print(f"  ✓ {symbol} refreshed successfully ({len(data.get('data', []))} points)")
-            return True
-        else:
-            print(f"  ✗ Failed to fetch {symbol}: {data.get('error', 'Unknown error')}")
-            # Still save the error status
+    except Exception as e:
+        log(f"  ⚠ Could not check {symbol}, refreshing anyway: {str(e)}")
+        return True
+
+
+def save_symbol(db, symbol, data, limits):
+    """
+    Save one downloaded symbol and report the outcome.
+    
+    Returns:
+        str: REFRESHED or FAILED
+    """
+    try:
+        with limits.firestore:
+            # Still save the error status when the fetch failed
             save_to_firestore(db, symbol, 'max', data)
-            return False
-            
     except Exception as e:
-        print(f"  ✗ Error refreshing {symbol}: {str(e)}")
-        return False
+        log(f"  ✗ Error saving {symbol}: {str(e)}")
+        return FAILED
+    
+    if data['status'] == 'completed':
+        log(f"  ✓ {symbol} refreshed successfully ({len(data.get('data', []))} points)")
+        return REFRESHED
+    log(f"  ✗ Failed to fetch {symbol}: {data.get('error', 'Unknown error')}")
+    return FAILED
+
+
+def refresh_batch(db, symbols, limits):
+    """
+    Refresh a group of symbols with a single YFinance download.
+    
+    yf.download still fetches every ticker with its own request, so the
+    batch takes one rate-limit token per symbol.
+    
+    Args:
+        db: Firestore database instance
+        symbols: Stock symbols downloaded together
+        limits: RefreshLimits shared with the other workers
+    
+    Returns:
+        dict: {symbol: REFRESHED | FAILED}
+    """
+    log(f"  → Fetching {len(symbols)} symbol(s) from YFinance: {', '.join(symbols)}")
+    limits.yfinance.acquire(len(symbols))
+    try:
+        documents = fetch_yfinance_batch(symbols, 'max', batch_size=len(symbols))
+    except Exception as e:
+        documents = {}
+        log(f"  ✗ Error fetching batch: {str(e)}")
+    
+    with ThreadPoolExecutor(max_workers=limits.firestore_concurrency) as executor:
+        outcomes = executor.map(
+            lambda symbol: save_symbol(
+                db, symbol, documents.get(symbol) or error_document(symbol, 'max', 'Missing from batch download'), limits
+            ),
+            symbols
+        )
+        return dict(zip(symbols, outcomes))
 
 
 def main():
@@ -141,6 +238,8 @@ def main():
     print("="*60)
     print(f"Started at: {datetime.now(timezone.utc).isoformat()}")
     print(f"Max symbols to update: {args.max_symbols}")
+    print(f"Workers: {args.workers}, YFinance rate: {args.yfinance_rate}/s "
+          f"(burst {args.yfinance_burst}), Firestore concurrency: {args.firestore_concurrency}")
     print()
     
     # Initialize Firebase
@@ -165,29 +264,42 @@ def main():
         print(f"\n⚠ Limiting to {args.max_symbols} symbols (found {len(symbols)})")
         symbols = symbols[:args.max_symbols]
     
-    # Refresh each symbol
+    # Refresh symbols concurrently; counters are only updated on this thread
     print(f"\nRefreshing {len(symbols)} symbol(s)...\n")
     
-    success_count = 0
-    error_count = 0
-    skipped_count = 0
+    limits = RefreshLimits(args.yfinance_rate, args.yfinance_burst, args.firestore_concurrency)
+    counts = {REFRESHED: 0, SKIPPED: 0, FAILED: 0}
+    started_at = time.monotonic()
     
-    for i, symbol in enumerate(symbols, 1):
-        print(f"[{i}/{len(symbols)}] ", end='')
-        result = refresh_symbol(db, symbol)
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        # Only stale symbols are downloaded
+        stale = [
+            symbol for symbol, stale in zip(symbols, executor.map(lambda symbol: needs_refresh(db, symbol, limits), symbols))
+            if stale
+        ]
+        counts[SKIPPED] = len(symbols) - len(stale)
+        done = counts[SKIPPED]
         
-        if result:
-            success_count += 1
-        else:
-            error_count += 1
+        # Stale symbols are downloaded in groups, one yf.download call each
+        batches = [stale[i:i + args.batch_size] for i in range(0, len(stale), args.batch_size)]
+        futures = [executor.submit(refresh_batch, db, batch, limits) for batch in batches]
+        for future in as_completed(futures):
+            for symbol, outcome in future.result().items():
+                counts[outcome] += 1
+                done += 1
+                log(f"[{done}/{len(symbols)}] {symbol} {outcome}")
+    
+    success_count = counts[REFRESHED] + counts[SKIPPED]
+    error_count = counts[FAILED]
     
     # Summary
     print("\n" + "="*60)
     print("REFRESH SUMMARY")
     print("="*60)
     print(f"Total symbols: {len(symbols)}")
-    print(f"✓ Successful: {success_count}")
+    print(f"✓ Successful: {success_count} ({counts[REFRESHED]} refreshed, {counts[SKIPPED]} already fresh)")
     print(f"✗ Failed: {error_count}")
+    print(f"Elapsed: {time.monotonic() - started_at:.1f}s")
     print(f"Completed at: {datetime.now(timezone.utc).isoformat()}")
     print("="*60)
     
@@ -0,0 +1,64 @@
+"""
+Firebase authentication and Firestore access for Vercel functions.
+
+The client sends the signed-in user's Firebase ID token as a Bearer token;
+it is verified with the Admin SDK, initialized once per warm instance from
+the FIREBASE_SERVICE_ACCOUNT JSON.
+"""
+import os
+import json
+import threading
+
+class Unauthorized(Exception):
+    """Raised when a request has no valid Firebase ID token"""
+    status_code = 401
+
+_app = None
+_app_lock = threading.Lock()
+
+def _get_app():
+    """Return the Firebase Admin app, initialized on first use"""
+    global _app
+    with _app_lock:
+        if _app is None:
+            service_account = os.environ.get('FIREBASE_SERVICE_ACCOUNT')
+            if not service_account:
+                print("FIREBASE_SERVICE_ACCOUNT is not set.")
+                raise Exception("FIREBASE_SERVICE_ACCOUNT is not configured.")
+
+            # Imported here so functions that never authenticate don't load the SDK
+            import firebase_admin
+            from firebase_admin import credentials
+            _app = firebase_admin.initialize_app(credentials.Certificate(json.loads(service_account)))
+        return _app
+
+def get_firestore():
+    """Return a Firestore client for the Admin app"""
+    from firebase_admin import firestore
+    return firestore.client(app=_get_app())
+
+def get_user_id(handler, required=True):
+    """
+    Return the uid of the user whose ID token authorizes the request.
+
+    Without an Authorization header this raises Unauthorized, or returns None
+    when required is False; a token that is present must always be valid.
+    Optional authentication also returns None when Firebase is not configured.
+    """
+    scheme, _, token = (handler.headers.get('Authorization') or '').partition(' ')
+    token = token.strip()
+    if scheme.lower() != 'bearer' or not token:
+        if required:
+            raise Unauthorized('Missing Firebase ID token.')
+        return None
+    if not required and not os.environ.get('FIREBASE_SERVICE_ACCOUNT'):
+        print("FIREBASE_SERVICE_ACCOUNT is not set, serving the request without a user.")
+        return None
+
+    app = _get_app()
+    from firebase_admin import auth
+    try:
+        return auth.verify_id_token(token, app=app)['uid']
+    except Exception as error:
+        print(f"Rejected Firebase ID token: {error}")
+        raise Unauthorized('Invalid Firebase ID token.') from error
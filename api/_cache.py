@@ -0,0 +1,98 @@
+"""
+In-process TTL cache with single-flight request coalescing.
+
+Entries live for the warm instance. When several threads ask for the same
+missing key at once, only the first one calls the upstream; the others wait
+for its result (or its exception) instead of issuing duplicate requests.
+"""
+import threading
+import time
+from concurrent.futures import Future
+
+class TTLCache:
+    """Thread-safe TTL cache whose misses are fetched once per key"""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return a fresh cached value, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def set(self, key, value, ttl):
+        """Cache a value for ttl seconds"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, time.monotonic() + ttl)
+            # Dicts keep insertion order, so the first entries are the oldest
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+
+    def get_or_fetch(self, key, ttl, fetch):
+        """Return the cached value for key, calling fetch() once on a miss"""
+        return self.get_many_or_fetch([key], ttl, lambda keys: {key: fetch()})[key]
+
+    def get_many_or_fetch(self, keys, ttl, fetch_many):
+        """
+        Return {key: value} for many keys.
+
+        fetch_many(missing_keys) is called once with the keys that are neither
+        cached nor being fetched by another thread, and must return a
+        {key: value} dict. Keys it leaves out or maps to None resolve to None
+        and are not cached, so a failed or empty fetch is retried next time.
+        """
+        values = {}
+        owned = []
+        waiting = {}
+
+        now = time.monotonic()
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] >= now:
+                    values[key] = entry[0]
+                elif key in self._inflight:
+                    waiting[key] = self._inflight[key]
+                else:
+                    self._inflight[key] = Future()
+                    owned.append(key)
+
+        if owned:
+            fetched = {}
+            # Anything fetch_many raises, even a BaseException, must still
+            # release the threads waiting on these keys
+            error = RuntimeError('Fetch was interrupted')
+            try:
+                fetched = fetch_many(owned)
+                for key in owned:
+                    if fetched.get(key) is not None:
+                        self.set(key, fetched[key], ttl)
+                error = None
+            except Exception as fetch_error:
+                error = fetch_error
+                raise
+            finally:
+                self._resolve(owned, fetched, error)
+            values.update({key: fetched.get(key) for key in owned})
+
+        for key, future in waiting.items():
+            values[key] = future.result()
+
+        return values
+
+    def _resolve(self, keys, fetched=None, error=None):
+        """Hand a fetch result (or error) to every waiting thread"""
+        with self._lock:
+            futures = [self._inflight.pop(key) for key in keys]
+        for key, future in zip(keys, futures):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(fetched.get(key))
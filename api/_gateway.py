@@ -0,0 +1,212 @@
+"""
+Self-hosted gateway that serves every API function from one process.
+
+Routes /api/<path> to the `handler` class defined in api/<path>.py, the same
+mapping Vercel uses, and runs them on a threaded HTTP server with a bounded
+worker pool. Connections beyond the workers and a bounded queue are answered
+with 503. SIGINT/SIGTERM stop accepting connections and let in-flight
+requests finish before exiting. Run from the repository root:
+
+    python -m api._gateway [--host 127.0.0.1] [--port 8000] [--workers 32] [--queue 64]
+"""
+import os
+import signal
+import argparse
+import importlib
+import threading
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+from api import _json, _metrics
+from api._utils import InstrumentedHandler, send_json_response
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_HOST = os.environ.get('GATEWAY_HOST', '127.0.0.1')
+DEFAULT_PORT = int(os.environ.get('GATEWAY_PORT', 8000))
+DEFAULT_WORKERS = int(os.environ.get('GATEWAY_WORKERS', 32))
+DEFAULT_GRACE_S = float(os.environ.get('GATEWAY_GRACE_SECONDS', 30))
+DEFAULT_BACKLOG = int(os.environ.get('GATEWAY_BACKLOG', 128))
+# Accepted connections allowed to wait for a worker before new ones get a 503
+DEFAULT_QUEUE = int(os.environ.get('GATEWAY_QUEUE', 64))
+# How long a rejected connection may take to send its request head
+REJECT_TIMEOUT_S = 1.0
+
+# Request state BaseHTTPRequestHandler sets while parsing, handed to the route's handler
+REQUEST_ATTRIBUTES = (
+    'server', 'request', 'client_address', 'connection', 'rfile', 'wfile', 'raw_requestline',
+    'requestline', 'command', 'path', 'request_version', 'headers', 'close_connection',
+)
+
+def _overloaded_response():
+    body = _json.dumps({'error': 'Server is overloaded, try again shortly.'})
+    status = HTTPStatus.SERVICE_UNAVAILABLE
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        "Content-Type: application/json\r\n"
+        "Access-Control-Allow-Origin: *\r\n"
+        "Retry-After: 1\r\n"
+        "Connection: close\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    )
+    return head.encode('ascii') + body
+
+OVERLOADED_RESPONSE = _overloaded_response()
+
+def discover_routes(api_dir=API_DIR):
+    """Map URL paths to handler module names, skipping private modules"""
+    routes = {}
+    for dirpath, dirnames, filenames in os.walk(api_dir):
+        dirnames[:] = [d for d in dirnames if not d.startswith(('_', '.'))]
+        for filename in filenames:
+            if filename.endswith('.py') and not filename.startswith('_'):
+                relative = os.path.relpath(os.path.join(dirpath, filename), os.path.dirname(api_dir))[:-3]
+                routes['/' + relative.replace(os.sep, '/')] = relative.replace(os.sep, '.')
+    return routes
+
+def load_routes(api_dir=API_DIR):
+    """Import every handler module and return {path: handler class}"""
+    routes = {}
+    for path, module_name in sorted(discover_routes(api_dir).items()):
+        try:
+            module = importlib.import_module(module_name)
+        except Exception as error:
+            print(f"Skipping {path}: failed to import {module_name}: {error}")
+            continue
+        handler_cls = getattr(module, 'handler', None)
+        if handler_cls is None:
+            print(f"Skipping {path}: {module_name} defines no handler")
+            continue
+        routes[path] = handler_cls
+    return routes
+
+class GatewayRequestHandler(InstrumentedHandler):
+    """Parse the request once and hand it to the routed function's handler"""
+
+    def _dispatch(self):
+        path = urlsplit(self.path).path.rstrip('/')
+        route_cls = self.server.routes.get(path)
+        if route_cls is None:
+            send_json_response(self, {'error': f"No function at {path}"}, status_code=404)
+            return
+        _metrics.set_route(path)
+
+        method_name = 'do_' + self.command
+        if not hasattr(route_cls, method_name):
+            send_json_response(self, {'error': f"{self.command} not allowed on {path}"}, status_code=405)
+            return
+
+        # The function's handler gets its own instance over this already-parsed
+        # request; __init__ is skipped since it would read a new request
+        route = route_cls.__new__(route_cls)
+        for name in REQUEST_ATTRIBUTES:
+            setattr(route, name, getattr(self, name))
+        route.log_message = self.log_message
+        try:
+            getattr(route, method_name)()
+        finally:
+            # e.g. a 'Connection: close' header sent by the function
+            self.close_connection = route.close_connection
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = do_HEAD = _dispatch
+
+    def metrics_route(self):
+        # Only paths that matched a function get their own histograms
+        return _metrics.UNMATCHED
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+class GatewayServer(ThreadingHTTPServer):
+    """Threaded HTTP server that runs requests on a bounded worker pool"""
+
+    daemon_threads = True
+
+    def __init__(self, address, routes, workers=DEFAULT_WORKERS, backlog=DEFAULT_BACKLOG, queue=DEFAULT_QUEUE, quiet=False):
+        self.request_queue_size = backlog
+        self.routes = routes
+        self.quiet = quiet
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gateway')
+        # One slot per running or queued connection, so the pool's queue stays bounded
+        self._slots = threading.BoundedSemaphore(workers + queue)
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        super().__init__(address, GatewayRequestHandler)
+
+    def process_request(self, request, client_address):
+        if not self._slots.acquire(blocking=False):
+            self._reject(request)
+            return
+        future = self._pool.submit(self.process_request_thread, request, client_address)
+        with self._pending_lock:
+            self._pending.add(future)
+        future.add_done_callback(self._forget)
+
+    def _forget(self, future):
+        with self._pending_lock:
+            self._pending.discard(future)
+        self._slots.release()
+
+    def _reject(self, request):
+        """Answer 503 from the accept loop when every worker and queue slot is taken"""
+        try:
+            # Read the request head first, so closing doesn't reset the connection before the reply
+            request.settimeout(REJECT_TIMEOUT_S)
+            request.recv(65536)
+            request.sendall(OVERLOADED_RESPONSE)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def drain(self, timeout=DEFAULT_GRACE_S):
+        """Wait for in-flight requests; return how many were still running at the deadline"""
+        with self._pending_lock:
+            pending = set(self._pending)
+        _, not_done = wait(pending, timeout=timeout)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        return len(not_done)
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS, grace=DEFAULT_GRACE_S, backlog=DEFAULT_BACKLOG, queue=DEFAULT_QUEUE, quiet=False):
+    """Run the gateway until SIGINT/SIGTERM, then shut down gracefully"""
+    routes = load_routes()
+    server = GatewayServer((host, port), routes, workers=workers, backlog=backlog, queue=queue, quiet=quiet)
+
+    def stop(signum, frame):
+        print(f"Received signal {signum}, shutting down...")
+        # shutdown() blocks until serve_forever returns, so it can't run on this thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    print(f"Serving {len(routes)} functions on http://{host}:{server.server_address[1]} with {workers} workers")
+    for path in sorted(routes):
+        print(f"  {path}")
+
+    try:
+        server.serve_forever()
+    finally:
+        unfinished = server.drain(grace)
+        server.server_close()
+        if unfinished:
+            print(f"Exited with {unfinished} requests still running after {grace}s")
+        else:
+            print("All in-flight requests finished")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='maximum concurrent requests')
+    parser.add_argument('--grace', type=float, default=DEFAULT_GRACE_S, help='seconds to wait for in-flight requests on shutdown')
+    parser.add_argument('--backlog', type=int, default=DEFAULT_BACKLOG, help='listen queue size')
+    parser.add_argument('--queue', type=int, default=DEFAULT_QUEUE, help='connections allowed to wait for a worker before 503s')
+    parser.add_argument('--quiet', action='store_true', help='disable per-request access logs')
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.workers, args.grace, args.backlog, args.queue, args.quiet)
+
+if __name__ == '__main__':
+    main()
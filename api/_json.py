@@ -0,0 +1,32 @@
+"""
+JSON codec shared by the serverless functions.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise. Both paths produce compact UTF-8 output so responses (and their
+ETags) look the same whichever codec an instance happens to have.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CODEC_NAME = 'orjson' if orjson is not None else 'json'
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+def dumps(data):
+    """Encode data as UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(data, option=_ORJSON_OPTIONS)
+    return _encoder.encode(data).encode('utf-8')
+
+def loads(raw):
+    """Decode JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
@@ -0,0 +1,212 @@
+"""
+In-process latency metrics for the serverless functions.
+
+Each request gets a RequestMetrics that accumulates time per phase (body
+parse, upstream calls, transform, serialize) and is rendered as a
+Server-Timing header. Finished requests feed per-route and per-phase
+histograms, with requests that matched no route sharing the UNMATCHED one
+so unknown paths can't grow them without bound, and every upstream call
+feeds a per-host histogram. Metrics live in the process, so on Vercel they
+describe one warm instance; under the gateway they cover the whole server.
+"""
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+# Upper bounds of the histogram buckets, in milliseconds
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+PHASES = ('parse', 'upstream', 'transform', 'serialize')
+UNMATCHED = 'unmatched'
+
+class Histogram:
+    """Fixed-bucket latency histogram with approximate percentiles"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms):
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of observations"""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank:
+                bound = BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else self.max_ms
+                return round(min(bound, self.max_ms), 2)
+        return round(self.max_ms, 2)
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'meanMs': round(self.total_ms / self.count, 2) if self.count else None,
+            'p50Ms': self.percentile(0.5),
+            'p95Ms': self.percentile(0.95),
+            'p99Ms': self.percentile(0.99),
+            'maxMs': round(self.max_ms, 2)
+        }
+
+class RequestMetrics:
+    """Phase timings of one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.upstream_calls = 0
+        self.status = None
+        self.route = None
+        self._in_flight = 0
+        self._in_flight_since = None
+        self._lock = threading.Lock()
+
+    def add(self, phase, ms):
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + ms
+
+    def upstream_started(self):
+        with self._lock:
+            if self._in_flight == 0:
+                self._in_flight_since = time.perf_counter()
+            self._in_flight += 1
+            self.upstream_calls += 1
+
+    def upstream_finished(self):
+        # Parallel calls overlap, so only wall time with any call in flight counts
+        with self._lock:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self.phases['upstream'] += (time.perf_counter() - self._in_flight_since) * 1000
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def finalize_transform(self):
+        """Attribute handler time not spent parsing, waiting upstream or serializing"""
+        measured = self.phases['parse'] + self.phases['upstream'] + self.phases['serialize']
+        self.phases['transform'] = max(self.elapsed_ms() - measured, 0.0)
+
+    def server_timing(self):
+        """Render the phases as a Server-Timing header value"""
+        entries = [
+            f'{phase};dur={ms:.1f}' for phase, ms in self.phases.items() if ms
+        ]
+        if self.upstream_calls:
+            entries.append(f'upstream-calls;desc="{self.upstream_calls}"')
+        entries.append(f'total;dur={self.elapsed_ms():.1f}')
+        return ', '.join(entries)
+
+_local = threading.local()
+_lock = threading.Lock()
+_endpoints = {}
+_upstreams = {}
+
+def begin_request():
+    """Start timing a request on the current thread"""
+    request = RequestMetrics()
+    _local.request = request
+    return request
+
+def current_request():
+    """The request being handled on this thread, if any"""
+    return getattr(_local, 'request', None)
+
+def set_route(route):
+    """Record the current request under the route it matched"""
+    request = current_request()
+    if request is not None:
+        request.route = route
+
+def end_request(request, endpoint):
+    """Record a finished request into the endpoint histograms"""
+    if getattr(_local, 'request', None) is request:
+        _local.request = None
+    total_ms = request.elapsed_ms()
+    with _lock:
+        stats = _endpoints.get(endpoint)
+        if stats is None:
+            stats = _endpoints[endpoint] = {
+                'latency': Histogram(),
+                'phases': {phase: Histogram() for phase in PHASES},
+                'errors': 0
+            }
+        stats['latency'].observe(total_ms)
+        for phase, ms in request.phases.items():
+            if ms:
+                stats['phases'][phase].observe(ms)
+        if request.status is not None and request.status >= 500:
+            stats['errors'] += 1
+
+def bind(fn):
+    """Wrap fn so work it does on a pool thread is attributed to the current request"""
+    request = current_request()
+    if request is None:
+        return fn
+
+    def bound(*args, **kwargs):
+        previous = getattr(_local, 'request', None)
+        _local.request = request
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.request = previous
+    return bound
+
+@contextmanager
+def phase(name):
+    """Add the time spent in the block to a phase of the current request"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        request = current_request()
+        if request is not None:
+            request.add(name, (time.perf_counter() - started) * 1000)
+
+@contextmanager
+def upstream(host):
+    """Time an upstream call against its host and the current request"""
+    request = current_request()
+    if request is not None:
+        request.upstream_started()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = (time.perf_counter() - started) * 1000
+        if request is not None:
+            request.upstream_finished()
+        with _lock:
+            histogram = _upstreams.get(host)
+            if histogram is None:
+                histogram = _upstreams[host] = Histogram()
+            histogram.observe(ms)
+
+def snapshot():
+    """All histograms as plain data"""
+    with _lock:
+        return {
+            'endpoints': {
+                endpoint: {
+                    **stats['latency'].snapshot(),
+                    'errors': stats['errors'],
+                    'phases': {
+                        name: histogram.snapshot()
+                        for name, histogram in stats['phases'].items() if histogram.count
+                    }
+                }
+                for endpoint, stats in sorted(_endpoints.items())
+            },
+            'upstreams': {host: histogram.snapshot() for host, histogram in sorted(_upstreams.items())},
+            'bucketBoundsMs': list(BUCKET_BOUNDS_MS)
+        }
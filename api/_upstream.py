@@ -0,0 +1,97 @@
+"""
+Pooled HTTP client shared by every handler that calls an upstream API.
+
+One requests.Session is kept per host for the life of the warm instance, so
+connections (and their TLS handshakes) are reused across invocations. Every
+call has explicit connect/read timeouts. GETs are retried here, and only here,
+with exponential backoff on connection errors and 5xx statuses, within a
+deadline for the whole call so one stuck upstream cannot pin a worker.
+"""
+import time
+import threading
+from urllib.parse import urlparse
+from api import _metrics
+
+CONNECT_TIMEOUT_S = 5
+READ_TIMEOUT_S = 30
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (500, 502, 503, 504)
+DEFAULT_DEADLINE_S = 45
+POOL_MAXSIZE = 10
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def __getattr__(name):
+    # requests is imported lazily, so its HTTPError is exposed the same way
+    if name == 'HTTPError':
+        from requests.exceptions import HTTPError
+        return HTTPError
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _create_session():
+    """Create a keep-alive session"""
+    # requests takes a noticeable share of cold start, so load it on first use
+    import requests
+    from requests.adapters import HTTPAdapter
+    
+    # No urllib3 retries: get() is the only retry layer, so it can keep
+    # every attempt inside the call's deadline
+    adapter = HTTPAdapter(pool_maxsize=POOL_MAXSIZE, max_retries=0)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def get_session(url):
+    """Return the pooled session for the host of a URL"""
+    host = urlparse(url).netloc
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = _sessions[host] = _create_session()
+        return session
+
+def _can_retry(attempt, delay, expires):
+    return attempt < MAX_RETRIES and time.monotonic() + delay < expires
+
+def get(url, params=None, timeout=None, deadline=None, **kwargs):
+    """
+    GET through the pooled session for the URL's host.
+
+    Connection errors, timeouts and 5xx responses are retried up to
+    MAX_RETRIES times while the deadline (seconds for the whole call, default
+    DEFAULT_DEADLINE_S) allows; each attempt's timeouts are cut to the time
+    left. The last 5xx response is returned so callers can inspect it.
+    """
+    from requests.exceptions import ConnectionError, Timeout
+    
+    connect_timeout, read_timeout = timeout or (CONNECT_TIMEOUT_S, READ_TIMEOUT_S)
+    expires = time.monotonic() + (deadline or DEFAULT_DEADLINE_S)
+    session = get_session(url)
+    host = urlparse(url).netloc
+    
+    for attempt in range(MAX_RETRIES + 1):
+        remaining = max(expires - time.monotonic(), 0.1)
+        attempt_timeout = (min(connect_timeout, remaining), min(read_timeout, remaining))
+        delay = BACKOFF_FACTOR * 2 ** attempt
+        try:
+            with _metrics.upstream(host):
+                response = session.get(url, params=params, timeout=attempt_timeout, **kwargs)
+        except (ConnectionError, Timeout) as error:
+            if not _can_retry(attempt, delay, expires):
+                raise
+            print(f"Retrying GET {host} in {delay} seconds after {type(error).__name__}")
+        else:
+            if response.status_code not in RETRY_STATUSES or not _can_retry(attempt, delay, expires):
+                return response
+            print(f"Retrying GET {host} in {delay} seconds after status {response.status_code}")
+            response.close()
+        time.sleep(delay)
+
+def post(url, timeout=None, **kwargs):
+    """POST through the pooled session for the URL's host (never retried)"""
+    timeout = timeout or (CONNECT_TIMEOUT_S, READ_TIMEOUT_S)
+    with _metrics.upstream(urlparse(url).netloc):
+        return get_session(url).post(url, timeout=timeout, **kwargs)
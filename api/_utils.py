@@ -1,37 +1,220 @@
 """
 Shared utility functions for Vercel serverless functions
 """
-import json
+import os
+import sys
+import zlib
+import hashlib
+from http.server import BaseHTTPRequestHandler
+from api import _json
+from api import _metrics
+
+# Bodies smaller than this are sent as-is; compressing them costs more than it saves
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+DEFAULT_CACHE_CONTROL = 'no-cache'
+MAX_REQUEST_BODY_BYTES = int(os.environ.get('MAX_REQUEST_BODY_BYTES', 10 * 1024 * 1024))
+# Full request and upstream payloads are only printed when this is set
+DEBUG_PAYLOADS = os.environ.get('API_DEBUG_PAYLOADS', '').lower() in ('1', 'true', 'yes')
+# Directory holding api/, which function routes are relative to
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class RequestBodyTooLarge(Exception):
+    """Raised when a request body exceeds MAX_REQUEST_BODY_BYTES"""
+    status_code = 413
+
+def handler_route(handler_cls):
+    """URL path a handler class's file is served at (/api/bcb/getDailySeries), like Vercel"""
+    filename = getattr(sys.modules.get(handler_cls.__module__), '__file__', None)
+    if not filename:
+        return _metrics.UNMATCHED
+    relative = os.path.relpath(os.path.abspath(filename), ROOT_DIR)
+    if relative.startswith('..'):
+        return _metrics.UNMATCHED
+    return '/' + os.path.splitext(relative)[0].replace(os.sep, '/')
+
+class InstrumentedHandler(BaseHTTPRequestHandler):
+    """Request handler base that records each request's timings in api._metrics"""
+
+    def handle_one_request(self):
+        request = _metrics.begin_request()
+        try:
+            super().handle_one_request()
+        finally:
+            # An empty request line means the client closed the connection
+            if getattr(self, 'raw_requestline', None):
+                _metrics.end_request(request, request.route or self.metrics_route())
+
+    def metrics_route(self):
+        """Route recorded when the request did not set one: the function's own"""
+        # Keyed by the handler, not the request path, so metrics stay bounded
+        return handler_route(type(self))
+
+    def send_response(self, code, message=None):
+        request = _metrics.current_request()
+        if request is not None:
+            request.status = code
+        super().send_response(code, message)
+
+def debug_log(*args):
+    """Print payloads only when API_DEBUG_PAYLOADS is enabled"""
+    if DEBUG_PAYLOADS:
+        print(*args)
+
+def send_server_timing(handler):
+    """Send the current request's phase timings as a Server-Timing header"""
+    request = _metrics.current_request()
+    if request is None:
+        return
+    request.finalize_transform()
+    handler.send_header('Server-Timing', request.server_timing())
+    handler.send_header('Timing-Allow-Origin', '*')
 
 def send_cors_headers(handler, methods='GET, POST, OPTIONS'):
     """Send CORS headers"""
     handler.send_header('Access-Control-Allow-Origin', '*')
     handler.send_header('Access-Control-Allow-Methods', methods)
-    handler.send_header('Access-Control-Allow-Headers', 'Content-Type')
+    handler.send_header('Access-Control-Allow-Headers', 'Authorization, Content-Type, If-None-Match')
+    handler.send_header('Access-Control-Expose-Headers', 'ETag, Server-Timing')
+
+def _accepted_encodings(handler):
+    """Parse Accept-Encoding into {coding: q}"""
+    accepted = {}
+    for item in handler.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+def accepts_encoding(handler, encoding):
+    """Check whether the client listed an encoding in Accept-Encoding"""
+    accepted = _accepted_encodings(handler)
+    return accepted.get(encoding, accepted.get('*', 0)) > 0
 
-def send_json_response(handler, data, status_code=200, methods='GET, POST, OPTIONS'):
-    """Send a JSON response with proper headers"""
+def _brotli():
+    """Return the brotli module when it is installed"""
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+def choose_encoding(handler):
+    """Pick the best content coding the client accepts: br, then gzip, else None"""
+    if accepts_encoding(handler, 'br') and _brotli() is not None:
+        return 'br'
+    if accepts_encoding(handler, 'gzip'):
+        return 'gzip'
+    return None
+
+def compress_body(body, encoding):
+    """Compress a response body with the given content coding"""
+    if encoding == 'br':
+        return _brotli().compress(body, quality=BROTLI_QUALITY)
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+def make_etag(body):
+    """Weak validator for an uncompressed body, so it holds across encodings"""
+    return 'W/"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+def etag_matches(handler, etag):
+    """Check an ETag against If-None-Match using weak comparison"""
+    header = handler.headers.get('If-None-Match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    return any(
+        (tag.strip()[2:] if tag.strip().startswith('W/') else tag.strip()) == opaque
+        for tag in header.split(',')
+    )
+
+def send_json_response(handler, data, status_code=200, methods='GET, POST, OPTIONS', cache_control=DEFAULT_CACHE_CONTROL):
+    """Send a JSON response with validators, compressed when the client accepts it"""
+    with _metrics.phase('serialize'):
+        # Content-Length and the ETag need the whole body, so it is encoded in one pass
+        body = _json.dumps(data)
+        cacheable = status_code == 200
+        # Conditional requests only apply to safe methods; a POST must always run and answer
+        validated = cacheable and getattr(handler, 'command', None) in ('GET', 'HEAD')
+        etag = make_etag(body) if validated else None
+        not_modified = validated and etag_matches(handler, etag)
+        
+        encoding = None
+        if not not_modified and len(body) >= MIN_COMPRESS_BYTES:
+            encoding = choose_encoding(handler)
+        if encoding:
+            body = compress_body(body, encoding)
+    
+    if not_modified:
+        handler.send_response(304)
+        send_cors_headers(handler, methods)
+        send_server_timing(handler)
+        handler.send_header('ETag', etag)
+        handler.send_header('Cache-Control', cache_control)
+        handler.send_header('Vary', 'Accept-Encoding')
+        handler.end_headers()
+        return
+    
     handler.send_response(status_code)
     send_cors_headers(handler, methods)
+    send_server_timing(handler)
     handler.send_header('Content-Type', 'application/json')
+    if validated:
+        handler.send_header('ETag', etag)
+    if cacheable:
+        handler.send_header('Cache-Control', cache_control)
+    else:
+        handler.send_header('Cache-Control', 'no-store')
+    
+    handler.send_header('Vary', 'Accept-Encoding')
+    if encoding:
+        handler.send_header('Content-Encoding', encoding)
+    handler.send_header('Content-Length', str(len(body)))
     handler.end_headers()
-    handler.wfile.write(json.dumps(data).encode())
+    handler.wfile.write(body)
 
 def send_text_response(handler, text, status_code=200, methods='GET, POST, OPTIONS'):
     """Send a text response with proper headers"""
     handler.send_response(status_code)
     send_cors_headers(handler, methods)
+    send_server_timing(handler)
     handler.send_header('Content-Type', 'text/plain; charset=utf-8')
     handler.end_headers()
     handler.wfile.write(text.encode('utf-8'))
 
+def send_ndjson_headers(handler, status_code=200, methods='GET, POST, OPTIONS'):
+    """Start a streamed newline-delimited JSON response"""
+    handler.send_response(status_code)
+    send_cors_headers(handler, methods)
+    send_server_timing(handler)
+    handler.send_header('Content-Type', 'application/x-ndjson')
+    handler.send_header('Cache-Control', 'no-cache')
+    handler.end_headers()
+
+def write_ndjson_line(handler, data):
+    """Write one JSON object of a streamed response and flush it to the client"""
+    handler.wfile.write(_json.dumps(data) + b'\n')
+    handler.wfile.flush()
+
 def send_error_response(handler, error, status_code=500, methods='GET, POST, OPTIONS'):
     """Send an error response"""
     error_data = {
         'error': str(error),
         'details': str(error.__cause__) if error.__cause__ else None
     }
-    send_json_response(handler, error_data, status_code, methods)
+    send_json_response(handler, error_data, getattr(error, 'status_code', status_code), methods)
 
 def send_cors_preflight(handler, methods='GET, POST, OPTIONS'):
     """Handle CORS preflight OPTIONS request"""
@@ -39,10 +222,13 @@ def send_cors_preflight(handler, methods='GET, POST, OPTIONS'):
     send_cors_headers(handler, methods)
     handler.end_headers()
 
-def get_request_body(handler):
+def get_request_body(handler, max_bytes=MAX_REQUEST_BODY_BYTES):
     """Read and parse JSON request body"""
     content_length = int(handler.headers.get('Content-Length', 0))
-    if content_length == 0:
+    if content_length <= 0:
         return {}
-    body = handler.rfile.read(content_length).decode('utf-8')
-    return json.loads(body) if body else {}
+    if content_length > max_bytes:
+        raise RequestBodyTooLarge(f"Request body of {content_length} bytes exceeds the {max_bytes} byte limit.")
+    with _metrics.phase('parse'):
+        body = handler.rfile.read(content_length)
+        return _json.loads(body) if body.strip() else {}
@@ -0,0 +1,188 @@
+"""
+Vectorized fixed-income accrual engine.
+
+Values a list of renda fixa investments (the `details` documents saved by the
+client) against BCB series using NumPy cumulative products, mirroring the
+rules OtherInvestmentCard.jsx used to apply one day at a time:
+
+- prefixado: (1 + rate) ** (calendar days / 365.25)
+- posfixado: product of (1 + daily CDI/Selic * indexer percentage)
+- hibrido: product of monthly IPCA/IGP-M * (1 + spread) ** (business days / 252)
+"""
+from datetime import date
+import numpy as np
+from api.bcb._factor_index import FactorIndex, parse_rows
+
+BUSINESS_DAYS_PER_YEAR = 252
+DAYS_PER_YEAR = 365.25
+
+# Numeric fields each yield type needs besides invested_amount
+RATE_FIELDS = {
+    'prefixado': ('rate',),
+    'posfixado': ('indexer_percentage',),
+    'hibrido': ('spread_rate',),
+}
+
+def _parse_date(date_str):
+    return date.fromisoformat(date_str[:10])
+
+def _is_date(value):
+    try:
+        _parse_date(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+def _is_number(value):
+    if isinstance(value, bool):
+        return False
+    try:
+        return np.isfinite(float(value))
+    except (TypeError, ValueError):
+        return False
+
+def validate_investment(details):
+    """Return why an investment cannot be valued, or None if it can"""
+    if not isinstance(details, dict):
+        return 'Investment must be an object'
+    if not isinstance(details.get('start_date'), str) or not _is_date(details['start_date']):
+        return 'start_date must be a YYYY-MM-DD date'
+    if details.get('due_date') and (not isinstance(details['due_date'], str) or not _is_date(details['due_date'])):
+        return 'due_date must be a YYYY-MM-DD date'
+    if not _is_number(details.get('invested_amount')):
+        return 'invested_amount must be a number'
+
+    yield_type = details.get('yield_type')
+    if yield_type in ('posfixado', 'hibrido') and not details.get('indexer'):
+        return f'indexer is required for {yield_type}'
+    for field in RATE_FIELDS.get(yield_type, ()):
+        if not _is_number(details.get(field)):
+            return f'{field} must be a number for {yield_type}'
+    return None
+
+def get_series_spec(details):
+    """Return the (series_id, periodicity) an investment accrues on, or None"""
+    yield_type = details.get('yield_type')
+    indexer = details.get('indexer')
+    if yield_type == 'posfixado' and indexer:
+        return (12 if indexer == 'CDI' else 11), 'daily'
+    if yield_type == 'hibrido' and indexer:
+        return (433 if indexer == 'IPCA' else 189), 'monthly'
+    return None
+
+def get_accrual_period(details, today=None):
+    """Return the (start, end) accrual dates, or None if nothing has accrued"""
+    today = today or date.today()
+    start = _parse_date(details['start_date'])
+    end = _parse_date(details['due_date']) if details.get('due_date') else today
+    end = min(end, today)
+    if end <= start:
+        return None
+    return start, end
+
+def get_required_series(investments, today=None):
+    """Return the series specs needed to value the given investments"""
+    specs = []
+    for details in investments:
+        if validate_investment(details) is not None:
+            continue
+        spec = get_series_spec(details)
+        period = get_accrual_period(details, today)
+        if spec is None or period is None:
+            continue
+        series_id, periodicity = spec
+        specs.append({
+            'seriesId': series_id,
+            'startDate': period[0].isoformat(),
+            'endDate': period[1].isoformat(),
+            'periodicity': periodicity,
+        })
+    return specs
+
+def _value_prefixado(items):
+    principal = np.array([float(d['invested_amount']) for _, d, _ in items])
+    rate = np.array([float(d['rate']) for _, d, _ in items]) / 100
+    days = np.array([(end - start).days for _, _, (start, end) in items], dtype=np.float64)
+    return principal, np.power(1 + rate, days / DAYS_PER_YEAR)
+
+def _value_posfixado(items, dates, rates):
+    principal = np.array([float(d['invested_amount']) for _, d, _ in items])
+    percentage = np.array([float(d['indexer_percentage']) for _, d, _ in items]) / 100
+    starts = np.array([start for _, _, (start, _) in items], dtype='datetime64[D]')
+    ends = np.array([end for _, _, (_, end) in items], dtype='datetime64[D]')
+
+    factors = np.empty(len(items))
+    # The prefix product depends on the percentage, so share it per percentage;
+    # the rows are parsed once for all of them
+    for value in np.unique(percentage):
+        mask = percentage == value
+        index = FactorIndex(dates, rates, value)
+        factors[mask] = index.factors(starts[mask], ends[mask])
+    return principal, factors
+
+def _value_hibrido(items, dates, rates):
+    principal = np.array([float(d['invested_amount']) for _, d, _ in items])
+    spread = np.array([float(d['spread_rate']) for _, d, _ in items]) / 100
+    starts = np.array([start for _, _, (start, _) in items], dtype='datetime64[D]')
+    ends = np.array([end for _, _, (_, end) in items], dtype='datetime64[D]')
+
+    # Inflation published after the start date (exact print dates, never
+    # rolled to business days), business-day prorated spread
+    index = FactorIndex(dates, rates, business_days=False)
+    inflation = index.factors(starts, ends, include_start=False)
+    business_days = np.busday_count(starts, ends)
+    fixed = np.power(1 + spread, business_days / BUSINESS_DAYS_PER_YEAR)
+    return principal, inflation * fixed
+
+def value_investments(investments, rates, today=None):
+    """
+    Value a list of investments.
+
+    Args:
+        investments: list of investment details dicts
+        rates: dict of series id (str) -> BCB rows for that series
+        today: valuation date, defaults to date.today()
+
+    Returns:
+        list: [{'currentValue': float | None, 'factor': float | None}, ...]
+        in the same order as `investments`; investments that cannot be
+        valued also carry an 'error' message
+    """
+    today = today or date.today()
+    results = [{'currentValue': None, 'factor': None} for _ in investments]
+
+    groups = {}
+    for index, details in enumerate(investments):
+        error = validate_investment(details)
+        if error is not None:
+            results[index]['error'] = error
+            continue
+        period = get_accrual_period(details, today)
+        if period is None:
+            continue
+        yield_type = details.get('yield_type')
+        if yield_type == 'prefixado':
+            key = ('prefixado', None)
+        elif yield_type in ('posfixado', 'hibrido'):
+            key = (yield_type, get_series_spec(details)[0])
+        else:
+            continue
+        groups.setdefault(key, []).append((index, details, period))
+
+    for (yield_type, series_id), items in groups.items():
+        if yield_type == 'prefixado':
+            principal, factors = _value_prefixado(items)
+        else:
+            rows = rates.get(str(series_id))
+            if rows is None:
+                continue
+            dates, series_rates = parse_rows(rows)
+            if yield_type == 'posfixado':
+                principal, factors = _value_posfixado(items, dates, series_rates)
+            else:
+                principal, factors = _value_hibrido(items, dates, series_rates)
+
+        for (index, _, _), amount, factor in zip(items, principal, factors):
+            results[index] = {'currentValue': float(amount * factor), 'factor': float(factor)}
+
+    return results
@@ -0,0 +1,132 @@
+"""
+Prefix-product index for compounded BCB rate factors.
+
+The cumulative product of (1 + rate * multiplier) is stored per date, so the
+factor between any two dates is a binary search and one division regardless
+of how long the range is. Daily series are aligned to a business-day
+calendar; monthly series keep their exact publication dates, since a print
+dated on a weekend must not move across an investment's start or end date.
+"""
+import threading
+from collections import OrderedDict
+import numpy as np
+from api.bcb._store import get_store
+
+# Indexes are per (series, periodicity, multiplier), so only the most
+# recently used ones are kept
+MAX_CACHED_INDEXES = 32
+
+def parse_rows(rows):
+    """Convert BCB rows ({'data': 'dd/mm/yyyy', 'valor': '0.04'}) into (dates, rates as fractions)"""
+    # Reordering the string is much cheaper than strptime on long series
+    dates = np.array(
+        [f"{row['data'][6:10]}-{row['data'][3:5]}-{row['data'][0:2]}" for row in rows],
+        dtype='datetime64[D]'
+    )
+    rates = np.array([row['valor'] for row in rows], dtype=np.float64) / 100
+    return dates, rates
+
+class FactorIndex:
+    """Cumulative rate factors by date"""
+
+    def __init__(self, dates, rates, multiplier=1.0, business_days=True):
+        """
+        Args:
+            dates: sorted datetime64[D] observation dates
+            rates: rates as fractions (0.0004 for 0.04%)
+            multiplier: share of the rate accrued (1.1 for 110% of CDI)
+            business_days: align observations to business days (daily
+                series); monthly series are indexed on their exact dates
+        """
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        rates = np.asarray(rates, dtype=np.float64)
+        self.business_days = business_days
+        if len(dates) == 0:
+            self.calendar = np.array([], dtype='datetime64[D]')
+            self.prefix = np.ones(1)
+            return
+
+        if business_days:
+            # Weekend observations accrue on the next business day
+            dates = np.busday_offset(dates, 0, roll='forward')
+            self.calendar = np.arange(dates[0], dates[-1] + 1, dtype='datetime64[D]')
+            self.calendar = self.calendar[np.is_busday(self.calendar)]
+        else:
+            self.calendar = np.unique(dates)
+
+        growth = np.ones(len(self.calendar))
+        positions = np.searchsorted(self.calendar, dates)
+        np.multiply.at(growth, positions, 1 + rates * multiplier)
+        self.prefix = np.concatenate(([1.0], np.cumprod(growth)))
+
+    @classmethod
+    def from_rows(cls, rows, multiplier=1.0, business_days=True):
+        """Build an index from BCB rows"""
+        dates, rates = parse_rows(rows)
+        return cls(dates, rates, multiplier, business_days)
+
+    def factors(self, starts, ends, include_start=True):
+        """
+        Return the compounded factor over each [start, end] pair.
+
+        With include_start=False observations on the start date itself are
+        left out, i.e. the window is (start, end].
+        """
+        starts = np.asarray(starts, dtype='datetime64[D]')
+        ends = np.asarray(ends, dtype='datetime64[D]')
+        if self.business_days:
+            starts = np.busday_offset(starts, 0, roll='forward' if include_start else 'backward')
+        side = 'left' if include_start else 'right'
+        lo = np.searchsorted(self.calendar, starts, side=side)
+        hi = np.searchsorted(self.calendar, ends, side='right')
+        return self.prefix[np.maximum(hi, lo)] / self.prefix[lo]
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+def get_factor_index(series_id, multiplier=1.0, periodicity='daily'):
+    """
+    Return the index over everything the series store holds for a series.
+
+    Indexes are kept per warm instance, least recently used first out, and
+    rebuilt when the store's coverage of the series changes.
+    """
+    series_id = int(series_id)
+    business_days = periodicity == 'daily'
+    store = get_store()
+    coverage = store.get_coverage(series_id)
+    key = (series_id, business_days, float(multiplier))
+
+    with _indexes_lock:
+        cached = _indexes.get(key)
+        if cached is not None and cached[0] == coverage:
+            _indexes.move_to_end(key)
+            return cached[1]
+
+    if coverage is None:
+        index = FactorIndex([], [], multiplier, business_days)
+    else:
+        index = FactorIndex.from_rows(store.load(series_id, *coverage), multiplier, business_days)
+
+    with _indexes_lock:
+        _indexes[key] = (coverage, index)
+        _indexes.move_to_end(key)
+        while len(_indexes) > MAX_CACHED_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+def get_range_factors(series_id, ranges, multiplier=1.0, periodicity='daily'):
+    """
+    Return [{'startDate', 'endDate', 'factor'}] for many date ranges.
+
+    Daily rates accrue from the start date on; monthly prints count only when
+    published after the start date, the rule hibrido investments use.
+    """
+    index = get_factor_index(series_id, multiplier, periodicity)
+    starts = [item['startDate'][:10] for item in ranges]
+    ends = [item['endDate'][:10] for item in ranges]
+    factors = index.factors(starts, ends, include_start=periodicity == 'daily')
+    return [
+        {'startDate': item['startDate'], 'endDate': item['endDate'], 'factor': float(factor)}
+        for item, factor in zip(ranges, factors)
+    ]
@@ -0,0 +1,79 @@
+"""
+Cache for the latest published value of BCB indicators.
+
+Entries are served from memory for LATEST_TTL_S seconds. Once stale, the
+cached value is still returned right away while a background thread fetches
+the new one (stale-while-revalidate).
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from api import _metrics
+from api.bcb._series import _make_request
+
+LATEST_TTL_S = int(os.environ.get('BCB_LATEST_TTL_SECONDS', 6 * 60 * 60))
+
+INDICATORS = {
+    'ipca': 433,
+    'igpm': 189,
+    'cdi': 12,
+    'selic': 11,
+}
+
+_cache = {}
+_refreshing = set()
+_lock = threading.Lock()
+
+def _fetch_latest(series_id):
+    """Fetch the latest row of a series and store it in the cache"""
+    result = _make_request(series_id)
+    row = result[0] if isinstance(result, list) and len(result) > 0 else None
+    with _lock:
+        _cache[series_id] = (row, time.monotonic())
+    return row
+
+def _refresh_in_background(series_id):
+    """Refresh a stale entry unless a refresh is already running"""
+    with _lock:
+        if series_id in _refreshing:
+            return
+        _refreshing.add(series_id)
+    
+    def refresh():
+        try:
+            _fetch_latest(series_id)
+        except Exception as error:
+            print(f"Error refreshing latest value of series {series_id}: {error}")
+        finally:
+            with _lock:
+                _refreshing.discard(series_id)
+    
+    threading.Thread(target=refresh, daemon=True).start()
+
+def get_latest(series_id):
+    """Get the latest BCB row ({'data', 'valor'}) of a series, or None"""
+    with _lock:
+        cached = _cache.get(series_id)
+    
+    if cached is None:
+        return _fetch_latest(series_id)
+    
+    row, fetched_at = cached
+    if time.monotonic() - fetched_at > LATEST_TTL_S:
+        _refresh_in_background(series_id)
+    return row
+
+def get_latest_value(series_id):
+    """Get the latest published value of a series, or None"""
+    row = get_latest(series_id)
+    return row['valor'] if row else None
+
+def get_latest_indicators():
+    """Get the latest value of every indicator, fetching misses concurrently"""
+    with ThreadPoolExecutor(max_workers=len(INDICATORS)) as executor:
+        futures = {
+            name: executor.submit(_metrics.bind(get_latest_value), series_id)
+            for name, series_id in INDICATORS.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
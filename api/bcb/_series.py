@@ -0,0 +1,123 @@
+"""
+Shared BCB SGS client used by the series endpoints
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from api import _upstream
+from api import _metrics
+from api.bcb._store import get_store, format_bcb_date, parse_bcb_date
+
+BASE_URL = os.environ.get('BCB_BASE_URL', "https://api.bcb.gov.br/dados/serie")
+
+# SGS rejects or throttles long daily windows, so they are split into chunks
+DAILY_CHUNK_DAYS = 365 * 2
+MAX_CONCURRENT_CHUNKS = 4
+# Total time one window may take, retries included (retries live in _upstream)
+WINDOW_DEADLINE_S = 40
+
+RESPONSE_FORMATS = ('rows', 'columnar')
+DATE_FORMATS = ('iso', 'epochDay')
+EPOCH = date(1970, 1, 1)
+
+def _make_request(series_id, params=None, deadline=None):
+    """Make request to BCB API"""
+    if params is None:
+        params = {}
+    
+    url = f"{BASE_URL}/bcdata.sgs.{series_id}/dados"
+    
+    if not params or ('dataInicial' not in params and 'dataFinal' not in params):
+        url += "/ultimos/1"
+    
+    params["formato"] = "json"
+    
+    try:
+        response = _upstream.get(url, params=params, deadline=deadline)
+        response.raise_for_status()
+        return response.json()
+    except Exception as error:
+        print(f"Error making request to BCB API: {error}")
+        raise Exception("Error making request to BCB API") from error
+
+def _fetch_window(series_id, start, end):
+    """Fetch one [start, end] window within WINDOW_DEADLINE_S"""
+    params = {
+        "dataInicial": format_bcb_date(start),
+        "dataFinal": format_bcb_date(end),
+    }
+    try:
+        return _make_request(series_id, params, deadline=WINDOW_DEADLINE_S)
+    except Exception as error:
+        response = getattr(error.__cause__, 'response', None)
+        if response is not None and response.status_code == 404:
+            # SGS answers 404 for windows without any published observation
+            return []
+        raise
+
+def split_range(start, end, chunk_days):
+    """Split [start, end] into consecutive windows of at most chunk_days days"""
+    windows = []
+    while start <= end:
+        window_end = min(start + timedelta(days=chunk_days - 1), end)
+        windows.append((start, window_end))
+        start = window_end + timedelta(days=1)
+    return windows
+
+def fetch_series(series_id, start, end, periodicity='daily'):
+    """Fetch the [start, end] window of a series straight from the BCB API"""
+    if periodicity != 'daily' or (end - start).days < DAILY_CHUNK_DAYS:
+        return _fetch_window(series_id, start, end)
+    
+    windows = split_range(start, end, DAILY_CHUNK_DAYS)
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_CHUNKS, len(windows))) as executor:
+        chunks = executor.map(_metrics.bind(lambda window: _fetch_window(series_id, *window)), windows)
+        # Chunks share no dates, but dedupe in case SGS pads a window
+        rows = {row['data']: row for chunk in chunks for row in chunk}
+    
+    return sorted(rows.values(), key=lambda row: parse_bcb_date(row['data']))
+
+def get_series(series_id, start, end, periodicity='daily'):
+    """Get series data for [start, end], fetching only what the store lacks"""
+    series_id = int(series_id)
+    store = get_store()
+    
+    for missing_start, missing_end in store.missing_ranges(series_id, start, end):
+        print(f"Fetching series {series_id} from BCB API: {missing_start} to {missing_end}")
+        rows = fetch_series(series_id, missing_start, missing_end, periodicity)
+        store.save(series_id, rows, missing_start, missing_end)
+    
+    return store.load(series_id, start, end)
+
+def format_error(response_format, date_format):
+    """Return why a requested response format is invalid, or None if it is valid"""
+    if response_format not in RESPONSE_FORMATS or date_format not in DATE_FORMATS:
+        return "format must be 'rows' or 'columnar', dateFormat 'iso' or 'epochDay'"
+    return None
+
+def ranges_error(series_id, ranges, percentage):
+    """Return why a ranges-mode request is invalid, or None if it is valid"""
+    if not series_id or not isinstance(ranges, list) or not ranges or any(
+        not isinstance(item, dict)
+        or not item.get('startDate') or not isinstance(item['startDate'], str)
+        or not item.get('endDate') or not isinstance(item['endDate'], str)
+        for item in ranges
+    ):
+        return 'Missing required parameters: seriesId, ranges[{startDate, endDate}]'
+    if isinstance(percentage, bool) or not isinstance(percentage, (int, float)):
+        return 'percentage must be a number'
+    return None
+
+def to_columnar(rows, date_format='iso'):
+    """
+    Convert BCB rows into the compact columnar response format.
+
+    Returns {'dates': [...], 'values': [...]} with ISO dates (or days since
+    1970-01-01 for date_format='epochDay') and numeric values.
+    """
+    days = [parse_bcb_date(row['data']) for row in rows]
+    if date_format == 'epochDay':
+        dates = [(day - EPOCH).days for day in days]
+    else:
+        dates = [day.isoformat() for day in days]
+    return {'dates': dates, 'values': [float(row['valor']) for row in rows]}
@@ -0,0 +1,171 @@
+"""
+Persistent local store for BCB SGS series.
+
+Published BCB observations never change, so every series is kept in a SQLite
+file together with the contiguous date range already known to be complete.
+Requests are served from the store and only the missing head/tail of the
+range is fetched from the BCB API. A tail found to have nothing published
+yet is remembered for BCB_TAIL_CHECK_TTL_S, so requests ending today don't
+ask BCB for it again on every page load.
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+# Vercel functions can only write to /tmp, so the store defaults there
+DEFAULT_STORE_PATH = os.path.join(tempfile.gettempdir(), 'bcb_series.sqlite3')
+# How long an unpublished tail is trusted to still be empty
+DEFAULT_TAIL_CHECK_TTL_S = 15 * 60
+
+BCB_DATE_FORMAT = "%d/%m/%Y"
+
+def parse_bcb_date(value):
+    """Parse a dd/mm/yyyy BCB date into a date"""
+    return datetime.strptime(value, BCB_DATE_FORMAT).date()
+
+def format_bcb_date(value):
+    """Format a date as dd/mm/yyyy for the BCB API"""
+    return value.strftime(BCB_DATE_FORMAT)
+
+class SeriesStore:
+    """SQLite-backed store of BCB observations keyed by series id"""
+
+    def __init__(self, path=None, tail_check_ttl=None):
+        self.path = path or os.environ.get('BCB_STORE_PATH', DEFAULT_STORE_PATH)
+        if tail_check_ttl is None:
+            tail_check_ttl = float(os.environ.get('BCB_TAIL_CHECK_TTL_S', DEFAULT_TAIL_CHECK_TTL_S))
+        self.tail_check_ttl = tail_check_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS observations ("
+                " series_id INTEGER NOT NULL,"
+                " date TEXT NOT NULL,"
+                " valor TEXT NOT NULL,"
+                " PRIMARY KEY (series_id, date))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS coverage ("
+                " series_id INTEGER PRIMARY KEY,"
+                " start_date TEXT NOT NULL,"
+                " end_date TEXT NOT NULL)"
+            )
+            # Dates after the coverage end were asked for through checked_through at checked_at
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tail_checks ("
+                " series_id INTEGER PRIMARY KEY,"
+                " checked_through TEXT NOT NULL,"
+                " checked_at REAL NOT NULL)"
+            )
+
+    def get_coverage(self, series_id):
+        """Return the (start, end) dates known to be complete, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT start_date, end_date FROM coverage WHERE series_id = ?",
+                (series_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return date.fromisoformat(row[0]), date.fromisoformat(row[1])
+
+    def save(self, series_id, rows, start, end):
+        """
+        Store BCB rows fetched for [start, end] and extend the coverage.
+
+        Only the part of the window up to the latest published observation is
+        marked as complete; the unpublished rest is recorded as a tail check,
+        so it is only fetched again once the check is older than the TTL.
+        """
+        parsed = [(parse_bcb_date(row['data']), row['valor']) for row in rows]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO observations (series_id, date, valor) VALUES (?, ?, ?)",
+                [(series_id, day.isoformat(), valor) for day, valor in parsed]
+            )
+            latest = self._conn.execute(
+                "SELECT MAX(date) FROM observations WHERE series_id = ?",
+                (series_id,)
+            ).fetchone()[0]
+            if latest is None:
+                return
+            covered_end = min(end, date.fromisoformat(latest))
+            if covered_end < start:
+                return
+
+            row = self._conn.execute(
+                "SELECT start_date, end_date FROM coverage WHERE series_id = ?",
+                (series_id,)
+            ).fetchone()
+            if row is not None:
+                start = min(start, date.fromisoformat(row[0]))
+                covered_end = max(covered_end, date.fromisoformat(row[1]))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO coverage (series_id, start_date, end_date) VALUES (?, ?, ?)",
+                (series_id, start.isoformat(), covered_end.isoformat())
+            )
+            if end > covered_end:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO tail_checks (series_id, checked_through, checked_at) VALUES (?, ?, ?)",
+                    (series_id, end.isoformat(), time.time())
+                )
+
+    def load(self, series_id, start, end):
+        """Return stored rows in [start, end] in the BCB response format"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date, valor FROM observations"
+                " WHERE series_id = ? AND date BETWEEN ? AND ? ORDER BY date",
+                (series_id, start.isoformat(), end.isoformat())
+            ).fetchall()
+        return [
+            {'data': format_bcb_date(date.fromisoformat(day)), 'valor': valor}
+            for day, valor in rows
+        ]
+
+    def missing_ranges(self, series_id, start, end):
+        """
+        Return the (start, end) windows that still have to be fetched.
+
+        Coverage is kept contiguous: a window that does not touch the covered
+        range is widened up to it instead of leaving a gap. A tail recently
+        checked through end is not fetched again.
+        """
+        coverage = self.get_coverage(series_id)
+        if coverage is None:
+            return [(start, end)]
+
+        covered_start, covered_end = coverage
+        missing = []
+        if start < covered_start:
+            missing.append((start, covered_start - timedelta(days=1)))
+        if end > covered_end and not self._tail_checked(series_id, end):
+            missing.append((covered_end + timedelta(days=1), end))
+        return missing
+
+    def _tail_checked(self, series_id, end):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT checked_through, checked_at FROM tail_checks WHERE series_id = ?",
+                (series_id,)
+            ).fetchone()
+        return (
+            row is not None
+            and date.fromisoformat(row[0]) >= end
+            and time.time() - row[1] < self.tail_check_ttl
+        )
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """Return the process-wide series store, opening it on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SeriesStore()
+        return _store
@@ -1,29 +1,6 @@
-import requests
-from http.server import BaseHTTPRequestHandler
 from datetime import datetime, timedelta
-from api._utils import send_cors_preflight, send_json_response, send_error_response, get_request_body
-
-BASE_URL = "https://api.bcb.gov.br/dados/serie"
-
-def _make_request(series_id, params=None):
-    """Make request to BCB API"""
-    if params is None:
-        params = {}
-    
-    url = f"{BASE_URL}/bcdata.sgs.{series_id}/dados"
-    
-    if not params or ('dataInicial' not in params and 'dataFinal' not in params):
-        url += "/ultimos/1"
-    
-    params["formato"] = "json"
-    
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
-    except Exception as error:
-        print(f"Error making request to BCB API: {error}")
-        raise Exception("Error making request to BCB API") from error
+from api._utils import InstrumentedHandler, send_cors_preflight, send_json_response, send_error_response, get_request_body
+from api.bcb._series import get_series, to_columnar, format_error, ranges_error
 
 def get_daily_series(series_id, start_date_str, end_date_str):
     """Get daily series data with buffered dates"""
@@ -34,18 +11,21 @@ def get_daily_series(series_id, start_date_str, end_date_str):
     buffered_start_date = start - timedelta(days=5)
     buffered_end_date = end + timedelta(days=5)
     
-    # Format dates as dd/MM/yyyy
-    formatted_start_date = buffered_start_date.strftime("%d/%m/%Y")
-    formatted_end_date = buffered_end_date.strftime("%d/%m/%Y")
+    return get_series(series_id, buffered_start_date.date(), buffered_end_date.date())
+
+def get_daily_factors(series_id, ranges, percentage=100):
+    """Get the compounded factor for many (startDate, endDate) ranges"""
+    # NumPy is only loaded for requests that actually need the index
+    from api.bcb._factor_index import get_range_factors
     
-    params = {
-        "dataInicial": formatted_start_date,
-        "dataFinal": formatted_end_date,
-    }
+    start_date = min(item['startDate'] for item in ranges)
+    end_date = max(item['endDate'] for item in ranges)
     
-    return _make_request(series_id, params)
+    # Make sure the store holds the whole span before reading the index
+    get_daily_series(series_id, start_date, end_date)
+    return get_range_factors(series_id, ranges, float(percentage) / 100, 'daily')
 
-class handler(BaseHTTPRequestHandler):
+class handler(InstrumentedHandler):
     def do_OPTIONS(self):
         """Handle CORS preflight request"""
         send_cors_preflight(self, 'POST, OPTIONS')
@@ -57,6 +37,25 @@ class handler(BaseHTTPRequestHandler):
             data = get_request_body(self)
             
             series_id = data.get('seriesId')
+            
+            # Factors mode: compounded factor for many ranges in one call
+            if 'ranges' in data:
+                ranges = data.get('ranges')
+                percentage = data.get('percentage', 100)
+                error = ranges_error(series_id, ranges, percentage)
+                if error:
+                    send_json_response(
+                        self,
+                        {'error': error},
+                        status_code=400,
+                        methods='POST, OPTIONS'
+                    )
+                    return
+                
+                result = get_daily_factors(series_id, ranges, percentage)
+                send_json_response(self, {'data': result}, methods='POST, OPTIONS')
+                return
+            
             start_date = data.get('startDate')
             end_date = data.get('endDate')
             
@@ -69,8 +68,24 @@ class handler(BaseHTTPRequestHandler):
                 )
                 return
             
+            response_format = data.get('format', 'rows')
+            date_format = data.get('dateFormat', 'iso')
+            
+            error = format_error(response_format, date_format)
+            if error:
+                send_json_response(
+                    self,
+                    {'error': error},
+                    status_code=400,
+                    methods='POST, OPTIONS'
+                )
+                return
+            
             # Get the data
             result = get_daily_series(series_id, start_date, end_date)
+            
+            if response_format == 'columnar':
+                result = to_columnar(result, date_format)
             send_json_response(self, {'data': result}, methods='POST, OPTIONS')
             
         except Exception as error:
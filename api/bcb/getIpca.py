@@ -1,30 +1,7 @@
-import requests
-from http.server import BaseHTTPRequestHandler
-from api._utils import send_cors_preflight, send_json_response, send_error_response
+from api._utils import InstrumentedHandler, send_cors_preflight, send_json_response, send_error_response
+from api.bcb._latest import get_latest_value
 
-BASE_URL = "https://api.bcb.gov.br/dados/serie"
-
-def _make_request(series_id, params=None):
-    """Make request to BCB API"""
-    if params is None:
-        params = {}
-    
-    url = f"{BASE_URL}/bcdata.sgs.{series_id}/dados"
-    
-    if not params or ('dataInicial' not in params and 'dataFinal' not in params):
-        url += "/ultimos/1"
-    
-    params["formato"] = "json"
-    
-    try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
-    except Exception as error:
-        print(f"Error making request to BCB API: {error}")
-        raise Exception("Error making request to BCB API") from error
-
-class handler(BaseHTTPRequestHandler):
+class handler(InstrumentedHandler):
     def do_OPTIONS(self):
         """Handle CORS preflight request"""
         send_cors_preflight(self, 'GET, OPTIONS')
@@ -33,8 +10,7 @@ class handler(BaseHTTPRequestHandler):
         """Handle GET request"""
         try:
             # Series ID 433 is for IPCA
-            result = _make_request(433)
-            value = result[0]['valor'] if isinstance(result, list) and len(result) > 0 else None
+            value = get_latest_value(433)
             send_json_response(self, {'data': value}, methods='GET, OPTIONS')
         except Exception as error:
             print(f"Error in getIpca Vercel function: {error}")
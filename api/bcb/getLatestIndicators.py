@@ -0,0 +1,17 @@
+from api._utils import InstrumentedHandler, send_cors_preflight, send_json_response, send_error_response
+from api.bcb._latest import get_latest_indicators
+
+class handler(InstrumentedHandler):
+    def do_OPTIONS(self):
+        """Handle CORS preflight request"""
+        send_cors_preflight(self, 'GET, OPTIONS')
+    
+    def do_GET(self):
+        """Handle GET request"""
+        try:
+            # IPCA, IGP-M, CDI and Selic in one response
+            result = get_latest_indicators()
+            send_json_response(self, {'data': result}, methods='GET, OPTIONS')
+        except Exception as error:
+            print(f"Error in getLatestIndicators Vercel function: {error}")
+            send_error_response(self, error, methods='GET, OPTIONS')
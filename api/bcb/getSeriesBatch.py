@@ -0,0 +1,127 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from api import _metrics
+from api._utils import InstrumentedHandler, send_cors_preflight, send_json_response, send_error_response, get_request_body
+from api.bcb.getDailySeries import get_daily_series
+from api.bcb.getMonthlySeries import get_monthly_series
+from api.bcb._series import to_columnar, format_error
+from api.bcb._store import parse_bcb_date
+
+MAX_WORKERS = 4
+
+SERIES_FETCHERS = {
+    'daily': get_daily_series,
+    'monthly': get_monthly_series,
+}
+
+def _parse_date(date_str):
+    return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+
+def merge_specs(specs):
+    """Merge the requested ranges into one (start, end) range per series"""
+    merged = {}
+    for spec in specs:
+        key = (str(spec['seriesId']), spec.get('periodicity', 'daily'))
+        start_date = spec['startDate']
+        end_date = spec['endDate']
+        
+        if key not in merged:
+            merged[key] = [start_date, end_date]
+            continue
+        
+        existing = merged[key]
+        if _parse_date(start_date) < _parse_date(existing[0]):
+            existing[0] = start_date
+        if _parse_date(end_date) > _parse_date(existing[1]):
+            existing[1] = end_date
+    return merged
+
+def get_series_batch(specs):
+    """Fetch every distinct series concurrently, keyed by series id"""
+    merged = merge_specs(specs)
+    
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {
+            key: executor.submit(_metrics.bind(SERIES_FETCHERS[key[1]]), key[0], start_date, end_date)
+            for key, (start_date, end_date) in merged.items()
+        }
+        results = {}
+        for (series_id, _), future in futures.items():
+            results.setdefault(series_id, []).append(future.result())
+    
+    # A series asked for with both periodicities comes back as two windows of
+    # the same observations, so union them by date
+    return {
+        series_id: windows[0] if len(windows) == 1 else sorted(
+            {row['data']: row for rows in windows for row in rows}.values(),
+            key=lambda row: parse_bcb_date(row['data'])
+        )
+        for series_id, windows in results.items()
+    }
+
+class handler(InstrumentedHandler):
+    def do_OPTIONS(self):
+        """Handle CORS preflight request"""
+        send_cors_preflight(self, 'POST, OPTIONS')
+    
+    def do_POST(self):
+        """Handle POST request"""
+        try:
+            # Read request body
+            data = get_request_body(self)
+            
+            specs = data.get('series')
+            
+            if not specs or not isinstance(specs, list):
+                send_json_response(
+                    self,
+                    {'error': 'Missing required parameter: series'},
+                    status_code=400,
+                    methods='POST, OPTIONS'
+                )
+                return
+            
+            for spec in specs:
+                if not isinstance(spec, dict) or not spec.get('seriesId') or not spec.get('startDate') or not spec.get('endDate'):
+                    send_json_response(
+                        self,
+                        {'error': 'Each series must have seriesId, startDate, endDate'},
+                        status_code=400,
+                        methods='POST, OPTIONS'
+                    )
+                    return
+                if spec.get('periodicity', 'daily') not in SERIES_FETCHERS:
+                    send_json_response(
+                        self,
+                        {'error': "periodicity must be 'daily' or 'monthly'"},
+                        status_code=400,
+                        methods='POST, OPTIONS'
+                    )
+                    return
+            
+            response_format = data.get('format', 'rows')
+            date_format = data.get('dateFormat', 'iso')
+            
+            error = format_error(response_format, date_format)
+            if error:
+                send_json_response(
+                    self,
+                    {'error': error},
+                    status_code=400,
+                    methods='POST, OPTIONS'
+                )
+                return
+            
+            # Get the data
+            result = get_series_batch(specs)
+            
+            if response_format == 'columnar':
+                result = {
+                    series_id: to_columnar(rows, date_format)
+                    for series_id, rows in result.items()
+                }
+            send_json_response(self, {'data': result}, methods='POST, OPTIONS')
+            
+        except Exception as error:
+            print(f"Error in getSeriesBatch Vercel function: {error}")
+            send_error_response(self, error, methods='POST, OPTIONS')
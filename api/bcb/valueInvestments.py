@@ -0,0 +1,47 @@
+from api._utils import InstrumentedHandler, send_cors_preflight, send_json_response, send_error_response, get_request_body
+from api.bcb._accrual import get_required_series, value_investments
+from api.bcb.getSeriesBatch import get_series_batch
+
+class handler(InstrumentedHandler):
+    def do_OPTIONS(self):
+        """Handle CORS preflight request"""
+        send_cors_preflight(self, 'POST, OPTIONS')
+    
+    def do_POST(self):
+        """Handle POST request"""
+        try:
+            # Read request body
+            data = get_request_body(self)
+            
+            investments = data.get('investments')
+            
+            if not investments or not isinstance(investments, list):
+                send_json_response(
+                    self,
+                    {'error': 'Missing required parameter: investments'},
+                    status_code=400,
+                    methods='POST, OPTIONS'
+                )
+                return
+            
+            # Accept either full investment documents or bare details;
+            # invalid items are reported per investment by value_investments
+            details = [
+                investment.get('details', investment) if isinstance(investment, dict) else investment
+                for investment in investments
+            ]
+            
+            # Fetch every series the portfolio needs, then value it in one pass
+            specs = get_required_series(details)
+            rates = get_series_batch(specs) if specs else {}
+            values = value_investments(details, rates)
+            
+            result = [
+                {'id': investment.get('id') if isinstance(investment, dict) else None, **value}
+                for investment, value in zip(investments, values)
+            ]
+            send_json_response(self, {'data': result}, methods='POST, OPTIONS')
+            
+        except Exception as error:
+            print(f"Error in valueInvestments Vercel function: {error}")
+            send_error_response(self, error, methods='POST, OPTIONS')
@@ -0,0 +1,192 @@
+"""
+In-memory search index over the brapi symbol universe.
+
+The full quote/list is downloaded once per warm instance (concurrent first
+requests share one download) and refreshed in the background after
+SYMBOL_INDEX_TTL_S. A failed download is not retried until a backoff has
+passed, so plan limits or upstream errors do not trigger a full download on
+every keystroke. Queries are answered from memory:
+ticker and company-name word prefixes through binary search over sorted
+keys, then trigram similarity for typos.
+"""
+import os
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from concurrent.futures import Future
+
+SYMBOL_INDEX_TTL_S = int(os.environ.get('SYMBOL_INDEX_TTL_SECONDS', 24 * 60 * 60))
+PAGE_SIZE = 1000
+MIN_FUZZY_SCORE = 0.3
+# Wait after a failed download, doubled per consecutive failure
+LOAD_RETRY_MIN_S = 60
+LOAD_RETRY_MAX_S = 60 * 60
+
+class SymbolIndexUnavailable(Exception):
+    """The symbol list failed to load recently and is not retried yet"""
+
+def normalize(text):
+    """Uppercase and strip accents so 'Petróleo' matches 'PETROLEO'"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).upper().strip()
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _prefix_range(keys, prefix):
+    """Return the slice of sorted (key, position) tuples starting with prefix"""
+    start = bisect_left(keys, (prefix,))
+    end = start
+    while end < len(keys) and keys[end][0].startswith(prefix):
+        end += 1
+    return keys[start:end]
+
+class SymbolIndex:
+    """Prefix and trigram index over brapi stocks"""
+
+    def __init__(self, stocks):
+        self.stocks = stocks
+        self.tickers_by_position = [normalize(stock.get('stock')) for stock in stocks]
+        self.tickers = sorted(
+            (ticker, position) for position, ticker in enumerate(self.tickers_by_position)
+        )
+        self.words = sorted(
+            (word, position)
+            for position, stock in enumerate(stocks)
+            for word in set(normalize(stock.get('name')).split())
+        )
+        self.grams = {}
+        for position, stock in enumerate(stocks):
+            text = f"{self.tickers_by_position[position]} {normalize(stock.get('name'))}"
+            for gram in trigrams(text):
+                self.grams.setdefault(gram, []).append(position)
+
+    def search(self, query, limit=10):
+        """Return up to limit stocks matching query, best matches first"""
+        query = normalize(query)
+        if not query:
+            return []
+
+        ranked = []
+        seen = set()
+
+        def add(positions):
+            for position in positions:
+                if position not in seen:
+                    seen.add(position)
+                    ranked.append(position)
+
+        # Exact ticker, then ticker prefixes (shortest first), then name words
+        ticker_matches = _prefix_range(self.tickers, query)
+        add(position for ticker, position in ticker_matches if ticker == query)
+        add(position for _, position in sorted(ticker_matches, key=lambda item: len(item[0])))
+        query_words = query.split()
+        if query_words:
+            candidates = {position for _, position in _prefix_range(self.words, query_words[0])}
+            for word in query_words[1:]:
+                candidates &= {position for _, position in _prefix_range(self.words, word)}
+            add(sorted(candidates, key=lambda position: self.tickers_by_position[position]))
+
+        if len(ranked) < limit and len(query) >= 3:
+            add(self._fuzzy(query, limit))
+
+        return [self.stocks[position] for position in ranked[:limit]]
+
+    def _fuzzy(self, query, limit):
+        """Rank stocks by the share of the query's trigrams they contain"""
+        query_grams = trigrams(query)
+        counts = {}
+        for gram in query_grams:
+            for position in self.grams.get(gram, ()):
+                counts[position] = counts.get(position, 0) + 1
+        scored = sorted(
+            ((count / len(query_grams), position) for position, count in counts.items()),
+            key=lambda item: (-item[0], item[1])
+        )
+        return [position for score, position in scored[:limit] if score >= MIN_FUZZY_SCORE]
+
+_index = None
+_loaded_at = 0
+_loading = None
+_failures = 0
+_retry_at = 0
+_lock = threading.Lock()
+
+def load_symbol_index(fetch_page):
+    """
+    Download the full symbol list and swap in a new index.
+
+    fetch_page(page, limit) must return a brapi quote/list response.
+    """
+    global _index, _loaded_at
+    stocks = []
+    page = 1
+    while True:
+        results = fetch_page(page, PAGE_SIZE)
+        stocks.extend(results.get('stocks', []))
+        if not results.get('hasNextPage'):
+            break
+        page += 1
+
+    index = SymbolIndex(stocks)
+    with _lock:
+        _index = index
+        _loaded_at = time.monotonic()
+    print(f"Loaded symbol index with {len(stocks)} symbols")
+    return index
+
+def _load(fetch_page, future):
+    """Run one load, hand its outcome to every waiter and schedule the backoff"""
+    global _loading, _failures, _retry_at
+    error = RuntimeError('Symbol index load was interrupted')
+    index = None
+    try:
+        index = load_symbol_index(fetch_page)
+        error = None
+    except Exception as load_error:
+        error = load_error
+    finally:
+        with _lock:
+            _loading = None
+            if error is None:
+                _failures = 0
+            else:
+                _failures += 1
+                backoff = min(LOAD_RETRY_MIN_S * 2 ** (_failures - 1), LOAD_RETRY_MAX_S)
+                _retry_at = time.monotonic() + backoff
+        if error is None:
+            future.set_result(index)
+        else:
+            print(f"Error loading symbol index, next attempt in {backoff} seconds: {error}")
+            future.set_exception(error)
+
+def get_symbol_index(fetch_page):
+    """
+    Return the symbol index, loading it on first use and refreshing when stale.
+
+    Raises SymbolIndexUnavailable while backing off after a failed load.
+    """
+    global _loading
+    with _lock:
+        index = _index
+        loading = _loading
+        now = time.monotonic()
+        due = index is None or now - _loaded_at > SYMBOL_INDEX_TTL_S
+        start_load = loading is None and due and now >= _retry_at
+        if start_load:
+            loading = _loading = Future()
+        retry_in = _retry_at - now
+
+    if index is not None:
+        # Keep serving the stale index while it is rebuilt in the background
+        if start_load:
+            threading.Thread(target=_load, args=(fetch_page, loading), daemon=True).start()
+        return index
+
+    if start_load:
+        _load(fetch_page, loading)
+    elif loading is None:
+        raise SymbolIndexUnavailable(f"Symbol index load failed, next attempt in {retry_in:.0f} seconds")
+    return loading.result()
@@ -1,9 +1,24 @@
-import requests
 import os
-from http.server import BaseHTTPRequestHandler
-from api._utils import send_cors_preflight, send_json_response, send_error_response, get_request_body
+from concurrent.futures import ThreadPoolExecutor
+from api import _upstream
+from api import _metrics
+from api._cache import TTLCache
+from api._utils import InstrumentedHandler, send_cors_preflight, send_json_response, send_error_response, get_request_body, debug_log
 
-BASE_URL = "https://brapi.dev/api"
+BASE_URL = os.environ.get('BRAPI_BASE_URL', "https://brapi.dev/api")
+
+# brapi caps the tickers per quote request depending on the plan
+MAX_SYMBOLS_PER_REQUEST = int(os.environ.get('BRAPI_MAX_SYMBOLS_PER_REQUEST', 10))
+MAX_CONCURRENT_REQUESTS = 4
+
+# Intraday quotes go stale quickly, historical ranges barely change
+QUOTE_INTRADAY_TTL_S = int(os.environ.get('QUOTE_INTRADAY_TTL_SECONDS', 60))
+QUOTE_HISTORICAL_TTL_S = int(os.environ.get('QUOTE_HISTORICAL_TTL_SECONDS', 60 * 60))
+INTRADAY_RANGES = {'1d', '5d'}
+INTRADAY_INTERVALS = {'1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h'}
+
+# Keyed by (symbol, range, interval)
+_quote_cache = TTLCache()
 
 def make_request(endpoint, params):
     """Make request to Brapi API"""
@@ -12,17 +27,88 @@ def make_request(endpoint, params):
         params['token'] = api_key
     
     url = f"{BASE_URL}/{endpoint}"
-    print(f"Making request to Brapi API: {url}", {"params": params})
+    debug_log(f"Making request to Brapi API: {url}", {"params": params})
     
     try:
-        response = requests.get(url, params=params)
+        response = _upstream.get(url, params=params)
         response.raise_for_status()
         return response.json()
     except Exception as error:
         print(f"Error making request to Brapi API: {error}")
         raise
 
-class handler(BaseHTTPRequestHandler):
+def normalize_symbol(symbol):
+    """Upper-case a ticker and drop the .SA suffix, as brapi reports it"""
+    symbol = symbol.strip().upper()
+    return symbol[:-3] if symbol.endswith('.SA') else symbol
+
+def get_quote_ttl(range_param, interval):
+    """Return how long a quote for this range/interval may be cached"""
+    if range_param in INTRADAY_RANGES or interval in INTRADAY_INTERVALS:
+        return QUOTE_INTRADAY_TTL_S
+    return QUOTE_HISTORICAL_TTL_S
+
+def get_quote(symbol, range_param, interval):
+    """Get the quote of one symbol, sharing cached and in-flight results"""
+    base_symbol = normalize_symbol(symbol)
+    
+    def fetch():
+        params = {
+            'range': range_param,
+            'interval': interval,
+        }
+        debug_log("Params sent to Brapi API:", params)
+        
+        results = make_request(f"quote/{base_symbol}", params)
+        debug_log("getQuote function results:", results)
+        # None (not {}) so an empty answer is not cached
+        return results['results'][0] if results.get('results') else None
+    
+    key = (base_symbol, range_param, interval)
+    return _quote_cache.get_or_fetch(key, get_quote_ttl(range_param, interval), fetch) or {}
+
+def get_quotes(symbols, range_param, interval):
+    """Get quotes for many symbols, keyed by the requested symbol"""
+    # brapi answers with upper-case symbols, so match on the normalized form
+    base_symbols = {symbol: normalize_symbol(symbol) for symbol in symbols}
+    keys = [(base, range_param, interval) for base in dict.fromkeys(base_symbols.values())]
+    
+    def fetch_group(group):
+        params = {
+            'range': range_param,
+            'interval': interval,
+        }
+        try:
+            results = make_request(f"quote/{','.join(group)}", params)
+        except Exception as error:
+            print(f"Error getting quotes for {group}: {error}")
+            return {}
+        return {
+            (item.get('symbol'), range_param, interval): item
+            for item in results.get('results', [])
+        }
+    
+    def fetch_missing(missing_keys):
+        missing_symbols = [key[0] for key in missing_keys]
+        groups = [
+            missing_symbols[i:i + MAX_SYMBOLS_PER_REQUEST]
+            for i in range(0, len(missing_symbols), MAX_SYMBOLS_PER_REQUEST)
+        ]
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, len(groups))) as executor:
+            for group_quotes in executor.map(_metrics.bind(fetch_group), groups):
+                fetched.update(group_quotes)
+        return fetched
+    
+    quotes = _quote_cache.get_many_or_fetch(keys, get_quote_ttl(range_param, interval), fetch_missing)
+    
+    # Symbols brapi did not return (or whose group failed) map to None
+    return {
+        symbol: quotes.get((base, range_param, interval))
+        for symbol, base in base_symbols.items()
+    }
+
+class handler(InstrumentedHandler):
     def do_OPTIONS(self):
         """Handle CORS preflight request"""
         send_cors_preflight(self, 'POST, OPTIONS')
@@ -44,13 +130,31 @@ class handler(BaseHTTPRequestHandler):
             # Read request body
             data = get_request_body(self)
             
-            print("getQuote function called with data:", data)
+            debug_log("getQuote function called with data:", data)
             
             symbol = data.get('symbol')
+            symbols = data.get('symbols')
             range_param = data.get('range', '1mo')
             interval = data.get('interval', '1d')
             
-            if not symbol:
+            # Batch mode: many symbols, grouped into multi-ticker requests
+            if symbols is not None:
+                if not isinstance(symbols, list) or not symbols or any(
+                    not isinstance(item, str) or not item.strip() for item in symbols
+                ):
+                    send_json_response(
+                        self,
+                        {'error': "'symbols' must be a non-empty list of ticker strings."},
+                        status_code=400,
+                        methods='POST, OPTIONS'
+                    )
+                    return
+                
+                quotes = get_quotes(symbols, range_param, interval)
+                send_json_response(self, {'data': quotes}, methods='POST, OPTIONS')
+                return
+            
+            if not symbol or not isinstance(symbol, str):
                 send_json_response(
                     self,
                     {'error': "The function must be called with 'symbol'."},
@@ -59,24 +163,13 @@ class handler(BaseHTTPRequestHandler):
                 )
                 return
             
-            # Remove .SA suffix if present
-            endpoint = f"quote/{symbol.replace('.SA', '')}"
-            params = {
-                'range': range_param,
-                'interval': interval,
-            }
-            
-            print("Params sent to Brapi API:", params)
-            
-            # Make the request
-            results = make_request(endpoint, params)
-            print("getQuote function results:", results)
+            # Served from the quote cache when possible
+            result_data = get_quote(symbol, range_param, interval)
             
             # Send success response
-            result_data = results.get('results', [{}])[0] if results.get('results') else {}
             send_json_response(self, {'data': result_data}, methods='POST, OPTIONS')
             
-        except requests.exceptions.HTTPError as error:
+        except _upstream.HTTPError as error:
             print(f"Error in getQuote Vercel function: {error}")
             
             status_code = 500
@@ -1,9 +1,9 @@
-import requests
 import os
-from http.server import BaseHTTPRequestHandler
-from api._utils import send_cors_preflight, send_json_response, send_error_response, get_request_body
+from api import _upstream
+from api._utils import InstrumentedHandler, send_cors_preflight, send_json_response, send_error_response, get_request_body, debug_log
+from api.brapi._symbol_index import get_symbol_index, SymbolIndexUnavailable
 
-BASE_URL = "https://brapi.dev/api"
+BASE_URL = os.environ.get('BRAPI_BASE_URL', "https://brapi.dev/api")
 
 def make_request(endpoint, params):
     """Make request to Brapi API"""
@@ -12,17 +12,41 @@ def make_request(endpoint, params):
         params['token'] = api_key
     
     url = f"{BASE_URL}/{endpoint}"
-    print(f"Making request to Brapi API: {url}", {"params": params})
+    debug_log(f"Making request to Brapi API: {url}", {"params": params})
     
     try:
-        response = requests.get(url, params=params)
+        response = _upstream.get(url, params=params)
         response.raise_for_status()
         return response.json()
     except Exception as error:
         print(f"Error making request to Brapi API: {error}")
         raise Exception("Error making request to Brapi API") from error
 
-class handler(BaseHTTPRequestHandler):
+def fetch_symbol_page(page, limit):
+    """Fetch one page of the full brapi symbol list"""
+    return make_request("quote/list", {'page': page, 'limit': limit})
+
+def search_symbols(symbol, limit=10):
+    """Search the local symbol index, falling back to brapi's remote search"""
+    try:
+        return get_symbol_index(fetch_symbol_page).search(symbol, limit)
+    except SymbolIndexUnavailable as error:
+        # Backing off after a failed download: one small remote search instead
+        print(f"{error}; searching remotely")
+    except Exception as error:
+        print(f"Symbol index unavailable, searching remotely: {error}")
+    
+    endpoint = "quote/list"
+    params = {
+        'search': symbol,
+        'limit': limit,
+    }
+    
+    # Make the request
+    results = make_request(endpoint, params)
+    return results.get('stocks', [])
+
+class handler(InstrumentedHandler):
     def do_OPTIONS(self):
         """Handle CORS preflight request"""
         send_cors_preflight(self, 'POST, OPTIONS')
@@ -46,7 +70,7 @@ class handler(BaseHTTPRequestHandler):
             
             symbol = data.get('symbol')
             
-            print("searchSymbol function called with data:", data)
+            debug_log("searchSymbol function called with data:", data)
             
             if not symbol:
                 send_json_response(
@@ -57,18 +81,10 @@ class handler(BaseHTTPRequestHandler):
                 )
                 return
             
-            endpoint = "quote/list"
-            params = {
-                'search': symbol,
-                'limit': 10,
-            }
-            
-            # Make the request
-            results = make_request(endpoint, params)
-            print("searchSymbol function results:", results)
+            # Answered from the in-memory index
+            stocks = search_symbols(symbol)
             
             # Send success response
-            stocks = results.get('stocks', [])
             send_json_response(self, {'data': stocks}, methods='POST, OPTIONS')
             
         except Exception as error:
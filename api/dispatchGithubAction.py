@@ -1,10 +1,8 @@
-from http.server import BaseHTTPRequestHandler
 import os
-import json
-import http.client
-from api._utils import send_cors_preflight, send_json_response, send_error_response, get_request_body
+from api import _upstream
+from api._utils import InstrumentedHandler, send_cors_preflight, send_json_response, send_error_response, get_request_body
 
-class handler(BaseHTTPRequestHandler):
+class handler(InstrumentedHandler):
     def do_OPTIONS(self):
         """Handle CORS preflight request"""
         send_cors_preflight(self, 'POST, OPTIONS')
@@ -43,32 +41,27 @@ class handler(BaseHTTPRequestHandler):
                 return
             
             # Prepare GitHub API request
-            conn = http.client.HTTPSConnection('api.github.com')
-            
-            payload = json.dumps({
+            payload = {
                 'event_type': 'fetch-historical-data',
                 'client_payload': {
                     'symbol': symbol,
                     'range': range_value
                 }
-            })
+            }
             
             headers = {
                 'Accept': 'application/vnd.github.v3+json',
                 'Authorization': f'token {github_token}',
-                'Content-Type': 'application/json',
                 'User-Agent': 'Finance-Tracker-App'
             }
             
             # Make request to GitHub
-            path = f'/repos/{github_repo_owner}/{github_repo_name}/dispatches'
-            conn.request('POST', path, payload, headers)
-            
-            # Get response
-            response = conn.getresponse()
+            github_api_url = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
+            url = f'{github_api_url}/repos/{github_repo_owner}/{github_repo_name}/dispatches'
+            response = _upstream.post(url, json=payload, headers=headers)
             
             # GitHub returns 204 No Content on success
-            if response.status == 204:
+            if response.status_code == 204:
                 send_json_response(
                     self,
                     {
@@ -81,15 +74,12 @@ class handler(BaseHTTPRequestHandler):
                     methods='POST, OPTIONS'
                 )
             else:
-                response_data = response.read().decode('utf-8')
                 send_error_response(
                     self,
-                    Exception(f'GitHub API error: {response.status} - {response_data}'),
-                    status_code=response.status,
+                    Exception(f'GitHub API error: {response.status_code} - {response.text}'),
+                    status_code=response.status_code,
                     methods='POST, OPTIONS'
                 )
             
-            conn.close()
-            
         except Exception as e:
             send_error_response(self, e, methods='POST, OPTIONS')
@@ -0,0 +1,22 @@
+import os
+from api import _metrics
+from api._utils import InstrumentedHandler, send_cors_preflight, send_json_response, send_error_response
+
+class handler(InstrumentedHandler):
+    def do_OPTIONS(self):
+        """Handle CORS preflight request"""
+        send_cors_preflight(self, 'GET, OPTIONS')
+
+    def do_GET(self):
+        """Handle GET request"""
+        try:
+            # Latency histograms are internal, so require the token when one is configured
+            token = os.environ.get('METRICS_TOKEN')
+            if token and self.headers.get('Authorization') != f'Bearer {token}':
+                send_json_response(self, {'error': 'Unauthorized'}, status_code=401, methods='GET, OPTIONS')
+                return
+
+            send_json_response(self, {'data': _metrics.snapshot()}, methods='GET, OPTIONS', cache_control='no-store')
+        except Exception as error:
+            print(f"Error in getMetrics Vercel function: {error}")
+            send_error_response(self, error, methods='GET, OPTIONS')
@@ -1,8 +1,7 @@
-from http.server import BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
-from api._utils import send_cors_preflight, send_text_response
+from api._utils import InstrumentedHandler, send_cors_preflight, send_text_response
 
-class handler(BaseHTTPRequestHandler):
+class handler(InstrumentedHandler):
     def do_OPTIONS(self):
         """Handle CORS preflight request"""
         send_cors_preflight(self, 'GET, OPTIONS')
@@ -0,0 +1,191 @@
+"""
+Local merchant-to-category classifier.
+
+Each user's confirmed categories are learned into their own model: an exact
+lookup from normalized merchant name to category, and token/category counts
+for a naive Bayes fallback on merchants never seen before. Merchant counts
+are persisted per user in Firestore and the token counts are rebuilt from
+them, so categories never leak between users and survive cold starts.
+"""
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# Firestore collection holding one {merchants: {merchant: {category: count}}} document per user
+COLLECTION = 'merchant-categories'
+
+# Models are reloaded after this long, picking up what other instances learned
+MODEL_TTL_S = 300
+MAX_CACHED_MODELS = 64
+
+# Token model predictions below this posterior are treated as unknown
+MIN_TOKEN_CONFIDENCE = 0.7
+
+# Payment-method noise that does not identify the merchant
+NOISE_PATTERN = re.compile(
+    r'\b(COMPRA|CARTAO|CREDITO|DEBITO|PIX|ENVIADO|RECEBIDO|TRANSF|TED|DOC|PAG|PGTO|'
+    r'PAGAMENTO|PARC|PARCELA|LTDA|ME|EIRELI|SA)\b'
+)
+NON_WORD_PATTERN = re.compile(r'[^A-Z ]+')
+
+def normalize_merchant(description):
+    """Reduce a transaction description to a stable merchant key"""
+    decomposed = unicodedata.normalize('NFKD', description or '')
+    text = ''.join(c for c in decomposed if not unicodedata.combining(c)).upper()
+    text = NON_WORD_PATTERN.sub(' ', text)
+    text = NOISE_PATTERN.sub(' ', text)
+    return ' '.join(word for word in text.split() if len(word) > 1)
+
+class FirestoreMerchantStore:
+    """One user's merchant/category counts in a Firestore document"""
+
+    def __init__(self, db, user_id):
+        self.document = db.collection(COLLECTION).document(user_id)
+
+    def load(self):
+        """Yield (merchant, category, count) rows"""
+        snapshot = self.document.get()
+        merchants = (snapshot.to_dict() or {}).get('merchants', {}) if snapshot.exists else {}
+        for merchant, counts in merchants.items():
+            for category, count in counts.items():
+                yield merchant, category, count
+
+    def add(self, rows):
+        """Increment the count of each (merchant, category) row"""
+        from firebase_admin import firestore
+        merchants = {}
+        for merchant, category in rows:
+            counts = merchants.setdefault(merchant, {})
+            counts[category] = counts.get(category, 0) + 1
+        update = {
+            merchant: {category: firestore.Increment(count) for category, count in counts.items()}
+            for merchant, counts in merchants.items()
+        }
+        self.document.set({'merchants': update}, merge=True)
+
+class CategoryClassifier:
+    """Merchant lookup table with a token-based fallback"""
+
+    def __init__(self, store):
+        """
+        Args:
+            store: persistence with load() -> (merchant, category, count) rows
+                and add([(merchant, category)])
+        """
+        self.store = store
+        self._lock = threading.Lock()
+
+        # merchant -> {category: count}, token -> {category: count}
+        self.merchants = {}
+        self.tokens = {}
+        self.category_tokens = {}
+        self.category_merchants = {}
+        for merchant, category, count in store.load():
+            self._count(merchant, category, count)
+
+    @staticmethod
+    def _add(table, key, category, count):
+        counts = table.setdefault(key, {})
+        counts[category] = counts.get(category, 0) + count
+
+    def _count(self, merchant, category, count):
+        self._add(self.merchants, merchant, category, count)
+        self.category_merchants[category] = self.category_merchants.get(category, 0) + count
+        for token in set(merchant.split()):
+            self._add(self.tokens, token, category, count)
+            self.category_tokens[category] = self.category_tokens.get(category, 0) + count
+
+    def learn(self, examples):
+        """Learn from confirmed [{'description', 'category'}] examples"""
+        rows = []
+        for example in examples:
+            if not isinstance(example, dict):
+                continue
+            merchant = normalize_merchant(example.get('description'))
+            category = example.get('category')
+            if merchant and category and isinstance(category, str):
+                rows.append((merchant, category))
+        if not rows:
+            return 0
+
+        self.store.add(rows)
+        with self._lock:
+            for merchant, category in rows:
+                self._count(merchant, category, 1)
+        return len(rows)
+
+    def _lookup(self, merchant):
+        counts = self.merchants.get(merchant)
+        if not counts:
+            return None
+        category = max(counts, key=counts.get)
+        return category, counts[category] / sum(counts.values())
+
+    def _predict_tokens(self, merchant):
+        words = [word for word in set(merchant.split()) if word in self.tokens]
+        if not words or not self.category_tokens:
+            return None
+
+        total_merchants = sum(self.category_merchants.values())
+        vocabulary = len(self.tokens)
+        scores = {}
+        for category, token_total in self.category_tokens.items():
+            score = math.log(self.category_merchants.get(category, 0) + 1) - math.log(total_merchants + 1)
+            for word in words:
+                count = self.tokens[word].get(category, 0)
+                score += math.log((count + 1) / (token_total + vocabulary))
+            scores[category] = score
+
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        confidence = 1 / sum(math.exp(score - top) for score in scores.values())
+        if confidence < MIN_TOKEN_CONFIDENCE:
+            return None
+        return best, confidence
+
+    def lookup(self, description):
+        """Return (category, confidence) from the merchant table, or None"""
+        merchant = normalize_merchant(description)
+        with self._lock:
+            return self._lookup(merchant)
+
+    def predict_tokens(self, description):
+        """Return (category, confidence) from the naive Bayes token model, or None"""
+        merchant = normalize_merchant(description)
+        with self._lock:
+            return self._predict_tokens(merchant)
+
+    def classify(self, description):
+        """Return (category, confidence) or None if the merchant is unknown"""
+        merchant = normalize_merchant(description)
+        with self._lock:
+            return self._lookup(merchant) or self._predict_tokens(merchant)
+
+def _open_store(user_id):
+    from api._auth import get_firestore
+    return FirestoreMerchantStore(get_firestore(), user_id)
+
+_classifiers = OrderedDict()
+_classifiers_lock = threading.Lock()
+
+def get_classifier(user_id):
+    """
+    Return the user's classifier, loading it from Firestore when it is not
+    cached or older than MODEL_TTL_S.
+    """
+    with _classifiers_lock:
+        cached = _classifiers.get(user_id)
+        if cached is not None and time.monotonic() - cached[0] < MODEL_TTL_S:
+            _classifiers.move_to_end(user_id)
+            return cached[1]
+
+    classifier = CategoryClassifier(_open_store(user_id))
+    with _classifiers_lock:
+        _classifiers[user_id] = (time.monotonic(), classifier)
+        _classifiers.move_to_end(user_id)
+        while len(_classifiers) > MAX_CACHED_MODELS:
+            _classifiers.popitem(last=False)
+    return classifier
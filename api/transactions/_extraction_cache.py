@@ -0,0 +1,85 @@
+"""
+Content-addressed cache for statement extraction results.
+
+Results are keyed by a hash of the normalized text they were extracted from
+(whole statements and individual chunks) and kept in a SQLite file. When the
+stored results exceed EXTRACTION_CACHE_MAX_BYTES the least recently used
+entries are evicted.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+# Vercel functions can only write to /tmp, so the cache defaults there
+DEFAULT_CACHE_PATH = os.path.join(tempfile.gettempdir(), 'statement_extractions.sqlite3')
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+def content_key(text, namespace=''):
+    """Hash text with runs of whitespace collapsed, so re-extracted PDFs match"""
+    normalized = ' '.join(text.split())
+    return hashlib.sha256(f"{namespace}\0{normalized}".encode('utf-8')).hexdigest()
+
+class ExtractionCache:
+    """Size-bounded LRU cache of JSON results stored in SQLite"""
+
+    def __init__(self, path=None, max_bytes=None):
+        self.path = path or os.environ.get('EXTRACTION_CACHE_PATH', DEFAULT_CACHE_PATH)
+        self.max_bytes = max_bytes or int(os.environ.get('EXTRACTION_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+
+    def get(self, key):
+        """Return the cached result for key, or None"""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        """Store a result, evicting least recently used entries past max_bytes"""
+        encoded = json.dumps(value)
+        size = len(encoded.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, encoded, size, time.time())
+            )
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for old_key, old_size in self._conn.execute(
+                "SELECT key, size FROM entries WHERE key != ? ORDER BY last_used", (key,)
+            ).fetchall():
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (old_key,))
+                total -= old_size
+                if total <= self.max_bytes:
+                    break
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_extraction_cache():
+    """Return the process-wide extraction cache, opening it on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExtractionCache()
+        return _cache
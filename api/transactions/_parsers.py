@@ -0,0 +1,117 @@
+"""
+Deterministic parsers for known bank statement layouts.
+
+Each registered parser recognises one fixed transaction layout with a
+compiled regex. The layout with the most matches wins, its transactions are
+parsed locally and only the text it could not match is left for Gemini.
+Every layout needs an explicit debit/credit marker (a sign or D/C), so
+unsigned amounts such as balances are never taken for transactions.
+"""
+import re
+from datetime import datetime
+
+# A layout is only trusted once it matches at least this many transactions
+MIN_MATCHES = 3
+
+AMOUNT_VALUE = r'\d{1,3}(?:\.\d{3})*,\d{2}'
+
+DATE = r'(?P<date>\d{2}/\d{2}/\d{4})'
+# Description up to the first amount, never crossing a page, another date or
+# an earlier amount (pages can arrive as single lines, so an unmarked amount must
+# not let the description run on into the next balance)
+DESCRIPTION = r'(?P<description>(?:(?!\d{2}/\d{2}/\d{4})(?!' + AMOUNT_VALUE + r')[^\f])+?)'
+AMOUNT = r'(?P<amount>' + AMOUNT_VALUE + r')'
+
+# Leftover text only goes to the LLM if a line still reads like a
+# transaction: a date, then a description, then an amount
+LEFTOVER_LINE_PATTERN = re.compile(r'\b\d{2}/\d{2}(?:/\d{2,4})?\s+[^\d\s].*?\d,\d{2}\b')
+# Balance, total and due-date segments have the same shape but are not transactions
+SUMMARY_LINE_PATTERN = re.compile(
+    r'^\W*(?:\d{2}/\d{2}(?:/\d{2,4})?\s+)?(?:SALDO|TOTAL|LIMITE|VENCIMENTO|PAGAMENTO M[IÍ]NIMO)\b',
+    re.IGNORECASE
+)
+# Leftover text is checked one segment at a time, each starting at a full date
+SEGMENT_SPLIT = re.compile(r'(?=\b\d{2}/\d{2}/\d{2}(?:\d{2})?\b)')
+
+PARSERS = []
+
+def register_parser(parser):
+    """Add a parser to the registry"""
+    PARSERS.append(parser)
+    return parser
+
+def parse_amount(value):
+    """Parse a Brazilian formatted amount ('1.234,56') into a float"""
+    return float(value.replace('.', '').replace(',', '.'))
+
+def parse_date(value):
+    """Parse a dd/mm/yyyy date into ISO format"""
+    return datetime.strptime(value, '%d/%m/%Y').date().isoformat()
+
+class RegexLayoutParser:
+    """Parser for a layout where every transaction matches one regex"""
+
+    def __init__(self, name, pattern, get_type):
+        """
+        Args:
+            name: layout name, for logging
+            pattern: regex with date, description and amount groups
+            get_type: function(match) -> 'credit' | 'debit'
+        """
+        self.name = name
+        self.pattern = re.compile(pattern)
+        self.get_type = get_type
+
+    def count_matches(self, text):
+        return sum(1 for _ in self.pattern.finditer(text))
+
+    def parse(self, text):
+        """Return (transactions, leftover text with the matches removed)"""
+        transactions = [
+            {
+                'date': parse_date(match.group('date')),
+                'description': ' '.join(match.group('description').split()),
+                'amount': parse_amount(match.group('amount')),
+                'type': self.get_type(match),
+            }
+            for match in self.pattern.finditer(text)
+        ]
+        return transactions, self.pattern.sub(' ', text)
+
+# "05/01/2024 SUPERMERCADO PAGUE MENOS 345,60 D"
+register_parser(RegexLayoutParser(
+    'dc-marker',
+    DATE + r'\s+' + DESCRIPTION + r'\s+' + AMOUNT + r'\s*(?P<marker>[DC])\b',
+    lambda match: 'debit' if match.group('marker') == 'D' else 'credit',
+))
+
+# "05/01/2024 SUPERMERCADO PAGUE MENOS -R$ 345,60", "+R$ 5.000,00" for credits
+register_parser(RegexLayoutParser(
+    'signed-amount',
+    DATE + r'\s+' + DESCRIPTION + r'\s+(?P<sign>[-+])\s?R\$\s?' + AMOUNT,
+    lambda match: 'debit' if match.group('sign') == '-' else 'credit',
+))
+
+def has_transactions(text):
+    """Check whether leftover text still has a segment shaped like a transaction"""
+    return any(
+        LEFTOVER_LINE_PATTERN.search(segment) and not SUMMARY_LINE_PATTERN.search(segment)
+        for line in text.splitlines()
+        for segment in SEGMENT_SPLIT.split(line)
+    )
+
+def parse_known_layout(text):
+    """
+    Parse a statement with the best matching registered layout.
+
+    Returns:
+        tuple: (transactions, leftover text for the LLM or None), or
+        ([], text) if no layout matches the statement
+    """
+    best = max(PARSERS, key=lambda parser: parser.count_matches(text), default=None)
+    if best is None or best.count_matches(text) < MIN_MATCHES:
+        return [], text
+
+    transactions, leftover = best.parse(text)
+    print(f"Parsed {len(transactions)} transactions with the '{best.name}' layout")
+    return transactions, leftover if has_transactions(leftover) else None
@@ -0,0 +1,127 @@
+"""
+Preprocessing stage that shrinks statement text before it reaches the LLM.
+
+Removes word sequences repeated on most pages (headers, footers, legal
+text), balance-only segments and disclaimer/marketing sentences that carry no
+transaction, then collapses whitespace within each line. Page separators
+and line breaks are kept so the text can still be chunked by page and the
+layout parsers can work line by line.
+"""
+import re
+
+# Pages are separated by form feeds (see client/src/api/pdfExtractor.js)
+PAGE_SEPARATOR = '\f'
+
+# Word sequences of this length found on this share of pages are boilerplate
+SHINGLE_WORDS = 8
+BOILERPLATE_PAGE_SHARE = 0.6
+
+# Rough size of a Gemini token for Portuguese text
+CHARS_PER_TOKEN = 4
+
+DATE_PATTERN = re.compile(r'\b\d{2}/\d{2}(?:/\d{2,4})?\b')
+AMOUNT_PATTERN = re.compile(r'\d,\d{2}\b')
+# Only segments holding nothing but an optional date, a balance label and an
+# amount; "TRANSF SALDO 500,00 D" is a transaction and must be kept
+BALANCE_LINE_PATTERN = re.compile(
+    r'^\s*(?:\d{2}/\d{2}(?:/\d{2,4})?\s+)?'
+    r'SALDO(?:\s+(?:ANTERIOR|DO\s+DIA|FINAL|ATUAL|DISPON[IÍ]VEL|BLOQUEADO|EM\s+\d{2}/\d{2}(?:/\d{2,4})?))?'
+    r'\s*:?\s*[-+]?\s?(?:R\$\s?)?\d{1,3}(?:\.\d{3})*,\d{2}(?:\s*[DC])?\s*$',
+    re.IGNORECASE
+)
+# A line may hold many transactions and balances (PDFs without line breaks),
+# so it is cut before each date and after each amount and its D/C marker
+SEGMENT_SPLIT = re.compile(
+    r'(?<!EM )(?=\b\d{2}/\d{2}(?:/\d{2,4})?\b)'
+    r'|(?<=\d,\d{2}\s[DC])(?=\s)'
+    r'|(?<=\d,\d{2})(?=\s+(?![DC]\b))',
+    re.IGNORECASE
+)
+NOISE_KEYWORDS = re.compile(
+    r'\b(?:OUVIDORIA|SAC|CENTRAL\s+DE\s+ATENDIMENTO|DEFICIENTE\s+AUDITIVO|WWW\.|HTTPS?://|'
+    r'APROVEITE|CONFIRA|CONTRATE|SIMULE|PROMO[CÇ][AÃ]O|FGC|GARANTIDOR|'
+    r'CONDI[CÇ][OÕ]ES\s+GERAIS|TERMOS\s+DE\s+USO|P[AÁ]GINA\s+\d+)',
+    re.IGNORECASE
+)
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
+def estimate_tokens(text):
+    """Estimate the number of LLM tokens in text"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def remove_repeated_boilerplate(pages):
+    """Drop word sequences that repeat on most pages, keeping line breaks"""
+    if len(pages) < 2:
+        return pages
+
+    # Words of each page with the line they came from
+    page_lines = [[(n, word) for n, line in enumerate(page.split('\n')) for word in line.split()] for page in pages]
+    page_words = [[word for _, word in lines] for lines in page_lines]
+    page_count = {}
+    for words in page_words:
+        shingles = {
+            tuple(words[i:i + SHINGLE_WORDS])
+            for i in range(len(words) - SHINGLE_WORDS + 1)
+        }
+        for shingle in shingles:
+            page_count[shingle] = page_count.get(shingle, 0) + 1
+
+    threshold = max(2, BOILERPLATE_PAGE_SHARE * len(pages))
+    boilerplate = {shingle for shingle, count in page_count.items() if count >= threshold}
+    if not boilerplate:
+        return pages
+
+    cleaned = []
+    for lines, words in zip(page_lines, page_words):
+        keep = [True] * len(words)
+        for i in range(len(words) - SHINGLE_WORDS + 1):
+            if tuple(words[i:i + SHINGLE_WORDS]) in boilerplate:
+                keep[i:i + SHINGLE_WORDS] = [False] * SHINGLE_WORDS
+        kept_lines = {}
+        for (n, word), kept in zip(lines, keep):
+            if kept:
+                kept_lines.setdefault(n, []).append(word)
+        cleaned.append('\n'.join(' '.join(words) for words in kept_lines.values()))
+    return cleaned
+
+def remove_balance_segments(line):
+    """Drop the balance-only segments of a line"""
+    return ' '.join(
+        segment for segment in SEGMENT_SPLIT.split(line)
+        if not BALANCE_LINE_PATTERN.match(segment)
+    )
+
+def remove_noise_sentences(line):
+    """Drop the balance segments and disclaimer/marketing sentences of a line"""
+    line = remove_balance_segments(line)
+    sentences = SENTENCE_SPLIT.split(line)
+    return ' '.join(
+        sentence for sentence in sentences
+        if not NOISE_KEYWORDS.search(sentence)
+        or DATE_PATTERN.search(sentence) and AMOUNT_PATTERN.search(sentence)
+    )
+
+def clean_page(page):
+    """Clean each line of a page, dropping lines left empty"""
+    lines = (' '.join(remove_noise_sentences(line).split()) for line in page.split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+def preprocess_statement(text):
+    """
+    Shrink statement text for the LLM.
+
+    Returns:
+        tuple: (cleaned text, {'tokensBefore', 'tokensAfter', 'tokensSaved'})
+    """
+    pages = remove_repeated_boilerplate(text.split(PAGE_SEPARATOR))
+    pages = [clean_page(page) for page in pages]
+    cleaned = PAGE_SEPARATOR.join(page for page in pages if page)
+
+    tokens_before = estimate_tokens(text)
+    tokens_after = estimate_tokens(cleaned)
+    stats = {
+        'tokensBefore': tokens_before,
+        'tokensAfter': tokens_after,
+        'tokensSaved': tokens_before - tokens_after,
+    }
+    return cleaned, stats
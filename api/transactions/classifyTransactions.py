@@ -0,0 +1,63 @@
+from api._utils import InstrumentedHandler, send_cors_preflight, send_json_response, send_error_response, get_request_body
+from api._auth import get_user_id
+from api.transactions._classifier import get_classifier
+
+class handler(InstrumentedHandler):
+    def do_OPTIONS(self):
+        """Handle CORS preflight request"""
+        send_cors_preflight(self, 'POST, OPTIONS')
+    
+    def do_POST(self):
+        """Handle POST request for transaction classification"""
+        try:
+            # Read request body
+            data = get_request_body(self)
+            
+            # Every user learns into and classifies with their own model
+            classifier = get_classifier(get_user_id(self))
+            
+            # Learn mode: categories the user confirmed
+            confirmed = data.get('confirmed')
+            if confirmed is not None:
+                if not isinstance(confirmed, list):
+                    send_json_response(
+                        self,
+                        {'error': "'confirmed' must be a list of {description, category}."},
+                        status_code=400,
+                        methods='POST, OPTIONS'
+                    )
+                    return
+                
+                learned = classifier.learn(confirmed)
+                send_json_response(self, {'data': {'learned': learned}}, methods='POST, OPTIONS')
+                return
+            
+            descriptions = data.get('descriptions')
+            single_description = data.get('description')
+            
+            if descriptions is None and single_description:
+                descriptions = [single_description]
+            
+            if not isinstance(descriptions, list) or not descriptions:
+                send_json_response(
+                    self,
+                    {'error': "The function must be called with 'descriptions' (a list of strings) or 'description' (a single string)."},
+                    status_code=400,
+                    methods='POST, OPTIONS'
+                )
+                return
+            
+            results = []
+            for description in descriptions:
+                prediction = classifier.classify(description)
+                results.append({
+                    'description': description,
+                    'category': prediction[0] if prediction else None,
+                    'confidence': prediction[1] if prediction else 0.0,
+                })
+            
+            send_json_response(self, {'data': results}, methods='POST, OPTIONS')
+            
+        except Exception as error:
+            print(f"Error classifying transaction: {error}")
+            send_error_response(self, error, methods='POST, OPTIONS')
@@ -1,25 +1,28 @@
 import os
+import re
+import json
 import time
-from http.server import BaseHTTPRequestHandler
-import google.generativeai as genai
-from api._utils import send_cors_preflight, send_json_response, send_error_response, get_request_body
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from api._auth import get_user_id
+from api._utils import InstrumentedHandler, send_cors_preflight, send_json_response, send_error_response, get_request_body, send_ndjson_headers, write_ndjson_line, debug_log
+from api import _metrics
+from api.transactions._extraction_cache import get_extraction_cache, content_key
+from api.transactions._parsers import parse_known_layout
+from api.transactions._preprocess import preprocess_statement, PAGE_SEPARATOR
+from api.transactions._classifier import get_classifier
 
 MAX_RETRIES = 3
 RETRY_DELAY_MS = 2000  # 2 seconds
+MODEL_NAME = 'gemini-2.5-flash'
+GEMINI_HOST = 'generativelanguage.googleapis.com'
 
-def extract_transactions_from_text(text):
-    """Extract transactions from bank statement text using Gemini AI"""
-    print(f"extractTransactionsFromText called with text (first 200 chars): {text[:200]}")
-    
-    api_key = os.environ.get('GEMINI_API_KEY')
-    if not api_key:
-        print("GEMINI_API_KEY is not set.")
-        raise Exception("GEMINI_API_KEY is not configured.")
-    
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-2.5-flash')
-    
-    prompt = """
+# Created on first use and reused while the instance stays warm
+_model = None
+_model_lock = threading.Lock()
+
+PROMPT = """
     You are an expert in extracting transaction information from bank
     statements. Given the text from a bank statement, extract the following
     information for each transaction:
@@ -27,8 +30,6 @@ def extract_transactions_from_text(text):
     - Description (the name of the establishment)
     - Amount
     - Type (credit or debit)
-    - Category in Portuguese (e.g., Alimentação, Transporte, Lazer, Salário,
-      etc.)
 
     **Important**: The descriptions must be kept in Portuguese and should be
     short and direct.
@@ -40,38 +41,137 @@ def extract_transactions_from_text(text):
             "date": "2023-10-26",
             "description": "Supermercado Pague Menos",
             "amount": 345.60,
-            "type": "debit",
-            "category": "Alimentação"
+            "type": "debit"
         },
         {
             "date": "2023-10-27",
             "description": "Posto Shell Av. Central",
             "amount": 150.00,
-            "type": "debit",
-            "category": "Transporte"
+            "type": "debit"
         },
         {
             "date": "2023-10-28",
             "description": "Depósito de Salário",
             "amount": 5000.00,
-            "type": "credit",
-            "category": "Salário"
+            "type": "credit"
         }
     ]
 
     Bank statement text:
-    """ + text
+    """
+
+CATEGORY_PROMPT = """
+    You are an expert in categorizing bank transactions. For each transaction
+    description below, choose a category in Portuguese (e.g., Alimentação,
+    Transporte, Lazer, Salário, etc.).
+
+    Return a JSON object mapping each description to its category.
+    For example:
+    {
+        "Supermercado Pague Menos": "Alimentação",
+        "Posto Shell Av. Central": "Transporte"
+    }
+
+    Transaction descriptions:
+    """
+
+# Cached results are only valid for the model and prompt that produced them
+CACHE_NAMESPACE = f"{MODEL_NAME}\0{PROMPT}"
+
+CHUNK_MAX_CHARS = 8000
+MAX_CONCURRENT_CHUNKS = 4
+DATE_PATTERN = re.compile(r'\b\d{2}/\d{2}(?:/\d{2,4})?\b')
+
+def _split_oversized(text):
+    """Split text longer than CHUNK_MAX_CHARS, preferring cuts before a date"""
+    pieces = []
+    while len(text) > CHUNK_MAX_CHARS:
+        window = text[:CHUNK_MAX_CHARS]
+        dates = [match.start() for match in DATE_PATTERN.finditer(window) if match.start() > 0]
+        cut = dates[-1] if dates else window.rfind(' ')
+        if cut <= 0:
+            cut = CHUNK_MAX_CHARS
+        pieces.append(text[:cut])
+        text = text[cut:]
+    pieces.append(text)
+    return pieces
+
+def split_statement(text):
+    """Split statement text into page-bounded chunks of at most CHUNK_MAX_CHARS"""
+    chunks = []
+    current = ''
+    for page in text.split(PAGE_SEPARATOR):
+        for piece in _split_oversized(page):
+            if current and len(current) + len(piece) + 1 > CHUNK_MAX_CHARS:
+                chunks.append(current)
+                current = ''
+            current = f"{current}\n{piece}" if current else piece
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+def merge_chunk_results(results):
+    """
+    Concatenate per-chunk transactions in chunk order.
+
+    Chunks are disjoint slices of the statement, so identical transactions in
+    different chunks (two equal purchases on one day) are real and all kept.
+    Failed chunks (None) are skipped.
+    """
+    return [transaction for transactions in results if transactions for transaction in transactions]
+
+class JsonArrayStream:
+    """Incrementally parse the objects of a JSON array that arrives in pieces"""
+
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text):
+        """Consume the next piece of text and return the objects it completed"""
+        objects = []
+        for char in text:
+            if self._depth == 0:
+                # Anything between objects (brackets, commas, code fences) is skipped
+                if char == '{':
+                    self._depth = 1
+                    self._buffer = [char]
+                continue
+            
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    objects.append(json.loads(''.join(self._buffer)))
+        return objects
+
+def _extract_chunk(model, text):
+    """Extract the transactions of one chunk, retrying only this chunk"""
+    prompt = PROMPT + text
     
     response_text = None
     for i in range(MAX_RETRIES):
         try:
             print(f"Attempt {i + 1} of {MAX_RETRIES} to call Gemini API...")
-            result = model.generate_content(prompt)
-            response_text = result.text
+            with _metrics.upstream(GEMINI_HOST):
+                result = model.generate_content(prompt)
+                response_text = result.text
             print("Received response from Gemini API.")
             
             # Clean up the response
-            import json
             replaced_response = response_text.strip().replace("json", "")
             cleaned_response = replaced_response.replace("`", "")
             
@@ -79,19 +179,284 @@ def extract_transactions_from_text(text):
         except Exception as e:
             print(f"Attempt {i + 1} failed: {e}")
             
-            # Check if it's a 503 overload error
-            error_str = str(e).lower()
-            if "503" in error_str and "overloaded" in error_str and i < MAX_RETRIES - 1:
+            if i < MAX_RETRIES - 1:
                 print(f"Retrying in {RETRY_DELAY_MS / 1000} seconds...")
                 time.sleep(RETRY_DELAY_MS / 1000)
             else:
                 print("Failed to parse JSON from Gemini response:", e)
-                print("Raw response text:", response_text)
+                debug_log("Raw response text:", response_text)
                 raise Exception("Could not parse transactions from statement.") from e
     
     raise Exception("Failed to extract transactions after multiple retries.")
 
-class handler(BaseHTTPRequestHandler):
+def _preprocess(text):
+    """Strip boilerplate from the statement and log the tokens saved"""
+    cleaned, stats = preprocess_statement(text)
+    print(f"Preprocessing saved ~{stats['tokensSaved']} of {stats['tokensBefore']} tokens "
+          f"({stats['tokensAfter']} left)")
+    return cleaned
+
+def _get_model():
+    """Return the Gemini model, configured once per warm instance"""
+    global _model
+    with _model_lock:
+        if _model is None:
+            api_key = os.environ.get('GEMINI_API_KEY')
+            if not api_key:
+                print("GEMINI_API_KEY is not set.")
+                raise Exception("GEMINI_API_KEY is not configured.")
+            
+            # Imported here so requests answered locally never pay for the SDK
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            _model = genai.GenerativeModel(MODEL_NAME)
+        return _model
+
+def _categorize_with_llm(descriptions):
+    """Ask Gemini for the categories of merchants the classifier does not know"""
+    try:
+        with _metrics.upstream(GEMINI_HOST):
+            result = _get_model().generate_content(CATEGORY_PROMPT + json.dumps(descriptions, ensure_ascii=False))
+        cleaned_response = result.text.strip().replace("json", "").replace("`", "")
+        return json.loads(cleaned_response)
+    except Exception as e:
+        # Categories are optional, the transactions are still returned
+        print(f"Failed to categorize transactions with Gemini: {e}")
+        return {}
+
+def classify_transactions(transactions, user_id=None, allow_llm=True):
+    """
+    Categorize transactions after extraction.
+    
+    The signed-in user's own classifier decides first (confirmed merchants,
+    then the token model) and only the remaining unknown merchants are sent
+    to Gemini; without a user every transaction goes there.
+    """
+    classifier = get_classifier(user_id) if user_id else None
+    unknown = []
+    for transaction in transactions:
+        predicted = classifier.classify(transaction.get('description')) if classifier else None
+        if predicted:
+            transaction['category'] = predicted[0]
+        else:
+            unknown.append(transaction)
+    
+    if unknown and allow_llm:
+        descriptions = list(dict.fromkeys(t.get('description') for t in unknown))
+        print(f"Categorizing {len(descriptions)} unknown merchant(s) with Gemini...")
+        categories = _categorize_with_llm(descriptions)
+        for transaction in unknown:
+            category = categories.get(transaction.get('description'))
+            if category:
+                transaction['category'] = category
+    
+    return transactions
+
+def chunk_error(i, error):
+    """Marker for a chunk whose extraction failed after every retry"""
+    return {'chunk': i, 'error': str(error)}
+
+def _extract_with_llm(text, cache):
+    """
+    Extract transactions with Gemini, one cached chunk at a time.
+    
+    Returns (transactions, errors): a chunk that exhausts its retries adds a
+    chunk_error() marker instead of discarding the other chunks' results.
+    """
+    chunks = split_statement(text)
+    if not chunks:
+        return [], []
+    
+    chunk_keys = [content_key(chunk, CACHE_NAMESPACE) for chunk in chunks]
+    results = [cache.get(key) for key in chunk_keys]
+    pending = [i for i, result in enumerate(results) if result is None]
+    errors = []
+    
+    if pending:
+        model = _get_model()
+        
+        # Chunks are extracted concurrently, so wall-clock time follows the slowest one
+        print(f"Extracting transactions from {len(pending)} of {len(chunks)} chunk(s)...")
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_CHUNKS, len(pending))) as executor:
+            futures = {i: executor.submit(_metrics.bind(_extract_chunk), model, chunks[i]) for i in pending}
+            for i, future in futures.items():
+                try:
+                    results[i] = future.result()
+                except Exception as error:
+                    print(f"Giving up on chunk {i + 1} of {len(chunks)}: {error}")
+                    errors.append(chunk_error(i, error))
+                    continue
+                cache.set(chunk_keys[i], results[i])
+    
+    return merge_chunk_results(results), errors
+
+def extract_transactions_from_text(text, user_id=None):
+    """
+    Extract transactions from bank statement text using Gemini AI.
+    
+    Returns (transactions, errors), errors holding a chunk_error() for every
+    chunk Gemini could not extract. The cache is shared by all users, so it
+    only holds results from before user_id's classifier is applied.
+    """
+    debug_log(f"extractTransactionsFromText called with text (first 200 chars): {text[:200]}")
+    
+    # Re-uploads and client retries are answered from the cache
+    cache = get_extraction_cache()
+    statement_key = content_key(text, CACHE_NAMESPACE)
+    cached = cache.get(statement_key)
+    if cached is not None:
+        print("Returning cached extraction for statement.")
+        return classify_transactions(cached, user_id), []
+    
+    text = _preprocess(text)
+    
+    # Known layouts are parsed locally, only what they leave over goes to Gemini
+    transactions, leftover = parse_known_layout(text)
+    errors = []
+    if leftover:
+        extracted, errors = _extract_with_llm(leftover, cache)
+        if errors and not transactions and not extracted:
+            raise Exception("Could not parse transactions from statement.")
+        if transactions and extracted:
+            transactions = sorted(transactions + extracted, key=lambda t: str(t.get('date')))
+        else:
+            transactions = transactions or extracted
+    
+    # A partial result is not cached, so the failed chunks are retried next time
+    if not errors:
+        cache.set(statement_key, transactions)
+    return classify_transactions(transactions, user_id), errors
+
+def _stream_chunk(model, text, emit):
+    """
+    Stream one chunk's transactions to emit() as Gemini generates them.
+    
+    A failed attempt is only retried while nothing was emitted yet: a new
+    attempt starts over and could disagree with what was already sent.
+    """
+    prompt = PROMPT + text
+    
+    for i in range(MAX_RETRIES):
+        parser = JsonArrayStream()
+        emitted = 0
+        try:
+            print(f"Attempt {i + 1} of {MAX_RETRIES} to stream from Gemini API...")
+            with _metrics.upstream(GEMINI_HOST):
+                for piece in model.generate_content(prompt, stream=True):
+                    for transaction in parser.feed(piece.text):
+                        emitted += 1
+                        emit(transaction)
+            return
+        except Exception as e:
+            print(f"Attempt {i + 1} failed: {e}")
+            
+            if emitted:
+                raise Exception(f"Stream failed after {emitted} transaction(s) were sent.") from e
+            if i < MAX_RETRIES - 1:
+                print(f"Retrying in {RETRY_DELAY_MS / 1000} seconds...")
+                time.sleep(RETRY_DELAY_MS / 1000)
+            else:
+                raise Exception("Could not parse transactions from statement.") from e
+
+def stream_transactions_from_text(text, user_id=None):
+    """
+    Yield transactions as soon as each one is extracted.
+    
+    Locally parsed and cached transactions come first, then Gemini results as
+    they stream in from the concurrently extracted chunks; those the user's
+    classifier cannot categorize follow once Gemini has categorized them.
+    A chunk that fails after every retry yields a chunk_error() marker and
+    the others go on.
+    """
+    cache = get_extraction_cache()
+    statement_key = content_key(text, CACHE_NAMESPACE)
+    cached = cache.get(statement_key)
+    if cached is not None:
+        print("Returning cached extraction for statement.")
+        yield from classify_transactions(cached, user_id)
+        return
+    
+    # Copies are classified, so user categories never reach the shared cache
+    parsed, leftover = parse_known_layout(_preprocess(text))
+    classified = classify_transactions([dict(t) for t in parsed], user_id, allow_llm=False)
+    unknown = [transaction for transaction in classified if not transaction.get('category')]
+    for transaction in classified:
+        if transaction.get('category'):
+            yield transaction
+    
+    chunks = split_statement(leftover) if leftover else []
+    chunk_keys = [content_key(chunk, CACHE_NAMESPACE) for chunk in chunks]
+    items = [[] for _ in chunks]
+    uncategorized = []
+    failed = []
+    events = queue.Queue()
+    
+    pending = []
+    for i, key in enumerate(chunk_keys):
+        chunk_result = cache.get(key)
+        if chunk_result is None:
+            pending.append(i)
+        else:
+            events.put(('items', i, chunk_result))
+            events.put(('done', i, None))
+    
+    model = _get_model() if pending or unknown else None
+    
+    def extract(i):
+        try:
+            _stream_chunk(model, chunks[i], lambda transaction: events.put(('items', i, [transaction])))
+            events.put(('done', i, None))
+        except Exception as error:
+            events.put(('error', i, error))
+    
+    def categorize():
+        try:
+            classify_transactions(unknown, user_id)
+        finally:
+            events.put(('categorized', None, unknown))
+    
+    executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_CHUNKS + 1)
+    try:
+        if unknown:
+            executor.submit(_metrics.bind(categorize))
+        for i in pending:
+            executor.submit(_metrics.bind(extract), i)
+        
+        remaining = len(chunks) + (1 if unknown else 0)
+        while remaining:
+            kind, i, payload = events.get()
+            if kind == 'categorized':
+                remaining -= 1
+                yield from payload
+            elif kind == 'error':
+                remaining -= 1
+                print(f"Giving up on chunk {i + 1} of {len(chunks)}: {payload}")
+                failed.append(i)
+                yield chunk_error(i, payload)
+            elif kind == 'done':
+                remaining -= 1
+                if i in pending:
+                    cache.set(chunk_keys[i], items[i])
+            else:
+                items[i].extend(payload)
+                for transaction in classify_transactions([dict(t) for t in payload], user_id, allow_llm=False):
+                    if transaction.get('category'):
+                        yield transaction
+                    else:
+                        uncategorized.append(transaction)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    # Extracted merchants the classifier does not know go to Gemini in one batch
+    if uncategorized:
+        yield from classify_transactions(uncategorized, user_id)
+    
+    # A partial result is not cached, so the failed chunks are retried next time
+    if not failed:
+        transactions = parsed + merge_chunk_results(items)
+        cache.set(statement_key, sorted(transactions, key=lambda t: str(t.get('date'))))
+
+class handler(InstrumentedHandler):
     def do_OPTIONS(self):
         """Handle CORS preflight request"""
         send_cors_preflight(self, 'POST, OPTIONS')
@@ -105,6 +470,8 @@ class handler(BaseHTTPRequestHandler):
             data = get_request_body(self)
             
             text = data.get('text')
+            # Signed-in users get their own learned categories
+            user_id = get_user_id(self, required=False)
             
             if not text:
                 send_json_response(
@@ -115,12 +482,37 @@ class handler(BaseHTTPRequestHandler):
                 )
                 return
             
+            # Streaming mode: one transaction per NDJSON line as soon as it is parsed
+            if data.get('stream'):
+                send_ndjson_headers(self, methods='POST, OPTIONS')
+                stream = stream_transactions_from_text(text, user_id)
+                try:
+                    for transaction in stream:
+                        write_ndjson_line(self, transaction)
+                    print("Successfully streamed transactions from statement.")
+                except (BrokenPipeError, ConnectionResetError):
+                    print("Client disconnected while streaming statement.")
+                except Exception as error:
+                    print(f"Error streaming statement: {error}")
+                    # Headers are already sent, so the error goes in-band
+                    try:
+                        write_ndjson_line(self, {'error': str(error)})
+                    except (BrokenPipeError, ConnectionResetError):
+                        print("Client disconnected while streaming statement.")
+                finally:
+                    # Closing the generator cancels the chunks still queued
+                    stream.close()
+                return
+            
             # Extract transactions
-            transactions = extract_transactions_from_text(text)
+            transactions, errors = extract_transactions_from_text(text, user_id)
             print("Successfully processed statement and extracted transactions.")
             
-            # Send success response
-            send_json_response(self, {'data': transactions}, methods='POST, OPTIONS')
+            # Send success response, flagging chunks that could not be extracted
+            result = {'data': transactions}
+            if errors:
+                result['errors'] = errors
+            send_json_response(self, result, methods='POST, OPTIONS')
             
         except Exception as error:
             print(f"Error processing statement: {error}")
@@ -0,0 +1,308 @@
+"""
+End-to-end benchmark of the API functions and the scheduled refresh script.
+
+Starts local stand-ins for every external service (BCB SGS, brapi and the
+GitHub API over HTTP from fake_upstreams; Gemini, Firestore and yfinance as
+fake SDK modules from benchmarks/fakes), runs the gateway against them and
+drives each endpoint with concurrent clients. The refresh script is run on
+the same fakes. Reports throughput, p50/p95/p99 latency and peak RSS, and can
+write the results as JSON to compare commits. Run from the repository root:
+
+    python benchmarks/e2e.py [--requests 200] [--concurrency 8] [--output results.json]
+    python benchmarks/e2e.py --compare results.json
+"""
+import os
+import sys
+import json
+import time
+import socket
+import signal
+import argparse
+import tempfile
+import subprocess
+import statistics
+import importlib.util
+import http.client
+from datetime import date, datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+FAKES_DIR = os.path.join(BENCH_DIR, 'fakes')
+REFRESH_SCRIPT = os.path.join(ROOT, '.github', 'scripts', 'refresh_all_data.py')
+
+sys.path.insert(0, BENCH_DIR)
+from fake_upstreams import FakeUpstreams
+
+TODAY = date.today().isoformat()
+
+def _statement(i, tag=''):
+    # Free-form lines no registered layout matches, so they go to Gemini; a
+    # distinct i (and tag) per request keeps the extraction cache cold
+    lines = [f'Compra no cartão {1 + n % 28:02d}/01 Loja {tag}{i}-{n} valor {10 + n},{n % 100:02d}' for n in range(60)]
+    return '\n'.join(lines)
+
+# name -> (method, path, body(i) or None)
+SCENARIOS = {
+    'hello': ('GET', '/api/hello', None),
+    'getIpca': ('GET', '/api/bcb/getIpca', None),
+    'getIgpm': ('GET', '/api/bcb/getIgpm', None),
+    'getLatestIndicators': ('GET', '/api/bcb/getLatestIndicators', None),
+    'getDailySeries': ('POST', '/api/bcb/getDailySeries', lambda i: {
+        'seriesId': 12, 'startDate': '2015-01-01', 'endDate': TODAY
+    }),
+    'getDailySeries.columnar': ('POST', '/api/bcb/getDailySeries', lambda i: {
+        'seriesId': 12, 'startDate': '2015-01-01', 'endDate': TODAY, 'format': 'columnar'
+    }),
+    'getMonthlySeries': ('POST', '/api/bcb/getMonthlySeries', lambda i: {
+        'seriesId': 433, 'startDate': '2010-01-01', 'endDate': TODAY
+    }),
+    'getSeriesBatch': ('POST', '/api/bcb/getSeriesBatch', lambda i: {'series': [
+        {'seriesId': 12, 'startDate': '2015-01-01', 'endDate': TODAY},
+        {'seriesId': 11, 'startDate': '2015-01-01', 'endDate': TODAY},
+        {'seriesId': 433, 'startDate': '2010-01-01', 'endDate': TODAY, 'periodicity': 'monthly'}
+    ]}),
+    'valueInvestments': ('POST', '/api/bcb/valueInvestments', lambda i: {'investments': [
+        {'id': f'cdb-{n}', 'details': {
+            'yield_type': 'posfixado', 'indexer': 'CDI', 'indexer_percentage': 100 + n % 20,
+            'start_date': f'{2016 + n % 8}-03-01', 'invested_amount': 1000 + n
+        }}
+        for n in range(50)
+    ]}),
+    'getQuote': ('POST', '/api/brapi/getQuote', lambda i: {
+        'symbol': f'TK{i % 100:04d}3', 'range': '1y', 'interval': '1d'
+    }),
+    'getQuote.batch': ('POST', '/api/brapi/getQuote', lambda i: {
+        'symbols': [f'TK{(i + n) % 100:04d}3' for n in range(20)], 'range': '1y', 'interval': '1d'
+    }),
+    'searchSymbol': ('POST', '/api/brapi/searchSymbol', lambda i: {'symbol': f'TK{i % 50:02d}'}),
+    'processStatement': ('POST', '/api/transactions/processStatement', lambda i: {'text': _statement(i)}),
+    'processStatement.stream': ('POST', '/api/transactions/processStatement', lambda i: {
+        'text': _statement(i, 'stream-'), 'stream': True
+    }),
+    'classifyTransactions': ('POST', '/api/transactions/classifyTransactions', lambda i: {
+        'descriptions': [f'Loja {i}-{n}' for n in range(30)]
+    }),
+    'dispatchGithubAction': ('POST', '/api/dispatchGithubAction', lambda i: {'symbol': 'PETR4', 'range': 'max'}),
+}
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def percentile(samples, fraction):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def request(port, method, path, body=None):
+    """Send one request and return (status, seconds, response bytes)"""
+    payload = json.dumps(body).encode() if body is not None else None
+    headers = {'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'} if payload else {'Accept-Encoding': 'gzip'}
+    # The fake firebase_admin accepts any ID token as that user's uid
+    headers['Authorization'] = 'Bearer bench-user'
+    started = time.perf_counter()
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    try:
+        connection.request(method, path, body=payload, headers=headers)
+        response = connection.getresponse()
+        data = response.read()
+        return response.status, time.perf_counter() - started, len(data)
+    finally:
+        connection.close()
+
+def run_scenario(port, name, total, concurrency):
+    """Drive one endpoint and summarise its latencies"""
+    method, path, body = SCENARIOS[name]
+    # One untimed request fills caches and stores, like a warm instance
+    request(port, method, path, body(0) if body else None)
+
+    def one(i):
+        try:
+            return request(port, method, path, body(i) if body else None)
+        except Exception:
+            return None, None, 0
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, range(1, total + 1)))
+    wall = time.perf_counter() - started
+
+    latencies = [seconds * 1000 for status, seconds, _ in results if status and status < 400]
+    errors = sum(1 for status, _, _ in results if not status or status >= 400)
+    return {
+        'requests': total,
+        'errors': errors,
+        'throughputRps': round(len(latencies) / wall, 2) if wall else None,
+        'p50Ms': round(percentile(latencies, 0.50), 2) if latencies else None,
+        'p95Ms': round(percentile(latencies, 0.95), 2) if latencies else None,
+        'p99Ms': round(percentile(latencies, 0.99), 2) if latencies else None,
+        'meanMs': round(statistics.mean(latencies), 2) if latencies else None,
+        'responseBytes': results[-1][2] if results else 0
+    }
+
+def wait_for_child(process):
+    """Wait for a child and return (exit code, peak RSS in MiB)"""
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in KiB on Linux
+    return process.returncode, round(usage.ru_maxrss / 1024, 1)
+
+def fake_env(args, upstreams, workdir):
+    env = dict(os.environ)
+    env.update(upstreams.env())
+    env.update({
+        'PYTHONPATH': os.pathsep.join([FAKES_DIR, ROOT]),
+        'GEMINI_API_KEY': 'bench',
+        'BRAPI_API_KEY': 'bench',
+        'GITHUB_TOKEN': 'bench',
+        'GITHUB_REPO_OWNER': 'bench',
+        'GITHUB_REPO_NAME': 'bench',
+        'BCB_STORE_PATH': os.path.join(workdir, 'bcb_series.sqlite3'),
+        'EXTRACTION_CACHE_PATH': os.path.join(workdir, 'extractions.sqlite3'),
+        'FIREBASE_SERVICE_ACCOUNT': '{}',
+        'BENCH_GEMINI_LATENCY_MS': str(args.gemini_latency_ms),
+        'BENCH_GEMINI_TRANSACTIONS': str(args.transactions),
+        'BENCH_FIRESTORE_LATENCY_MS': str(args.firestore_latency_ms),
+        'BENCH_FIRESTORE_SYMBOLS': str(args.refresh_symbols),
+        'BENCH_YFINANCE_LATENCY_MS': str(args.yfinance_latency_ms),
+        'BENCH_HISTORY_POINTS': str(args.history_points),
+    })
+    env.pop('METRICS_TOKEN', None)
+    return env
+
+def run_api(args, env):
+    """Start the gateway on the fakes, run every scenario and collect metrics"""
+    port = free_port()
+    gateway = subprocess.Popen(
+        [sys.executable, '-m', 'api._gateway', '--port', str(port), '--workers', str(args.workers), '--quiet'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                request(port, 'GET', '/api/hello')
+                break
+            except OSError:
+                if time.monotonic() > deadline or gateway.poll() is not None:
+                    raise RuntimeError('Gateway did not start')
+                time.sleep(0.1)
+
+        scenarios = {}
+        for name in args.only or SCENARIOS:
+            print(f"  {name}...", file=sys.stderr)
+            scenarios[name] = run_scenario(port, name, args.requests, args.concurrency)
+
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        connection.request('GET', '/api/getMetrics')
+        server_metrics = json.loads(connection.getresponse().read())['data']
+        connection.close()
+    finally:
+        gateway.send_signal(signal.SIGTERM)
+    _, peak_rss = wait_for_child(gateway)
+    return scenarios, {'peakRssMb': peak_rss, 'metrics': server_metrics}
+
+def run_refresh(args, env, workdir):
+    """Run the scheduled refresh script against fake Firestore and yfinance"""
+    if importlib.util.find_spec('pandas') is None:
+        return {'skipped': 'pandas is not installed'}
+    creds = os.path.join(workdir, 'firebase-creds.json')
+    with open(creds, 'w') as file:
+        json.dump({'type': 'service_account'}, file)
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, REFRESH_SCRIPT, '--firebase-creds', creds, '--max-symbols', str(args.refresh_symbols)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    exit_code, peak_rss = wait_for_child(process)
+    wall = time.perf_counter() - started
+    return {
+        'symbols': args.refresh_symbols,
+        'exitCode': exit_code,
+        'wallSeconds': round(wall, 2),
+        'symbolsPerSecond': round(args.refresh_symbols / wall, 2),
+        'peakRssMb': peak_rss
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+def compare(results, baseline):
+    """Print throughput and p95 changes against a previous results file"""
+    print(f"\nvs {baseline.get('commit', 'baseline')[:12]}")
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous or not previous.get('throughputRps') or not current.get('throughputRps'):
+            continue
+        throughput = (current['throughputRps'] / previous['throughputRps'] - 1) * 100
+        p95 = (current['p95Ms'] / previous['p95Ms'] - 1) * 100 if previous.get('p95Ms') else 0
+        print(f"  {name.ljust(26)} throughput {throughput:+7.1f}%   p95 {p95:+7.1f}%")
+
+def print_table(results):
+    print(f"{'scenario'.ljust(26)} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, stats in results['scenarios'].items():
+        print(
+            f"{name.ljust(26)} {stats['throughputRps'] or 0:>8.1f} {stats['p50Ms'] or 0:>9.1f} "
+            f"{stats['p95Ms'] or 0:>9.1f} {stats['p99Ms'] or 0:>9.1f} {stats['errors']:>7}"
+        )
+    print(f"\ngateway peak RSS: {results['gateway']['peakRssMb']} MiB")
+    refresh = results['refresh']
+    if 'skipped' in refresh:
+        print(f"refresh: skipped ({refresh['skipped']})")
+    else:
+        print(
+            f"refresh: {refresh['symbols']} symbols in {refresh['wallSeconds']}s "
+            f"({refresh['symbolsPerSecond']}/s, exit {refresh['exitCode']}, peak RSS {refresh['peakRssMb']} MiB)"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent clients per scenario')
+    parser.add_argument('--workers', type=int, default=32, help='gateway worker threads')
+    parser.add_argument('--only', nargs='+', choices=sorted(SCENARIOS), help='run only these scenarios')
+    parser.add_argument('--latency-ms', type=float, default=50, help='BCB/brapi/GitHub fake latency')
+    parser.add_argument('--gemini-latency-ms', type=float, default=800)
+    parser.add_argument('--firestore-latency-ms', type=float, default=30)
+    parser.add_argument('--yfinance-latency-ms', type=float, default=400)
+    parser.add_argument('--history-points', type=int, default=250, help='bars per brapi/yfinance history')
+    parser.add_argument('--transactions', type=int, default=40, help='transactions per Gemini extraction')
+    parser.add_argument('--refresh-symbols', type=int, default=50, help='symbols for the refresh script (0 to skip)')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='compare against a previous JSON results file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir, \
+            FakeUpstreams(latency_ms=args.latency_ms, history_points=args.history_points) as upstreams:
+        env = fake_env(args, upstreams, workdir)
+        print("Running API scenarios...", file=sys.stderr)
+        scenarios, gateway = run_api(args, env)
+        print("Running refresh script...", file=sys.stderr)
+        refresh = run_refresh(args, env, workdir) if args.refresh_symbols else {'skipped': 'disabled'}
+
+    results = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'scenarios': scenarios,
+        'gateway': gateway,
+        'refresh': refresh
+    }
+
+    print_table(results)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file))
+
+if __name__ == '__main__':
+    main()
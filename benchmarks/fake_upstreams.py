@@ -0,0 +1,156 @@
+"""
+Local stand-ins for the HTTP services the API functions call.
+
+One threaded server answers BCB SGS (/bcb), brapi (/brapi) and the GitHub
+dispatch API (/github) with synthetic data. Every response waits `latency_ms`
+first, and payload sizes follow the options, so handler behaviour can be
+measured without touching the real services.
+"""
+import json
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+DEFAULT_OPTIONS = {
+    'latency_ms': 50,
+    'history_points': 250,
+    'symbols': 2000,
+}
+
+def _bcb_dates(start, end, periodicity):
+    day = start
+    while day <= end:
+        if periodicity == 'monthly':
+            yield day.replace(day=1)
+            day = (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+        else:
+            if day.weekday() < 5:
+                yield day
+            day += timedelta(days=1)
+
+def bcb_series(series_id, params):
+    """SGS rows for a series; 433/189 are monthly, the rest business-daily"""
+    periodicity = 'monthly' if series_id in (433, 189) else 'daily'
+    if 'dataInicial' not in params:
+        today = date.today()
+        return [{'data': today.strftime('%d/%m/%Y'), 'valor': '0.043739'}]
+    start = datetime.strptime(params['dataInicial'], '%d/%m/%Y').date()
+    end = min(datetime.strptime(params['dataFinal'], '%d/%m/%Y').date(), date.today())
+    rng = random.Random(series_id)
+    return [
+        {'data': day.strftime('%d/%m/%Y'), 'valor': f'{rng.uniform(0.01, 0.9):.6f}'}
+        for day in _bcb_dates(start, end, periodicity)
+    ]
+
+def brapi_quote(symbol, points):
+    rng = random.Random(symbol)
+    price = rng.uniform(10, 100)
+    history = []
+    for i in range(points):
+        price *= rng.uniform(0.97, 1.03)
+        history.append({
+            'date': 1262304000 + i * 86400,
+            'open': round(price, 2),
+            'high': round(price * 1.01, 2),
+            'low': round(price * 0.99, 2),
+            'close': round(price, 2),
+            'volume': rng.randint(10_000, 5_000_000),
+            'adjustedClose': round(price, 2)
+        })
+    return {
+        'symbol': symbol,
+        'shortName': f'{symbol} ON',
+        'currency': 'BRL',
+        'regularMarketPrice': round(price, 2),
+        'historicalDataPrice': history
+    }
+
+def brapi_symbols(count):
+    return [
+        {'stock': f'TK{i:04d}{3 + i % 2}', 'name': f'Empresa {i} SA', 'type': 'stock'}
+        for i in range(count)
+    ]
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        options = self.server.options
+        time.sleep(options['latency_ms'] / 1000)
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = url.path.strip('/').split('/')
+
+        # /bcb/bcdata.sgs.{id}/dados[/ultimos/1]
+        if parts[0] == 'bcb' and len(parts) >= 3 and parts[1].startswith('bcdata.sgs.'):
+            self._send(200, bcb_series(int(parts[1].rsplit('.', 1)[1]), params))
+            return
+
+        # /brapi/quote/list and /brapi/quote/{symbols}
+        if parts[:2] == ['brapi', 'quote'] and len(parts) == 3:
+            if parts[2] == 'list':
+                stocks = self.server.symbols
+                if params.get('search'):
+                    stocks = [s for s in stocks if s['stock'].startswith(params['search'].upper())]
+                limit = int(params.get('limit', 10))
+                page = int(params.get('page', 1))
+                window = stocks[(page - 1) * limit:page * limit]
+                self._send(200, {'stocks': window, 'hasNextPage': page * limit < len(stocks)})
+                return
+            results = [brapi_quote(symbol, options['history_points']) for symbol in parts[2].split(',')]
+            self._send(200, {'results': results})
+            return
+
+        self._send(404, {'error': f'No fake for {url.path}'})
+
+    def do_POST(self):
+        time.sleep(self.server.options['latency_ms'] / 1000)
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if urlsplit(self.path).path.startswith('/github/repos/'):
+            self.send_response(204)
+            self.end_headers()
+            return
+        self._send(404, {'error': f'No fake for {self.path}'})
+
+class FakeUpstreams:
+    """Run the fake services on a background thread"""
+
+    def __init__(self, host='127.0.0.1', port=0, **options):
+        self.server = ThreadingHTTPServer((host, port), FakeUpstreamHandler)
+        self.server.daemon_threads = True
+        self.server.options = {**DEFAULT_OPTIONS, **options}
+        self.server.symbols = brapi_symbols(self.server.options['symbols'])
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def env(self):
+        """Environment that points the API functions at these fakes"""
+        return {
+            'BCB_BASE_URL': f'{self.base_url}/bcb',
+            'BRAPI_BASE_URL': f'{self.base_url}/brapi',
+            'GITHUB_API_URL': f'{self.base_url}/github',
+        }
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,11 @@
+"""
+Benchmark stand-in for firebase_admin.
+
+Keeps Firestore documents in memory for the life of the process. Every
+document read, write and collection scan waits BENCH_FIRESTORE_LATENCY_MS.
+The historical-data collection starts with BENCH_FIRESTORE_SYMBOLS stale
+documents so the refresh script has work to do.
+"""
+
+def initialize_app(credential=None, options=None, name='[DEFAULT]'):
+    return object()
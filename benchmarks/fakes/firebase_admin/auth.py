@@ -0,0 +1,3 @@
+def verify_id_token(id_token, app=None, check_revoked=False):
+    """Every token is valid and names its own user"""
+    return {'uid': id_token}
@@ -0,0 +1,3 @@
+class Certificate:
+    def __init__(self, path):
+        self.path = path
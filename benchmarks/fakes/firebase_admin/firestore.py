@@ -0,0 +1,92 @@
+import os
+import copy
+import time
+import threading
+
+LATENCY_MS = float(os.environ.get('BENCH_FIRESTORE_LATENCY_MS', 30))
+SEED_SYMBOLS = int(os.environ.get('BENCH_FIRESTORE_SYMBOLS', 50))
+
+_documents = {}
+_lock = threading.Lock()
+
+def _wait():
+    time.sleep(LATENCY_MS / 1000)
+
+def _seed():
+    collection = _documents.setdefault('historical-data', {})
+    for i in range(SEED_SYMBOLS):
+        symbol = f'TK{i:04d}{3 + i % 2}'
+        collection[f'{symbol}_max'] = {
+            'symbol': symbol,
+            'range': 'max',
+            'status': 'completed',
+            'fetchedAt': '2020-01-01T00:00:00+00:00',
+            'data': []
+        }
+
+_seed()
+
+class Increment:
+    def __init__(self, value):
+        self.value = value
+
+def _merge(target, data):
+    for key, value in data.items():
+        if isinstance(value, Increment):
+            target[key] = target.get(key, 0) + value.value
+        elif isinstance(value, dict):
+            _merge(target.setdefault(key, {}), value)
+        else:
+            target[key] = copy.deepcopy(value)
+
+class DocumentSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+class DocumentReference:
+    def __init__(self, collection, doc_id):
+        self._collection = collection
+        self.id = doc_id
+
+    def get(self):
+        _wait()
+        with _lock:
+            return DocumentSnapshot(self.id, _documents.get(self._collection, {}).get(self.id))
+
+    def set(self, data, merge=False):
+        _wait()
+        with _lock:
+            collection = _documents.setdefault(self._collection, {})
+            if merge:
+                _merge(collection.setdefault(self.id, {}), data)
+            else:
+                collection[self.id] = {}
+                _merge(collection[self.id], data)
+
+class CollectionReference:
+    def __init__(self, name):
+        self._name = name
+
+    def document(self, doc_id):
+        return DocumentReference(self._name, doc_id)
+
+    def stream(self):
+        _wait()
+        with _lock:
+            items = list(_documents.get(self._name, {}).items())
+        return iter([DocumentSnapshot(doc_id, data) for doc_id, data in items])
+
+class Client:
+    def collection(self, name):
+        return CollectionReference(name)
+
+def client(app=None):
+    return Client()
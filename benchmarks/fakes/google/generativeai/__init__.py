@@ -0,0 +1,57 @@
+"""
+Benchmark stand-in for google.generativeai.
+
+Only the surface processStatement uses: configure() and
+GenerativeModel.generate_content(prompt, stream=False). Responses wait
+BENCH_GEMINI_LATENCY_MS and extraction returns BENCH_GEMINI_TRANSACTIONS
+synthetic transactions.
+"""
+import os
+import json
+import time
+
+LATENCY_MS = float(os.environ.get('BENCH_GEMINI_LATENCY_MS', 800))
+TRANSACTIONS = int(os.environ.get('BENCH_GEMINI_TRANSACTIONS', 40))
+STREAM_PIECES = 8
+
+def configure(api_key=None, **kwargs):
+    pass
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+def _transactions():
+    return [
+        {
+            'date': f'2024-01-{1 + i % 28:02d}',
+            'description': f'Estabelecimento {i}',
+            'amount': round(10 + i * 3.7, 2),
+            'type': 'debit' if i % 4 else 'credit',
+            'category': 'Alimentação'
+        }
+        for i in range(TRANSACTIONS)
+    ]
+
+class GenerativeModel:
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+    def _answer(self, prompt):
+        if 'categorizing bank transactions' in prompt:
+            descriptions = json.loads(prompt[prompt.rindex('['):])
+            return json.dumps({description: 'Outros' for description in descriptions})
+        return json.dumps(_transactions(), ensure_ascii=False)
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        text = self._answer(prompt)
+        if not stream:
+            time.sleep(LATENCY_MS / 1000)
+            return _Response(text)
+        return self._stream(text)
+
+    def _stream(self, text):
+        size = -(-len(text) // STREAM_PIECES)
+        for offset in range(0, len(text), size):
+            time.sleep(LATENCY_MS / 1000 / STREAM_PIECES)
+            yield _Response(text[offset:offset + size])
@@ -0,0 +1,43 @@
+"""
+Benchmark stand-in for yfinance.
+
+Ticker(symbol).history() and download(tickers) wait BENCH_YFINANCE_LATENCY_MS
+per call and return pandas frames of BENCH_HISTORY_POINTS weekly bars per
+ticker, shaped like Yahoo's.
+"""
+import os
+import time
+import random
+import pandas as pd
+
+LATENCY_MS = float(os.environ.get('BENCH_YFINANCE_LATENCY_MS', 400))
+HISTORY_POINTS = int(os.environ.get('BENCH_HISTORY_POINTS', 1000))
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+def _history_frame(symbol):
+    rng = random.Random(symbol)
+    index = pd.date_range(end=pd.Timestamp.now(tz='America/Sao_Paulo').normalize(), periods=HISTORY_POINTS, freq='W-MON')
+    price = rng.uniform(10, 100)
+    rows = []
+    for _ in index:
+        price *= rng.uniform(0.95, 1.05)
+        rows.append([price, price * 1.02, price * 0.98, price, rng.randint(10_000, 5_000_000)])
+    return pd.DataFrame(rows, index=index, columns=COLUMNS)
+
+class Ticker:
+    def __init__(self, symbol):
+        self.ticker = symbol
+
+    def history(self, period='1mo', interval='1d', **kwargs):
+        time.sleep(LATENCY_MS / 1000)
+        return _history_frame(self.ticker)
+
+def download(tickers, period='1mo', interval='1d', group_by='column', **kwargs):
+    """One round-trip for all tickers, columns grouped as (ticker, field)"""
+    time.sleep(LATENCY_MS / 1000)
+    if isinstance(tickers, str):
+        tickers = tickers.split()
+    frames = {ticker: _history_frame(ticker) for ticker in tickers}
+    if group_by == 'ticker':
+        return pd.concat(frames, axis=1)
+    return pd.concat(frames, axis=1).swaplevel(axis=1)
@@ -0,0 +1,84 @@
+"""
+Measure the cold-start import cost of every serverless endpoint.
+
+Each handler module under api/ is imported in a fresh interpreter, the way a
+new Vercel instance would load it, and the median wall time over a few runs is
+reported. Run from the repository root:
+
+    python benchmarks/import_times.py [--runs 5] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(ROOT, 'api')
+DEFAULT_RUNS = 5
+
+TIMER = """
+import time, importlib
+start = time.perf_counter()
+importlib.import_module({module!r})
+print(time.perf_counter() - start)
+"""
+
+def discover_endpoints():
+    """List the handler modules Vercel deploys as functions"""
+    modules = []
+    for dirpath, dirnames, filenames in os.walk(API_DIR):
+        dirnames[:] = [d for d in dirnames if not d.startswith(('_', '.'))]
+        for filename in sorted(filenames):
+            if filename.endswith('.py') and not filename.startswith('_'):
+                path = os.path.relpath(os.path.join(dirpath, filename), ROOT)
+                modules.append(path[:-3].replace(os.sep, '.'))
+    return sorted(modules)
+
+def time_import(module):
+    """Import a module in a fresh interpreter and return the seconds it took"""
+    result = subprocess.run(
+        [sys.executable, '-c', TIMER.format(module=module)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout.strip())
+
+def measure(modules, runs):
+    """Return {module: {medianMs, minMs}} or {module: {error}}"""
+    results = {}
+    for module in modules:
+        try:
+            samples = [time_import(module) * 1000 for _ in range(runs)]
+            results[module] = {
+                'medianMs': round(statistics.median(samples), 2),
+                'minMs': round(min(samples), 2)
+            }
+        except RuntimeError as error:
+            results[module] = {'error': str(error)}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = measure(discover_endpoints(), args.runs)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    width = max(len(module) for module in results)
+    print(f"{'endpoint'.ljust(width)}  {'median ms':>10}  {'min ms':>8}")
+    for module, stats in sorted(results.items(), key=lambda item: -item[1].get('medianMs', 0)):
+        if 'error' in stats:
+            print(f"{module.ljust(width)}  failed: {stats['error']}")
+        else:
+            print(f"{module.ljust(width)}  {stats['medianMs']:>10.2f}  {stats['minMs']:>8.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Microbenchmark for the JSON codec used by the serverless functions.
+
+Encodes and decodes payloads shaped like our real responses (a long BCB daily
+series, a batch of brapi quote histories, a statement's extracted
+transactions) with the standard library and, when installed, orjson. Run from
+the repository root:
+
+    python benchmarks/json_codec.py [--repeat 20] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import _json
+
+DEFAULT_REPEAT = 20
+
+def bcb_series(days=20 * 365):
+    """A daily SGS series in the {data, valor} row format"""
+    start = date(2005, 1, 3)
+    return {'data': [
+        {'data': (start + timedelta(days=i)).strftime('%d/%m/%Y'), 'valor': f'{random.uniform(0.01, 0.06):.6f}'}
+        for i in range(days)
+    ]}
+
+def brapi_history(symbols=10, points=1250):
+    """Quote results with a daily price history per symbol"""
+    results = []
+    for n in range(symbols):
+        price = random.uniform(10, 100)
+        history = []
+        for i in range(points):
+            price *= random.uniform(0.97, 1.03)
+            history.append({
+                'date': 1262304000 + i * 86400,
+                'open': round(price, 2),
+                'high': round(price * 1.01, 2),
+                'low': round(price * 0.99, 2),
+                'close': round(price, 2),
+                'volume': random.randint(10_000, 5_000_000),
+                'adjustedClose': round(price, 2)
+            })
+        results.append({
+            'symbol': f'TICK{n}',
+            'shortName': f'Company {n} ON',
+            'currency': 'BRL',
+            'regularMarketPrice': round(price, 2),
+            'historicalDataPrice': history
+        })
+    return {'data': {'results': results}}
+
+def transactions(count=600):
+    """Transactions as returned by processStatement"""
+    descriptions = ['PIX RECEBIDO JOÃO', 'SUPERMERCADO PÃO DE AÇÚCAR', 'UBER *TRIP', 'NETFLIX.COM', 'FARMÁCIA SÃO PAULO']
+    categories = ['Income', 'Groceries', 'Transport', 'Entertainment', 'Health']
+    start = date(2024, 1, 1)
+    return {'data': [
+        {
+            'date': (start + timedelta(days=i // 3)).isoformat(),
+            'description': descriptions[i % 5],
+            'amount': round(random.uniform(5, 900), 2),
+            'type': 'credit' if i % 5 == 0 else 'debit',
+            'category': categories[i % 5]
+        }
+        for i in range(count)
+    ]}
+
+PAYLOADS = {
+    'bcb_series': bcb_series,
+    'brapi_history': brapi_history,
+    'transactions': transactions
+}
+
+def stdlib_dumps(data):
+    return json.dumps(data).encode()
+
+def run(repeat):
+    """Return {payload: {case: ms per call}}"""
+    random.seed(0)
+    results = {}
+    for name, build in PAYLOADS.items():
+        data = build()
+        encoded = stdlib_dumps(data)
+        cases = {
+            'stdlib dumps': lambda: stdlib_dumps(data),
+            'stdlib loads': lambda: json.loads(encoded),
+            f'{_json.CODEC_NAME} dumps': lambda: _json.dumps(data),
+            f'{_json.CODEC_NAME} loads': lambda: _json.loads(encoded)
+        }
+        results[name] = {'bytes': len(encoded)}
+        for case, call in cases.items():
+            best = min(timeit.repeat(call, number=1, repeat=repeat))
+            results[name][case] = round(best * 1000, 3)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"codec: {_json.CODEC_NAME} (best of {args.repeat}, ms per call)")
+    for name, cases in results.items():
+        print(f"\n{name} ({cases['bytes'] / 1024:.0f} KiB)")
+        for case, ms in cases.items():
+            if case != 'bytes':
+                print(f"  {case.ljust(16)} {ms:>9.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -5,16 +5,27 @@ const BASE_URL = `${API_BASE_URL}/api/bcb`; // Base path for Vercel BCB function
 
 export const getRates = async (seriesId, startDate, endDate, periodicity) => {
   try {
-    const params = { seriesId, startDate, endDate };
+    // Columnar is about half the size of [{ data, valor }] rows on long series
+    const params = { seriesId, startDate, endDate, format: 'columnar' };
     let response;
     if (periodicity === 'daily') {
       response = await axios.post(`${BASE_URL}/getDailySeries`, params);
     } else { // monthly
       response = await axios.post(`${BASE_URL}/getMonthlySeries`, params);
     }
-    return response.data.data; // Vercel functions return { data: ... }
+    return response.data.data; // { dates: ['yyyy-mm-dd', ...], values: [number, ...] }
   } catch (error) {
     console.error(`Error fetching rates for series ${seriesId}:`, error);
     throw error;
   }
 };
+
+export const valueInvestments = async (investments) => {
+  try {
+    const response = await axios.post(`${BASE_URL}/valueInvestments`, { investments });
+    return response.data.data; // [{ id, currentValue, factor }, ...]
+  } catch (error) {
+    console.error("Error valuing investments:", error);
+    throw error;
+  }
+};
@@ -7,13 +7,16 @@ export const extractTextFromPDF = async (file) => {
   console.log("Starting PDF text extraction for file:", file.name);
   const arrayBuffer = await file.arrayBuffer();
   const pdf = await pdfjsLib.getDocument({ data: arrayBuffer }).promise;
-  let fullText = '';
+  const pages = [];
 
   for (let i = 1; i <= pdf.numPages; i++) {
     const page = await pdf.getPage(i);
     const textContent = await page.getTextContent();
-    fullText += textContent.items.map(item => item.str).join(' ');
+    // Items ending a line carry hasEOL, so the page keeps its line breaks
+    pages.push(textContent.items.map(item => item.str + (item.hasEOL ? '\n' : ' ')).join('').trim());
   }
+  // Form feeds mark page boundaries so the API can chunk by page
+  const fullText = pages.join('\f');
   console.log("Finished PDF text extraction. Extracted text length:", fullText.length);
   return fullText;
 };
@@ -1,16 +1,66 @@
 import axios from 'axios';
 import { API_BASE_URL } from '../config/api';
+import { auth } from './firebase';
 
 const BASE_URL = `${API_BASE_URL}/api/transactions`; // Base path for Vercel Transactions functions
 
-export const processStatement = async (text) => {
-  console.log("Calling processStatement API with text (first 200 chars):", text.substring(0, 200));
+// The API classifies with the signed-in user's own learned categories
+const getAuthHeaders = async () => {
+  const token = await auth.currentUser?.getIdToken();
+  return token ? { Authorization: `Bearer ${token}` } : {};
+};
+
+export const confirmCategories = async (confirmed) => {
   try {
-    const response = await axios.post(`${BASE_URL}/processStatement`, { text });
-    console.log("Received response from processStatement API.");
-    return response.data.data; // Vercel functions return { data: ... }
+    // Teaches the local classifier which category each merchant belongs to
+    const response = await axios.post(`${BASE_URL}/classifyTransactions`, { confirmed }, { headers: await getAuthHeaders() });
+    return response.data.data;
   } catch (error) {
-    console.error("Error processing statement:", error);
+    console.error("Error confirming categories:", error);
     throw error;
   }
 };
+
+export const processStatementStream = async (text, onTransaction) => {
+  // Streams NDJSON so transactions can be shown while the rest are extracted
+  const response = await fetch(`${BASE_URL}/processStatement`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', ...(await getAuthHeaders()) },
+    body: JSON.stringify({ text, stream: true }),
+  });
+  if (!response.ok) {
+    throw new Error(`processStatement failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  const transactions = [];
+  const errors = [];
+  let buffer = '';
+
+  const handleLine = (line) => {
+    if (!line.trim()) return;
+    const item = JSON.parse(line);
+    if (item.error) {
+      // A failed chunk is reported in-band and the other chunks keep streaming
+      if (item.chunk !== undefined) {
+        errors.push(item);
+        return;
+      }
+      throw new Error(item.error);
+    }
+    transactions.push(item);
+    onTransaction?.(item);
+  };
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    lines.forEach(handleLine);
+  }
+  handleLine(buffer);
+  return { transactions, errors };
+};
@@ -14,6 +14,7 @@ pdfjs.GlobalWorkerOptions.workerSrc = new URL(
 export default function StatementUploadCard({ processStatement }) {
   const [uploadedFile, setUploadedFile] = useState(null);
   const [isProcessing, setIsProcessing] = useState(false);
+  const [receivedCount, setReceivedCount] = useState(0);
   const [error, setError] = useState(null);
   const [isPreviewOpen, setIsPreviewOpen] = useState(false);
   const [numPages, setNumPages] = useState(null);
@@ -39,9 +40,10 @@ export default function StatementUploadCard({ processStatement }) {
   const handleUpload = async () => {
     if (uploadedFile) {
       setIsProcessing(true);
+      setReceivedCount(0);
       setError(null);
       try {
-        await processStatement(uploadedFile);
+        await processStatement(uploadedFile, setReceivedCount);
       } catch (error) {
         console.error('Error processing statement:', error);
         setError('Ocorreu um erro ao processar o arquivo. Por favor, tente novamente.');
@@ -80,7 +82,9 @@ export default function StatementUploadCard({ processStatement }) {
                 Abrir Preview
               </Button>
               <Button onClick={handleUpload} variant="primary" disabled={isProcessing}>
-                {isProcessing ? 'Processando...' : 'Processar Arquivo'}
+                {isProcessing
+                  ? (receivedCount > 0 ? `Processando... ${receivedCount} transações` : 'Processando...')
+                  : 'Processar Arquivo'}
               </Button>
             </div>
           </div>
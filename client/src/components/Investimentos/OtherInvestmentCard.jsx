@@ -1,4 +1,3 @@
-import { useState, useEffect } from 'react';
 import Card from '../shared/Card';
 import { useRates } from '../../context/RatesContext';
 import { Trash2, Calendar, Landmark, TrendingUp, Loader } from 'lucide-react';
@@ -11,111 +10,10 @@ const DetailItem = ({ icon: IconComponent, label, value }) => (
   </div>
 );
 
-const calculateBusinessDays = (startDate, endDate) => {
-  let businessDays = 0;
-  const currentDate = new Date(startDate);
-
-  while (currentDate < endDate) {
-    const dayOfWeek = currentDate.getDay();
-    if (dayOfWeek >= 1 && dayOfWeek <= 5) { // Monday to Friday
-      businessDays++;
-    }
-    currentDate.setDate(currentDate.getDate() + 1);
-  }
-
-  return businessDays;
-};
-
 const OtherInvestmentCard = ({ investment, onRemove }) => {
   const { name, type, details, purchase_date } = investment;
-  const { rates, loading: loadingRates } = useRates();
-  const [currentValue, setCurrentValue] = useState(null);
-
-  useEffect(() => {
-    const calculateCurrentValue = async () => {
-      const P = parseFloat(details.invested_amount);
-      const startDate = new Date(details.start_date + 'T23:59:59');
-      const today = new Date();
-      
-      const endDate = details.due_date ? new Date(details.due_date + 'T23:59:59') : today;
-      const effectiveEndDate = new Date(Math.min(today.getTime(), endDate.getTime()));
-
-      if(effectiveEndDate <= startDate) return;
-
-      switch (details.yield_type) {
-        case 'prefixado': {
-          const t = (effectiveEndDate - startDate) / (1000 * 60 * 60 * 24 * 365.25); // Time in years
-          const r = parseFloat(details.rate) / 100;
-          setCurrentValue(P * Math.pow(1 + r, t));
-          break;
-        }
-        case 'posfixado': {
-          if (details.indexer) {
-            const seriesId = details.indexer === 'CDI' ? 12 : 11;
-            const dailyRates = rates[seriesId];
-
-            if (dailyRates) {
-              let value = P;
-              const ratesMap = new Map(dailyRates.map(rate => {
-                const [day, month, year] = rate.data.split('/');
-                return [`${year}-${month}-${day}`, parseFloat(rate.valor)];
-              }));
-
-              for (let d = new Date(startDate); d <= effectiveEndDate; d.setDate(d.getDate() + 1)) {
-                const dateString = `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`;
-                
-                if (ratesMap.has(dateString)) {
-                  const curRate = ratesMap.get(dateString) / 100;
-                  const investmentRate = curRate * (parseFloat(details.indexer_percentage) / 100);
-                  value = value * (1 + investmentRate);
-                }
-              }
-              setCurrentValue(value);
-            }
-          }
-          break;
-        }
-        case 'hibrido': {
-          if (details.indexer && details.spread_rate) {
-            const seriesId = details.indexer === 'IPCA' ? 433 : 189;
-            const monthlyRates = rates[seriesId];
-
-            if (monthlyRates) {
-              let inflation_factor = 1;
-              if (monthlyRates.length > 0) {
-                const applicableRates = monthlyRates.filter(rate => {
-                  const [day, month, year] = rate.data.split('/');
-                  const inflationDate = new Date(year, month - 1, day);
-                  return inflationDate > startDate;
-                });
-
-                if (applicableRates.length > 0) {
-                  inflation_factor = applicableRates.reduce((acc, rate) => {
-                    return acc * (1 + parseFloat(rate.valor) / 100);
-                  }, 1);
-                }
-              }
-
-              const business_days = calculateBusinessDays(startDate, effectiveEndDate);
-              const t_util = business_days / 252;
-              const spread_rate = parseFloat(details.spread_rate) / 100;
-              const fixed_factor = Math.pow(1 + spread_rate, t_util);
-
-              const currentValue = P * inflation_factor * fixed_factor;
-              setCurrentValue(currentValue);
-            }
-          }
-          break;
-        }
-        default:
-          break;
-      }
-    };
-
-    if (!loadingRates) {
-      calculateCurrentValue();
-    }
-  }, [details, rates, loadingRates]);
+  const { values, loading: loadingRates } = useRates();
+  const currentValue = values[investment.id]?.currentValue ?? null;
 
   const formattedAmount = new Intl.NumberFormat('pt-BR', {
     style: 'currency',
@@ -3,7 +3,7 @@ import { AuthContext } from './AuthContext';
 import { useUtils } from './UtilsContext';
 import { getTransactions, createTransaction, updateTransaction, deleteTransaction } from '../api/transactions';
 import { getCategories, createCategory, deleteCategory } from '../api/categories';
-import { processStatement } from '../api/statement';
+import { processStatementStream, confirmCategories } from '../api/statement';
 import { getProfile, updateProfile } from '../api/profile';
 import { extractTextFromPDF } from '../api/pdfExtractor'; // Import the new PDF extractor
 
@@ -117,14 +117,22 @@ export const TransactionProvider = ({ children }) => {
     updateDates(start, end);
   }
 
-  const handleProcessStatement = async (file) => {
+  const handleProcessStatement = async (file, onProgress) => {
     console.log("Starting handleProcessStatement for file:", file.name);
     try {
       showNotification('Processando extrato...', 'info');
       const extractedText = await extractTextFromPDF(file); // Extract text from PDF
       console.log("PDF text extracted. Sending to API...");
-      const newTransactionsFromAI = await processStatement(extractedText); // Pass extracted text to API
+      // Transactions stream in as they are extracted, so progress shows before the whole statement is done
+      let received = 0;
+      const { transactions: newTransactionsFromAI, errors: chunkErrors } = await processStatementStream(
+        extractedText,
+        () => onProgress?.(++received)
+      );
       console.log("API call for processStatement successful. New transactions received:", newTransactionsFromAI.length);
+      if (chunkErrors.length > 0) {
+        console.error("Parts of the statement could not be processed:", chunkErrors);
+      }
 
       if (!newTransactionsFromAI || newTransactionsFromAI.length === 0) {
         showNotification('Nenhuma transação encontrada no extrato.', 'info');
@@ -182,7 +190,11 @@ export const TransactionProvider = ({ children }) => {
       // 6. Update the transactions state
       setTransactions(prev => [...prev, ...newTransactionsWithCategory].sort((a, b) => new Date(b.date) - new Date(a.date)));
 
-      showNotification('Extrato processado e transações adicionadas!', 'success');
+      if (chunkErrors.length > 0) {
+        showNotification('Parte do extrato não pôde ser processada. Confira as transações adicionadas.', 'error');
+      } else {
+        showNotification('Extrato processado e transações adicionadas!', 'success');
+      }
     } catch (err) {
       console.error("Error processing statement:", err);
       showNotification('Erro ao processar extrato.', 'error');
@@ -198,6 +210,9 @@ export const TransactionProvider = ({ children }) => {
       const transactionWithCategory = { ...newTransaction, category };
       setTransactions(prev => [...prev, transactionWithCategory].sort((a, b) => new Date(b.date) - new Date(a.date)));
       showNotification("Transação adicionada com sucesso!", "success");
+      if (category) {
+        confirmCategories([{ description: newTransaction.description, category: category.name }]).catch(() => {});
+      }
       return transactionWithCategory;
     } catch (err) {
       console.error("Error adding transaction:", err);
@@ -228,6 +243,10 @@ export const TransactionProvider = ({ children }) => {
     try {
       await updateTransaction(id, { category_id: categoryId, category: category }); // Storing full category object for now
       showNotification("Categoria da transação atualizada!", "success");
+      const transaction = originalTransactions.find(t => t.id === id);
+      if (transaction && category) {
+        confirmCategories([{ description: transaction.description, category: category.name }]).catch(() => {});
+      }
     } catch (err) {
       console.error("Error updating transaction category:", err);
       setTransactions(originalTransactions);
@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Handlers import each other as api.*, the refresh scripts as top-level modules
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, '.github', 'scripts'))
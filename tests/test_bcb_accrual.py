@@ -0,0 +1,81 @@
+from datetime import date, timedelta
+import pytest
+from api.bcb._accrual import value_investments, get_required_series, validate_investment
+
+TODAY = date(2025, 7, 15)
+
+def daily_rows(start, end, valor='0.05'):
+    rows = []
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            rows.append({'data': day.strftime('%d/%m/%Y'), 'valor': valor})
+        day += timedelta(days=1)
+    return rows
+
+def reference_posfixado(principal, percentage, rows, start, end):
+    """Day-by-day loop OtherInvestmentCard.jsx used to run"""
+    rates = {row['data']: float(row['valor']) for row in rows}
+    value = principal
+    day = start
+    while day <= end:
+        rate = rates.get(day.strftime('%d/%m/%Y'))
+        if rate is not None:
+            value *= 1 + rate / 100 * percentage / 100
+        day += timedelta(days=1)
+    return value
+
+def test_prefixado_compounds_on_calendar_days():
+    [result] = value_investments([{
+        'yield_type': 'prefixado', 'rate': 10, 'start_date': '2024-07-15', 'invested_amount': 1000
+    }], {}, today=TODAY)
+    assert result['factor'] == pytest.approx(1.1 ** (365 / 365.25))
+    assert result['currentValue'] == pytest.approx(1000 * result['factor'])
+
+def test_posfixado_matches_day_by_day_loop():
+    rows = daily_rows(date(2025, 1, 1), TODAY)
+    investments = [
+        {'yield_type': 'posfixado', 'indexer': 'CDI', 'indexer_percentage': percentage,
+         'start_date': start, 'invested_amount': 1000}
+        for percentage, start in [(100, '2025-01-06'), (110, '2025-03-01'), (100, '2025-05-10')]
+    ]
+    results = value_investments(investments, {'12': rows}, today=TODAY)
+    for details, result in zip(investments, results):
+        expected = reference_posfixado(
+            1000, details['indexer_percentage'], rows, date.fromisoformat(details['start_date']), TODAY
+        )
+        assert result['currentValue'] == pytest.approx(expected, rel=1e-12)
+
+def test_missing_series_leaves_value_empty():
+    [result] = value_investments([{
+        'yield_type': 'posfixado', 'indexer': 'Selic', 'indexer_percentage': 100,
+        'start_date': '2025-01-06', 'invested_amount': 1000
+    }], {}, today=TODAY)
+    assert result == {'currentValue': None, 'factor': None}
+
+@pytest.mark.parametrize('details, message', [
+    ({'yield_type': 'prefixado', 'start_date': '2025-01-01', 'invested_amount': 1000}, 'rate'),
+    ({'yield_type': 'posfixado', 'indexer': 'CDI', 'start_date': '2025-01-01', 'invested_amount': 1000}, 'indexer_percentage'),
+    ({'yield_type': 'posfixado', 'indexer_percentage': 100, 'start_date': '2025-01-01', 'invested_amount': 1000}, 'indexer'),
+    ({'yield_type': 'hibrido', 'indexer': 'IPCA', 'spread_rate': None, 'start_date': '2025-01-01', 'invested_amount': 1000}, 'spread_rate'),
+    ({'yield_type': 'prefixado', 'rate': 'abc', 'start_date': '2025-01-01', 'invested_amount': 1000}, 'rate'),
+    ({'yield_type': 'prefixado', 'rate': 10, 'start_date': '01/01/2025', 'invested_amount': 1000}, 'start_date'),
+    ({'yield_type': 'prefixado', 'rate': 10, 'start_date': '2025-01-01'}, 'invested_amount'),
+    ('not an object', 'object'),
+])
+def test_invalid_items_get_their_own_error(details, message):
+    valid = {'yield_type': 'prefixado', 'rate': 10, 'start_date': '2024-07-15', 'invested_amount': 1000}
+    invalid, ok = value_investments([details, valid], {}, today=TODAY)
+    assert message in invalid['error']
+    assert invalid['currentValue'] is None
+    assert ok['currentValue'] is not None and 'error' not in ok
+
+def test_required_series_skip_invalid_items():
+    specs = get_required_series([
+        {'yield_type': 'hibrido', 'indexer': 'IPCA', 'spread_rate': 5, 'start_date': '2025-01-10', 'invested_amount': 1000},
+        {'yield_type': 'hibrido', 'indexer': 'IPCA', 'start_date': '2025-01-10', 'invested_amount': 1000},
+    ], today=TODAY)
+    assert specs == [{'seriesId': 433, 'startDate': '2025-01-10', 'endDate': '2025-07-15', 'periodicity': 'monthly'}]
+
+def test_validate_accepts_other_investment_types():
+    assert validate_investment({'start_date': '2025-01-01', 'invested_amount': '500.00'}) is None
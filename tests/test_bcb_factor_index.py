@@ -0,0 +1,98 @@
+from datetime import date
+import numpy as np
+import pytest
+from api.bcb import _factor_index
+from api.bcb._factor_index import FactorIndex, parse_rows
+from api.bcb._accrual import value_investments
+from api.bcb._series import ranges_error
+
+# IPCA-like prints, dated on the 1st like series 433: 2025-03-01 is a
+# Saturday, 2025-06-01 a Sunday and 2025-11-01 a Saturday
+IPCA_ROWS = [
+    {'data': f'01/{month:02d}/2025', 'valor': valor}
+    for month, valor in enumerate(
+        ['0.16', '1.31', '0.56', '0.43', '0.26', '0.24', '0.26', '-0.11', '0.48', '0.09', '0.18', '0.33'], start=1
+    )
+]
+
+def reference_inflation(rows, start, end):
+    """Prints published strictly after start and up to end, as user-003 and the JS card compounded them"""
+    factor = 1.0
+    for row in rows:
+        day, month, year = row['data'].split('/')
+        if start < date(int(year), int(month), int(day)) <= end:
+            factor *= 1 + float(row['valor']) / 100
+    return factor
+
+def test_parse_rows():
+    dates, rates = parse_rows([{'data': '02/01/2024', 'valor': '0.04'}, {'data': '31/12/2024', 'valor': '1.5'}])
+    assert list(dates) == [np.datetime64('2024-01-02'), np.datetime64('2024-12-31')]
+    assert rates == pytest.approx([0.0004, 0.015])
+
+def test_daily_factors_match_direct_product():
+    rows = [{'data': f'{day:02d}/01/2024', 'valor': '0.05'} for day in (2, 3, 4, 5, 8, 9, 10)]
+    index = FactorIndex.from_rows(rows, multiplier=1.1)
+    factors = index.factors(['2024-01-03', '2024-01-06', '2024-01-01'], ['2024-01-08', '2024-01-31', '2024-01-01'])
+    assert factors == pytest.approx([1.00055 ** 4, 1.00055 ** 3, 1.0])
+
+def test_empty_index():
+    index = FactorIndex([], [])
+    assert index.factors(['2024-01-01'], ['2024-12-31']) == pytest.approx([1.0])
+
+@pytest.mark.parametrize('start, end', [
+    # The Saturday 2025-03-01 print is before the start and must not count
+    (date(2025, 3, 2), date(2025, 7, 15)),
+    # The Sunday 2025-06-01 print is on the end date and must count
+    (date(2025, 1, 10), date(2025, 6, 1)),
+    # The Saturday 2025-11-01 print is before the end date and must count
+    (date(2025, 1, 10), date(2025, 11, 2)),
+    (date(2025, 3, 1), date(2025, 3, 31)),
+])
+def test_monthly_prints_keep_exact_dates(start, end):
+    index = FactorIndex.from_rows(IPCA_ROWS, business_days=False)
+    [factor] = index.factors([start], [end], include_start=False)
+    assert factor == pytest.approx(reference_inflation(IPCA_ROWS, start, end), rel=1e-12)
+
+@pytest.mark.parametrize('start, end', [
+    ('2025-03-02', date(2025, 7, 15)),
+    ('2025-01-10', date(2025, 6, 1)),
+    ('2025-01-10', date(2025, 11, 2)),
+])
+def test_hibrido_regressions(start, end):
+    [result] = value_investments([{
+        'yield_type': 'hibrido', 'indexer': 'IPCA', 'spread_rate': 6,
+        'start_date': start, 'invested_amount': 1000
+    }], {'433': IPCA_ROWS}, today=end)
+    start = date.fromisoformat(start)
+    spread = 1.06 ** (np.busday_count(start, end) / 252)
+    assert result['factor'] == pytest.approx(reference_inflation(IPCA_ROWS, start, end) * spread, rel=1e-12)
+
+def test_monthly_range_factors_leave_out_start_date(monkeypatch):
+    index = FactorIndex.from_rows(IPCA_ROWS, business_days=False)
+    monkeypatch.setattr(_factor_index, 'get_factor_index', lambda *args: index)
+    [result] = _factor_index.get_range_factors(433, [{'startDate': '2025-03-01', 'endDate': '2025-05-01'}], 1.0, 'monthly')
+    assert result['factor'] == pytest.approx(1.0043 * 1.0026)
+
+def test_index_cache_is_bounded(monkeypatch, tmp_path):
+    from api.bcb._store import SeriesStore
+    store = SeriesStore(str(tmp_path / 'series.sqlite3'))
+    store.save(433, IPCA_ROWS, date(2025, 1, 1), date(2025, 12, 31))
+    monkeypatch.setattr(_factor_index, 'get_store', lambda: store)
+    monkeypatch.setattr(_factor_index, '_indexes', type(_factor_index._indexes)())
+
+    first = _factor_index.get_factor_index(433, 1.0, 'monthly')
+    assert _factor_index.get_factor_index(433, 1.0, 'monthly') is first
+    for n in range(_factor_index.MAX_CACHED_INDEXES * 2):
+        _factor_index.get_factor_index(433, 1 + n / 100, 'monthly')
+    assert len(_factor_index._indexes) == _factor_index.MAX_CACHED_INDEXES
+
+@pytest.mark.parametrize('series_id, ranges, percentage, valid', [
+    (12, [{'startDate': '2024-01-01', 'endDate': '2024-02-01'}], 100, True),
+    (12, [], 100, False),
+    (None, [{'startDate': '2024-01-01', 'endDate': '2024-02-01'}], 100, False),
+    (12, ['2024-01-01'], 100, False),
+    (12, [{'startDate': '2024-01-01'}], 100, False),
+    (12, [{'startDate': '2024-01-01', 'endDate': '2024-02-01'}], '110', False),
+])
+def test_ranges_error(series_id, ranges, percentage, valid):
+    assert (ranges_error(series_id, ranges, percentage) is None) == valid
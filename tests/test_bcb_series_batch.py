@@ -0,0 +1,37 @@
+from api.bcb import getSeriesBatch
+
+def test_merge_specs_widens_range_per_series_and_periodicity():
+    merged = getSeriesBatch.merge_specs([
+        {'seriesId': 12, 'startDate': '2024-03-01', 'endDate': '2024-04-01'},
+        {'seriesId': '12', 'startDate': '2024-01-01', 'endDate': '2024-02-01'},
+        {'seriesId': 12, 'startDate': '2024-01-01', 'endDate': '2024-02-01', 'periodicity': 'monthly'},
+    ])
+    assert merged == {
+        ('12', 'daily'): ['2024-01-01', '2024-04-01'],
+        ('12', 'monthly'): ['2024-01-01', '2024-02-01'],
+    }
+
+def test_same_series_with_both_periodicities_is_unioned(monkeypatch):
+    daily = [{'data': '02/01/2024', 'valor': '1'}, {'data': '03/01/2024', 'valor': '2'}]
+    monthly = [{'data': '01/12/2023', 'valor': '0'}, {'data': '02/01/2024', 'valor': '1'}]
+    monkeypatch.setitem(getSeriesBatch.SERIES_FETCHERS, 'daily', lambda *args: daily)
+    monkeypatch.setitem(getSeriesBatch.SERIES_FETCHERS, 'monthly', lambda *args: monthly)
+
+    result = getSeriesBatch.get_series_batch([
+        {'seriesId': 433, 'startDate': '2024-01-01', 'endDate': '2024-01-31'},
+        {'seriesId': 433, 'startDate': '2024-01-01', 'endDate': '2024-01-31', 'periodicity': 'monthly'},
+    ])
+    assert result == {'433': [
+        {'data': '01/12/2023', 'valor': '0'},
+        {'data': '02/01/2024', 'valor': '1'},
+        {'data': '03/01/2024', 'valor': '2'},
+    ]}
+
+def test_columnar_format():
+    from api.bcb._series import to_columnar, format_error
+    rows = [{'data': '02/01/1970', 'valor': '0.5'}, {'data': '03/01/1970', 'valor': '1'}]
+    assert to_columnar(rows) == {'dates': ['1970-01-02', '1970-01-03'], 'values': [0.5, 1.0]}
+    assert to_columnar(rows, 'epochDay') == {'dates': [1, 2], 'values': [0.5, 1.0]}
+    assert format_error('columnar', 'epochDay') is None
+    assert format_error('csv', 'iso') is not None
+    assert format_error('rows', 'unix') is not None
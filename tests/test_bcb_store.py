@@ -0,0 +1,75 @@
+from datetime import date
+import pytest
+from api.bcb._store import SeriesStore
+
+@pytest.fixture
+def store(tmp_path):
+    return SeriesStore(str(tmp_path / 'series.sqlite3'))
+
+def rows(*days):
+    return [{'data': day.strftime('%d/%m/%Y'), 'valor': '0.04'} for day in days]
+
+def test_missing_ranges_without_coverage(store):
+    assert store.missing_ranges(12, date(2024, 1, 1), date(2024, 1, 31)) == [
+        (date(2024, 1, 1), date(2024, 1, 31))
+    ]
+
+def test_missing_ranges_inside_coverage(store):
+    store.save(12, rows(date(2024, 1, 2), date(2024, 1, 31)), date(2024, 1, 1), date(2024, 1, 31))
+    assert store.missing_ranges(12, date(2024, 1, 5), date(2024, 1, 20)) == []
+
+def test_missing_ranges_head_and_tail(store):
+    store.save(12, rows(date(2024, 2, 1), date(2024, 2, 29)), date(2024, 2, 1), date(2024, 2, 29))
+    assert store.missing_ranges(12, date(2024, 1, 10), date(2024, 3, 10)) == [
+        (date(2024, 1, 10), date(2024, 1, 31)),
+        (date(2024, 3, 1), date(2024, 3, 10)),
+    ]
+
+def test_coverage_stops_at_latest_observation(tmp_path):
+    # Nothing published after the 15th yet, so the rest is fetched again once the check expires
+    store = SeriesStore(str(tmp_path / 'series.sqlite3'), tail_check_ttl=0)
+    store.save(12, rows(date(2024, 1, 2), date(2024, 1, 15)), date(2024, 1, 1), date(2024, 1, 31))
+    assert store.get_coverage(12) == (date(2024, 1, 1), date(2024, 1, 15))
+    assert store.missing_ranges(12, date(2024, 1, 1), date(2024, 1, 31)) == [
+        (date(2024, 1, 16), date(2024, 1, 31))
+    ]
+
+def test_recently_checked_tail_is_not_refetched(store):
+    store.save(12, rows(date(2024, 1, 2), date(2024, 1, 15)), date(2024, 1, 1), date(2024, 1, 31))
+    assert store.missing_ranges(12, date(2024, 1, 1), date(2024, 1, 31)) == []
+    assert store.missing_ranges(12, date(2024, 1, 1), date(2024, 1, 20)) == []
+    # A longer tail than the one checked is still fetched
+    assert store.missing_ranges(12, date(2024, 1, 1), date(2024, 2, 5)) == [
+        (date(2024, 1, 16), date(2024, 2, 5))
+    ]
+
+def test_empty_window_is_not_covered(store):
+    store.save(12, [], date(2024, 1, 1), date(2024, 1, 31))
+    assert store.get_coverage(12) is None
+
+def test_coverage_extends_contiguously(store):
+    store.save(12, rows(date(2024, 2, 1), date(2024, 2, 29)), date(2024, 2, 1), date(2024, 2, 29))
+    store.save(12, rows(date(2024, 1, 2)), date(2024, 1, 1), date(2024, 1, 31))
+    assert store.get_coverage(12) == (date(2024, 1, 1), date(2024, 2, 29))
+
+def test_load_returns_bcb_rows_in_order(store):
+    store.save(12, rows(date(2024, 1, 3), date(2024, 1, 2)), date(2024, 1, 1), date(2024, 1, 3))
+    assert store.load(12, date(2024, 1, 1), date(2024, 1, 31)) == [
+        {'data': '02/01/2024', 'valor': '0.04'},
+        {'data': '03/01/2024', 'valor': '0.04'},
+    ]
+
+def test_repeated_requests_ending_today_fetch_once(tmp_path, monkeypatch):
+    from api.bcb import _series
+    store = SeriesStore(str(tmp_path / 'series.sqlite3'))
+    calls = []
+
+    def fetch(series_id, start, end, periodicity='daily'):
+        calls.append((start, end))
+        return rows(date(2024, 1, 2), date(2024, 1, 15))
+
+    monkeypatch.setattr(_series, 'get_store', lambda: store)
+    monkeypatch.setattr(_series, 'fetch_series', fetch)
+    for _ in range(3):
+        assert len(_series.get_series(12, date(2024, 1, 1), date(2024, 1, 20))) == 2
+    assert calls == [(date(2024, 1, 1), date(2024, 1, 20))]
@@ -0,0 +1,37 @@
+import pytest
+from api._cache import TTLCache
+from api.brapi import getQuote
+
+@pytest.fixture
+def brapi(monkeypatch):
+    calls = []
+    def make_request(endpoint, params):
+        calls.append(endpoint)
+        symbols = endpoint.split('/', 1)[1].split(',')
+        return {'results': [{'symbol': symbol, 'regularMarketPrice': 10.0} for symbol in symbols if symbol != 'NOPE3']}
+    monkeypatch.setattr(getQuote, 'make_request', make_request)
+    monkeypatch.setattr(getQuote, '_quote_cache', TTLCache())
+    return calls
+
+def test_symbols_are_normalized_before_matching(brapi):
+    quotes = getQuote.get_quotes(['petr4', 'VALE3.SA', ' itub4 '], '1mo', '1d')
+    assert {symbol: quote['symbol'] for symbol, quote in quotes.items()} == {
+        'petr4': 'PETR4', 'VALE3.SA': 'VALE3', ' itub4 ': 'ITUB4'
+    }
+    assert brapi == ['quote/PETR4,VALE3,ITUB4']
+
+def test_same_ticker_in_different_case_is_fetched_once(brapi):
+    quotes = getQuote.get_quotes(['petr4', 'PETR4'], '1mo', '1d')
+    assert quotes['petr4'] is quotes['PETR4']
+    assert brapi == ['quote/PETR4']
+
+def test_unknown_symbol_maps_to_none(brapi):
+    assert getQuote.get_quotes(['NOPE3', 'PETR4'], '1mo', '1d')['NOPE3'] is None
+
+def test_groups_respect_max_symbols_per_request(brapi, monkeypatch):
+    monkeypatch.setattr(getQuote, 'MAX_SYMBOLS_PER_REQUEST', 2)
+    getQuote.get_quotes(['A1', 'B1', 'C1'], '1mo', '1d')
+    assert sorted(brapi) == ['quote/A1,B1', 'quote/C1']
+
+def test_normalize_symbol():
+    assert getQuote.normalize_symbol('bbas3.sa') == 'BBAS3'
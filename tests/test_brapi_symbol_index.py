@@ -0,0 +1,90 @@
+import time
+import threading
+import pytest
+from api.brapi import _symbol_index
+from api.brapi._symbol_index import SymbolIndex, SymbolIndexUnavailable, get_symbol_index
+
+STOCKS = [
+    {'stock': 'PETR4', 'name': 'Petróleo Brasileiro S.A. Petrobras'},
+    {'stock': 'PETR3', 'name': 'Petróleo Brasileiro S.A. Petrobras'},
+    {'stock': 'VALE3', 'name': 'Vale S.A.'},
+    {'stock': 'ITUB4', 'name': 'Itaú Unibanco Holding S.A.'},
+]
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    for name, value in (('_index', None), ('_loaded_at', 0), ('_loading', None), ('_failures', 0), ('_retry_at', 0)):
+        monkeypatch.setattr(_symbol_index, name, value)
+
+def test_search_ranks_exact_ticker_then_prefix_then_name():
+    index = SymbolIndex(STOCKS)
+    assert index.search('petr4')[0]['stock'] == 'PETR4'
+    assert [stock['stock'] for stock in index.search('PETR')] == ['PETR3', 'PETR4']
+    assert [stock['stock'] for stock in index.search('itau')] == ['ITUB4']
+    assert index.search('petrobras')[0]['stock'] in ('PETR3', 'PETR4')
+    assert index.search('   ') == []
+
+def test_fuzzy_search_tolerates_typos():
+    assert SymbolIndex(STOCKS).search('unibnco')[0]['stock'] == 'ITUB4'
+
+def test_concurrent_cold_requests_share_one_download():
+    calls = []
+    def fetch_page(page, limit):
+        calls.append(page)
+        time.sleep(0.1)
+        return {'stocks': STOCKS, 'hasNextPage': page < 2}
+
+    indexes = []
+    threads = [threading.Thread(target=lambda: indexes.append(get_symbol_index(fetch_page))) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert calls == [1, 2]
+    assert len(indexes) == 6 and all(index is indexes[0] for index in indexes)
+
+def test_failed_load_backs_off(monkeypatch):
+    calls = []
+    def failing(page, limit):
+        calls.append(page)
+        raise RuntimeError('plan limit')
+
+    with pytest.raises(RuntimeError):
+        get_symbol_index(failing)
+    # Within the backoff nothing is downloaded again
+    with pytest.raises(SymbolIndexUnavailable):
+        get_symbol_index(failing)
+    assert calls == [1]
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, 'monotonic', lambda: now + _symbol_index.LOAD_RETRY_MIN_S + 1)
+    index = get_symbol_index(lambda page, limit: {'stocks': STOCKS})
+    assert index.search('VALE3')[0]['stock'] == 'VALE3'
+    assert _symbol_index._failures == 0
+
+def test_backoff_doubles_per_failure(monkeypatch):
+    def failing(page, limit):
+        raise RuntimeError('down')
+
+    now = time.monotonic()
+    for failures in (1, 2, 3):
+        monkeypatch.setattr(time, 'monotonic', lambda: now)
+        with pytest.raises(RuntimeError):
+            get_symbol_index(failing)
+        assert _symbol_index._retry_at - now == pytest.approx(_symbol_index.LOAD_RETRY_MIN_S * 2 ** (failures - 1))
+        now = _symbol_index._retry_at
+
+def test_search_symbols_falls_back_to_remote_search_during_backoff(monkeypatch):
+    from api.brapi import searchSymbol
+    requests = []
+    def make_request(endpoint, params):
+        requests.append(dict(params))
+        if 'search' in params:
+            return {'stocks': [STOCKS[2]]}
+        raise RuntimeError('plan limit')
+    monkeypatch.setattr(searchSymbol, 'make_request', make_request)
+
+    assert searchSymbol.search_symbols('vale') == [STOCKS[2]]
+    assert searchSymbol.search_symbols('vale3') == [STOCKS[2]]
+    # One failed page download, then only remote searches
+    assert [('search' in params) for params in requests] == [False, True, True]
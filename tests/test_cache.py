@@ -0,0 +1,92 @@
+import time
+import threading
+import pytest
+from api._cache import TTLCache
+
+def test_hit_and_expiry(monkeypatch):
+    cache = TTLCache()
+    calls = []
+    fetch = lambda: calls.append(1) or 'value'
+    assert cache.get_or_fetch('key', 60, fetch) == 'value'
+    assert cache.get_or_fetch('key', 60, fetch) == 'value'
+    assert len(calls) == 1
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, 'monotonic', lambda: now + 61)
+    assert cache.get('key') is None
+    cache.get_or_fetch('key', 60, fetch)
+    assert len(calls) == 2
+
+def test_oldest_entries_are_evicted():
+    cache = TTLCache(max_entries=2)
+    for key in 'abc':
+        cache.set(key, key, 60)
+    assert cache.get('a') is None
+    assert cache.get('b') == 'b' and cache.get('c') == 'c'
+
+def test_missing_and_none_results_are_not_cached():
+    cache = TTLCache()
+    calls = []
+    def fetch_many(keys):
+        calls.append(keys)
+        return {'a': None}
+    assert cache.get_many_or_fetch(['a', 'b'], 60, fetch_many) == {'a': None, 'b': None}
+    cache.get_many_or_fetch(['a', 'b'], 60, fetch_many)
+    assert calls == [['a', 'b'], ['a', 'b']]
+
+def test_concurrent_misses_fetch_once():
+    cache = TTLCache()
+    calls = []
+    release = threading.Event()
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch('key', 60, fetch))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ['value'] * 8
+    assert len(calls) == 1
+
+def _fetch_with_waiter(cache, error):
+    """Start a fetch that raises error while a second thread waits on the same key"""
+    started = threading.Event()
+    waiter_result = []
+
+    def fetch():
+        started.set()
+        time.sleep(0.1)
+        raise error
+
+    def waiter():
+        started.wait(5)
+        try:
+            waiter_result.append(cache.get_or_fetch('key', 60, lambda: 'unused'))
+        except BaseException as waited_error:
+            waiter_result.append(waited_error)
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    with pytest.raises(type(error)):
+        cache.get_or_fetch('key', 60, fetch)
+    thread.join(5)
+    assert not thread.is_alive()
+    return waiter_result[0]
+
+def test_fetch_error_reaches_waiters_and_is_not_cached():
+    cache = TTLCache()
+    error = ValueError('upstream down')
+    assert _fetch_with_waiter(cache, error) is error
+    assert cache.get_or_fetch('key', 60, lambda: 'recovered') == 'recovered'
+
+def test_base_exception_still_releases_waiters():
+    cache = TTLCache()
+    waited = _fetch_with_waiter(cache, KeyboardInterrupt())
+    assert isinstance(waited, RuntimeError)
+    assert cache.get_or_fetch('key', 60, lambda: 'recovered') == 'recovered'
@@ -0,0 +1,105 @@
+import threading
+import pytest
+from api import _auth
+from api.transactions import _classifier, processStatement
+from api.transactions._classifier import CategoryClassifier, normalize_merchant
+
+class MemoryStore:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+
+    def load(self):
+        return iter(self.rows)
+
+    def add(self, rows):
+        self.rows.extend((merchant, category, 1) for merchant, category in rows)
+
+@pytest.fixture
+def stores(monkeypatch):
+    stores = {}
+    monkeypatch.setattr(_classifier, '_open_store', lambda user_id: stores.setdefault(user_id, MemoryStore()))
+    monkeypatch.setattr(_classifier, '_classifiers', type(_classifier._classifiers)())
+    return stores
+
+def test_normalize_merchant_drops_payment_noise():
+    assert normalize_merchant('COMPRA CARTAO Padaria São João 12/03') == 'PADARIA SAO JOAO'
+
+def test_learned_merchants_are_persisted_and_reloaded():
+    store = MemoryStore()
+    classifier = CategoryClassifier(store)
+    assert classifier.learn([
+        {'description': 'PIX ENVIADO Padaria Sao Joao', 'category': 'Alimentação'},
+        {'description': 'UBER TRIP', 'category': 'Transporte'},
+        {'description': 'UBER VIAGEM', 'category': 'Transporte'},
+        {'description': '', 'category': 'Ignored'},
+        'not an example',
+    ]) == 3
+
+    reloaded = CategoryClassifier(store)
+    assert reloaded.lookup('Padaria Sao Joao') == ('Alimentação', 1.0)
+    # The token model is rebuilt from the merchant counts
+    assert reloaded.predict_tokens('UBER EATS')[0] == 'Transporte'
+    assert reloaded.classify('Unknown Store') is None
+
+def test_models_are_scoped_per_user(stores):
+    _classifier.get_classifier('alice').learn([{'description': 'Academia Forte', 'category': 'Treino da Alice'}])
+    assert _classifier.get_classifier('alice').classify('Academia Forte')[0] == 'Treino da Alice'
+    assert _classifier.get_classifier('bob').classify('Academia Forte') is None
+    assert [row[1] for row in stores['alice'].rows] == ['Treino da Alice']
+    assert stores['bob'].rows == []
+
+def test_reads_are_safe_while_learning():
+    classifier = CategoryClassifier(MemoryStore())
+    errors = []
+
+    def learn():
+        for i in range(300):
+            classifier.learn([{'description': f'Loja Numero {chr(65 + i % 26)}{chr(65 + i // 26)}', 'category': f'C{i % 7}'}])
+
+    def read():
+        try:
+            for _ in range(300):
+                classifier.classify('Loja Numero AB')
+        except RuntimeError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=learn), threading.Thread(target=read)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+def test_classify_transactions_prefers_confirmed_merchants(stores, monkeypatch):
+    _classifier.get_classifier('alice').learn([{'description': 'Mercado Bom', 'category': 'Casa'}])
+    monkeypatch.setattr(processStatement, '_categorize_with_llm', lambda descriptions: {'Loja Nova': 'Compras'})
+
+    transactions = processStatement.classify_transactions([
+        {'description': 'Mercado Bom', 'category': 'Alimentação'},
+        {'description': 'Mercado Bom'},
+        {'description': 'Loja Nova'},
+        {'description': 'Sem Resposta'},
+    ], 'alice')
+    assert [t.get('category') for t in transactions] == ['Casa', 'Casa', 'Compras', None]
+
+def test_classify_transactions_without_user_skips_local_models(stores, monkeypatch):
+    monkeypatch.setattr(processStatement, '_categorize_with_llm', lambda descriptions: {})
+    transactions = processStatement.classify_transactions([{'description': 'Mercado Bom'}])
+    assert 'category' not in transactions[0]
+    assert stores == {}
+
+class FakeHandler:
+    def __init__(self, headers):
+        self.headers = headers
+
+def test_get_user_id_requires_a_bearer_token():
+    with pytest.raises(_auth.Unauthorized):
+        _auth.get_user_id(FakeHandler({}))
+    with pytest.raises(_auth.Unauthorized):
+        _auth.get_user_id(FakeHandler({'Authorization': 'Basic abc'}))
+    assert _auth.get_user_id(FakeHandler({}), required=False) is None
+
+def test_optional_user_id_without_firebase_configured(monkeypatch):
+    monkeypatch.delenv('FIREBASE_SERVICE_ACCOUNT', raising=False)
+    handler = FakeHandler({'Authorization': 'Bearer token'})
+    assert _auth.get_user_id(handler, required=False) is None
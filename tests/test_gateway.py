@@ -0,0 +1,105 @@
+import http.client
+import json
+import threading
+import time
+import pytest
+from http.server import BaseHTTPRequestHandler
+from api import _metrics
+from api._gateway import GatewayServer, GatewayRequestHandler
+from api._utils import handler_route
+
+release = threading.Event()
+started = threading.Event()
+
+class EchoHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps({'class': type(self).__name__, 'path': self.path}).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        started.set()
+        release.wait(5)
+        self.send_response(204)
+        self.end_headers()
+
+@pytest.fixture
+def gateway():
+    servers = []
+
+    def start(workers=4, queue=4):
+        server = GatewayServer(('127.0.0.1', 0), {'/api/echo': EchoHandler, '/api/slow': SlowHandler},
+                               workers=workers, queue=queue, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server.server_address[1]
+
+    yield start
+    release.set()
+    for server in servers:
+        server.shutdown()
+        server.drain(1)
+        server.server_close()
+
+def get(port, path):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+def test_route_runs_on_its_own_handler_instance(gateway):
+    port = gateway()
+    status, body = get(port, '/api/echo?x=1')
+    assert status == 200
+    assert json.loads(body) == {'class': 'EchoHandler', 'path': '/api/echo?x=1'}
+    assert get(port, '/api/missing')[0] == 404
+    # The gateway's own class was never swapped out
+    assert GatewayRequestHandler.__name__ == 'GatewayRequestHandler'
+
+def test_full_queue_answers_503(gateway):
+    release.clear()
+    started.clear()
+    port = gateway(workers=1, queue=0)
+    slow = threading.Thread(target=get, args=(port, '/api/slow'))
+    slow.start()
+    assert started.wait(5)
+
+    status, body = get(port, '/api/echo')
+    assert status == 503
+    assert 'overloaded' in json.loads(body)['error']
+
+    release.set()
+    slow.join(5)
+    # The slot frees once the slow connection is torn down
+    deadline = time.monotonic() + 2
+    while get(port, '/api/echo')[0] != 200:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_metrics_are_keyed_by_matched_route(gateway):
+    port = gateway()
+    before = _metrics.snapshot()['endpoints']
+    for i in range(20):
+        get(port, f'/api/scan-{i}')
+    get(port, '/api/echo?x=1')
+    # Requests are recorded just after their response is written
+    deadline = time.monotonic() + 2
+    while True:
+        endpoints = _metrics.snapshot()['endpoints']
+        unmatched = endpoints.get(_metrics.UNMATCHED, {}).get('count', 0) - before.get(_metrics.UNMATCHED, {}).get('count', 0)
+        if unmatched == 20 and '/api/echo' in endpoints or time.monotonic() > deadline:
+            break
+        time.sleep(0.01)
+    assert unmatched == 20
+    assert '/api/echo' in endpoints
+    assert not [key for key in endpoints if 'scan' in key]
+
+def test_standalone_handler_is_keyed_by_its_file():
+    from api.bcb import getDailySeries
+    assert handler_route(getDailySeries.handler) == '/api/bcb/getDailySeries'
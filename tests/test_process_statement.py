@@ -0,0 +1,169 @@
+import pytest
+from api.transactions import processStatement
+from api.transactions._extraction_cache import ExtractionCache
+from api.transactions._preprocess import PAGE_SEPARATOR
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    """Answers each chunk with one transaction per ';' item, failing on chunks containing 'FAIL'"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        text = prompt[len(processStatement.PROMPT):]
+        if 'FAIL' in text:
+            raise RuntimeError('Gemini unavailable')
+        items = ',\n'.join(
+            f'{{"date": "2025-01-{n + 1:02d}", "description": "{line.strip()}", "amount": 10.0, "type": "debit"}}'
+            for n, line in enumerate(text.strip().split(';'))
+        )
+        return FakeResponse(f'```json\n[{items}]\n```')
+
+@pytest.fixture
+def model(monkeypatch, tmp_path):
+    fake = FakeModel()
+    monkeypatch.setattr(processStatement, '_get_model', lambda: fake)
+    monkeypatch.setattr(processStatement, 'RETRY_DELAY_MS', 0)
+    monkeypatch.setattr(processStatement, 'get_extraction_cache', lambda: cache)
+    monkeypatch.setattr(processStatement, 'parse_known_layout', lambda text: ([], text))
+    monkeypatch.setattr(processStatement, 'classify_transactions', lambda transactions, user_id=None, allow_llm=True: transactions)
+    cache = ExtractionCache(str(tmp_path / 'cache.sqlite3'))
+    fake.cache = cache
+    return fake
+
+def test_merge_keeps_identical_transactions_from_different_chunks():
+    purchase = {'date': '2025-01-02', 'description': 'Padaria', 'amount': 12.5, 'type': 'debit'}
+    assert processStatement.merge_chunk_results([[purchase], [dict(purchase)], None, []]) == [purchase, purchase]
+
+def test_split_statement_respects_pages_and_size(monkeypatch):
+    monkeypatch.setattr(processStatement, 'CHUNK_MAX_CHARS', 40)
+    text = PAGE_SEPARATOR.join(['01/01 Padaria 10,00', '02/01 Mercado 20,00 03/01 Posto 30,00 04/01 Farmacia 40,00'])
+    chunks = processStatement.split_statement(text)
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert ''.join(chunks).replace('\n', '') == text.replace(PAGE_SEPARATOR, '')
+
+def test_failed_chunk_returns_partial_result(model, monkeypatch):
+    monkeypatch.setattr(processStatement, 'split_statement', lambda text: text.split('|'))
+    transactions, errors = processStatement.extract_transactions_from_text('Padaria|FAIL Mercado|Posto')
+    assert [t['description'] for t in transactions] == ['Padaria', 'Posto']
+    assert errors == [{'chunk': 1, 'error': 'Could not parse transactions from statement.'}]
+    # Three attempts for the failed chunk only
+    assert model.calls == 2 + processStatement.MAX_RETRIES
+
+def test_partial_result_is_not_cached(model, monkeypatch):
+    monkeypatch.setattr(processStatement, 'split_statement', lambda text: text.split('|'))
+    processStatement.extract_transactions_from_text('Padaria|FAIL Mercado')
+    calls = model.calls
+    processStatement.extract_transactions_from_text('Padaria|FAIL Mercado')
+    # The good chunk comes from the chunk cache, the failed one is tried again
+    assert model.calls == calls + processStatement.MAX_RETRIES
+
+def test_every_chunk_failing_raises(model):
+    with pytest.raises(Exception, match='Could not parse'):
+        processStatement.extract_transactions_from_text('FAIL everything')
+
+def test_complete_result_is_cached(model):
+    first, _ = processStatement.extract_transactions_from_text('Padaria;Padaria')
+    calls = model.calls
+    second, errors = processStatement.extract_transactions_from_text('Padaria;Padaria')
+    assert model.calls == calls and errors == []
+    assert second == first and len(first) == 2
+
+def test_json_array_stream_handles_split_pieces():
+    parser = processStatement.JsonArrayStream()
+    text = '```json\n[{"description": "Loja {A}, \\"B\\"", "amount": 1.5}, {"description": "C", "meta": {"x": 1}}]\n```'
+    objects = []
+    for i in range(0, len(text), 7):
+        objects.extend(parser.feed(text[i:i + 7]))
+    assert objects == [
+        {'description': 'Loja {A}, "B"', 'amount': 1.5},
+        {'description': 'C', 'meta': {'x': 1}},
+    ]
+
+class StreamingModel:
+    """Streams the given pieces, raising once they run out if fail is set"""
+
+    def __init__(self, attempts):
+        self.attempts = list(attempts)
+        self.calls = 0
+
+    def generate_content(self, prompt, stream=False):
+        pieces, fail = self.attempts[self.calls]
+        self.calls += 1
+        for piece in pieces:
+            yield FakeResponse(piece)
+        if fail:
+            raise RuntimeError('stream broke')
+
+def test_stream_chunk_retries_only_before_anything_is_emitted(monkeypatch):
+    monkeypatch.setattr(processStatement, 'RETRY_DELAY_MS', 0)
+    model = StreamingModel([(['[{"a"'], True), (['[{"a": 1}, {"a": 2}]'], False)])
+    emitted = []
+    processStatement._stream_chunk(model, 'text', emitted.append)
+    assert model.calls == 2
+    assert emitted == [{'a': 1}, {'a': 2}]
+
+def test_stream_chunk_fails_instead_of_mixing_attempts(monkeypatch):
+    monkeypatch.setattr(processStatement, 'RETRY_DELAY_MS', 0)
+    model = StreamingModel([(['[{"a": 1}, {"a"'], True), (['[{"a": 9}, {"a": 2}]'], False)])
+    emitted = []
+    with pytest.raises(Exception, match='after 1 transaction'):
+        processStatement._stream_chunk(model, 'text', emitted.append)
+    assert model.calls == 1
+    assert emitted == [{'a': 1}]
+
+class DisconnectedFile:
+    def write(self, data):
+        raise BrokenPipeError()
+
+    def flush(self):
+        pass
+
+def test_stream_handler_survives_client_disconnect(monkeypatch):
+    closed = []
+
+    def stream(text, user_id=None):
+        try:
+            yield {'description': 'Padaria'}
+            yield {'description': 'Mercado'}
+        finally:
+            closed.append(True)
+
+    errors = []
+    monkeypatch.setattr(processStatement, 'get_request_body', lambda handler: {'text': 'x', 'stream': True})
+    monkeypatch.setattr(processStatement, 'send_ndjson_headers', lambda handler, methods=None: None)
+    monkeypatch.setattr(processStatement, 'send_error_response', lambda *args, **kwargs: errors.append(args))
+    monkeypatch.setattr(processStatement, 'stream_transactions_from_text', stream)
+
+    fake = type('FakeHandler', (), {'headers': {}, 'wfile': DisconnectedFile()})()
+    processStatement.handler.do_POST(fake)
+    assert closed == [True]
+    assert errors == []
+
+def test_stream_categorizes_unknown_merchants_after_extraction(model, monkeypatch):
+    def classify(transactions, user_id=None, allow_llm=True):
+        for transaction in transactions:
+            if transaction['description'] == 'Padaria':
+                transaction['category'] = 'Alimentação'
+            elif allow_llm:
+                transaction['category'] = 'Outros'
+        return transactions
+
+    monkeypatch.setattr(processStatement, 'classify_transactions', classify)
+    monkeypatch.setattr(processStatement, '_stream_chunk', lambda model, text, emit: [
+        emit({'description': description}) for description in ('Loja Nova', 'Padaria')
+    ])
+    streamed = list(processStatement.stream_transactions_from_text('page'))
+    assert streamed == [
+        {'description': 'Padaria', 'category': 'Alimentação'},
+        {'description': 'Loja Nova', 'category': 'Outros'},
+    ]
+    # Categories never reach the shared cache
+    assert model.cache.get(processStatement.content_key('page', processStatement.CACHE_NAMESPACE)) == [
+        {'description': 'Loja Nova'}, {'description': 'Padaria'},
+    ]
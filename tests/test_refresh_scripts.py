@@ -0,0 +1,95 @@
+import threading
+import pytest
+
+pytest.importorskip('yfinance')
+pytest.importorskip('firebase_admin')
+
+import fetch_yfinance
+
+class FakeDocument:
+    def set(self, data):
+        pass
+
+class FakeDb:
+    def collection(self, name):
+        return self
+
+    def document(self, doc_id):
+        return FakeDocument()
+
+def test_concurrent_saves_log_whole_lines(capsys):
+    threads = [
+        threading.Thread(target=fetch_yfinance.save_to_firestore, args=(FakeDb(), f'TK{i:02d}', 'max', {}))
+        for i in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 40
+    assert all(
+        line.startswith('Saving to Firestore document: historical-data/TK') or line == 'Successfully saved data to Firestore'
+        for line in lines
+    )
+
+import time
+import numpy as np
+import pandas as pd
+import refresh_all_data
+
+def history(closes):
+    # yf.download returns naive dates in exchange time when ignore_tz is left on
+    index = pd.date_range('2024-01-01', periods=len(closes), freq='D')
+    return pd.DataFrame(
+        {'Open': closes, 'High': closes, 'Low': closes, 'Close': closes, 'Volume': [100.0] * len(closes)},
+        index=index
+    )
+
+@pytest.fixture
+def downloads(monkeypatch):
+    calls = []
+
+    def download(tickers, **kwargs):
+        calls.append(list(tickers))
+        if 'FAIL.SA' in tickers:
+            raise RuntimeError('Yahoo is down')
+        frames = {ticker: FRAMES[ticker] for ticker in tickers if ticker in FRAMES}
+        if len(tickers) == 1:
+            return frames.get(tickers[0], pd.DataFrame())
+        return pd.concat(frames, axis=1)
+
+    monkeypatch.setattr(fetch_yfinance.yf, 'download', download)
+    return calls
+
+FRAMES = {
+    'PETR4.SA': history([10.0, 11.0, 12.0]),
+    # Did not trade on the second day of the shared index
+    'VALE3.SA': history([50.0, np.nan, 52.0]),
+}
+
+def test_batch_splits_frame_per_ticker(downloads):
+    documents = fetch_yfinance.fetch_yfinance_batch(['PETR4', 'VALE3', 'XYZW3'], 'max')
+    assert downloads == [['PETR4.SA', 'VALE3.SA', 'XYZW3.SA']]
+    assert [point['close'] for point in documents['PETR4']['data']] == [10.0, 11.0, 12.0]
+    assert [point['close'] for point in documents['VALE3']['data']] == [50.0, 52.0]
+    assert documents['XYZW3']['status'] == 'error'
+    # Dates are midnight in São Paulo, as with Ticker.history, not UTC
+    assert documents['PETR4']['data'][0]['date'] == int(pd.Timestamp('2024-01-01', tz='America/Sao_Paulo').timestamp())
+
+def test_batch_handles_single_ticker_groups_and_failures(downloads):
+    documents = fetch_yfinance.fetch_yfinance_batch(['PETR4', 'FAIL', 'VALE3'], 'max', batch_size=1)
+    assert len(downloads) == 3
+    assert documents['PETR4']['status'] == 'completed'
+    assert documents['FAIL'] == {**documents['FAIL'], 'status': 'error', 'error': 'Yahoo is down'}
+    assert len(documents['VALE3']['data']) == 2
+
+def test_token_bucket_charges_every_request():
+    bucket = refresh_all_data.TokenBucket(rate=100, capacity=5)
+    # A batch larger than the bucket goes out once it is full and leaves it in debt
+    bucket.acquire(10)
+    started = time.monotonic()
+    bucket.acquire(1)
+    # Repaying 5 tokens of debt and taking 1 more needs 6 refills
+    assert time.monotonic() - started >= 0.055
@@ -0,0 +1,64 @@
+from api.transactions._parsers import parse_known_layout, has_transactions
+
+DC_STATEMENT = """01/02/2024 SUPERMERCADO PAGUE MENOS 345,60 D
+02/02/2024 SALARIO EMPRESA X 5.000,00 C
+03/02/2024 UBER TRIP 23,90 D
+SALDO ANTERIOR 1.234,56
+"""
+
+def test_dc_marker_layout_parses_locally():
+    transactions, leftover = parse_known_layout(DC_STATEMENT)
+    assert [t['type'] for t in transactions] == ['debit', 'credit', 'debit']
+    assert transactions[1] == {
+        'date': '2024-02-02', 'description': 'SALARIO EMPRESA X', 'amount': 5000.0, 'type': 'credit',
+    }
+    # Categories are left to the classifier instead of coming out as None
+    assert all('category' not in t for t in transactions)
+    assert leftover is None
+
+def test_signed_amount_requires_a_sign():
+    text = (
+        "05/01/2024 SUPERMERCADO -R$ 345,60\n"
+        "06/01/2024 SALARIO +R$ 5.000,00\n"
+        "07/01/2024 FARMACIA -R$ 12,00\n"
+        "31/01/2024 SALDO DO DIA R$ 4.642,40\n"
+    )
+    transactions, leftover = parse_known_layout(text)
+    assert [t['description'] for t in transactions] == ['SUPERMERCADO', 'SALARIO', 'FARMACIA']
+    assert [t['type'] for t in transactions] == ['debit', 'credit', 'debit']
+    # The unsigned balance line is neither a transaction nor sent to the LLM
+    assert leftover is None
+
+def test_unsigned_amounts_do_not_match_a_layout():
+    text = "\n".join(f"0{day}/01/2024 SALDO R$ 1.000,00" for day in range(1, 6))
+    assert parse_known_layout(text) == ([], text)
+
+def test_leftover_with_an_unmatched_transaction_goes_to_the_llm():
+    text = DC_STATEMENT + "04/02/2024 PADARIA BOM PAO 15,00\n"
+    transactions, leftover = parse_known_layout(text)
+    assert len(transactions) == 3
+    assert 'PADARIA BOM PAO' in leftover
+
+def test_has_transactions_ignores_headers_and_summaries():
+    assert not has_transactions("Periodo: 01/01/2024 a 31/01/2024\nSaldo anterior 1.000,00")
+    assert not has_transactions("31/01/2024 SALDO DO DIA 1.234,56")
+    assert not has_transactions("Total da fatura R$ 2.345,67\nVencimento 10/02/2024")
+    assert has_transactions("10/01/2024 POSTO SHELL 200,00")
+
+# PDFs without line breaks reach the API as one line of space-joined text items per page
+SINGLE_LINE_PAGE = (
+    "05/01/2024 SUPERMERCADO PAGUE MENOS 345,60 D 06/01/2024 SALARIO EMPRESA X 5.000,00 C "
+    "07/01/2024 UBER TRIP 23,90 D 08/01/2024 TARIFA PACOTE 45,90 SALDO DO DIA 954,10 C"
+)
+
+def test_description_stops_at_the_first_amount_on_a_single_line_page():
+    transactions, leftover = parse_known_layout(SINGLE_LINE_PAGE)
+    assert [t['description'] for t in transactions] == ['SUPERMERCADO PAGUE MENOS', 'SALARIO EMPRESA X', 'UBER TRIP']
+    # The unmarked tariff is not read as a 954,10 credit but left for the LLM
+    assert all(t['amount'] != 954.1 for t in transactions)
+    assert 'TARIFA PACOTE 45,90' in leftover
+
+def test_summary_check_applies_per_transaction_segment():
+    assert has_transactions("SALDO ANTERIOR 1.000,00 08/01/2024 TARIFA PACOTE 45,90")
+    assert not has_transactions("SALDO ANTERIOR 1.000,00 31/01/2024 SALDO DO DIA 954,10 C")
+    assert not has_transactions("Periodo: 01/01/2024 a 31/01/2024 Saldo anterior 1.000,00")
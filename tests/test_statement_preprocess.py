@@ -0,0 +1,43 @@
+from api.transactions._preprocess import PAGE_SEPARATOR, preprocess_statement, remove_repeated_boilerplate
+
+def test_balance_only_lines_are_dropped_and_transactions_kept():
+    text = (
+        "SALDO ANTERIOR 1.234,56\n"
+        "05/01/2024 TRANSF SALDO 500,00 D\n"
+        "06/01/2024 SALDO APLICACAO AUTOMATICA 200,00 C\n"
+        "31/01/2024 SALDO DO DIA 734,56 C\n"
+        "Saldo disponível: R$ 734,56\n"
+    )
+    cleaned, stats = preprocess_statement(text)
+    assert cleaned.split('\n') == [
+        '05/01/2024 TRANSF SALDO 500,00 D',
+        '06/01/2024 SALDO APLICACAO AUTOMATICA 200,00 C',
+    ]
+    assert stats['tokensSaved'] > 0
+
+def test_noise_sentences_are_dropped_per_line():
+    text = "Confira nossas ofertas em www.banco.com.br.\n07/01/2024   PADARIA    15,00 D"
+    cleaned, _ = preprocess_statement(text)
+    assert cleaned == '07/01/2024 PADARIA 15,00 D'
+
+def test_boilerplate_removal_keeps_line_breaks():
+    header = 'BANCO EXEMPLO S.A. EXTRATO DE CONTA CORRENTE AGENCIA 0001 CONTA 12345'
+    pages = [f"{header}\n0{day}/01/2024 COMPRA {day} 10,00 D\n0{day}/01/2024 PIX {day} 5,00 C" for day in range(1, 4)]
+    cleaned = remove_repeated_boilerplate(pages)
+    assert cleaned[0] == '01/01/2024 COMPRA 1 10,00 D\n01/01/2024 PIX 1 5,00 C'
+
+def test_pages_stay_separated():
+    cleaned, _ = preprocess_statement(f"01/01/2024 A 1,00 D{PAGE_SEPARATOR}02/01/2024 B 2,00 D")
+    assert cleaned.split(PAGE_SEPARATOR) == ['01/01/2024 A 1,00 D', '02/01/2024 B 2,00 D']
+
+def test_balance_segments_are_dropped_from_single_line_pages():
+    # pdfExtractor.js output for a PDF whose text items carry no line breaks
+    page = (
+        "SALDO ANTERIOR 1.234,56 05/01/2024 TRANSF SALDO 500,00 D "
+        "06/01/2024 PIX RECEBIDO 200,00 C SALDO DO DIA 934,56 C "
+        "07/01/2024 PADARIA 15,00 D 31/01/2024 SALDO DO DIA 919,56 C Saldo em 31/01/2024 R$ 919,56"
+    )
+    cleaned, _ = preprocess_statement(page)
+    assert cleaned == (
+        '05/01/2024 TRANSF SALDO 500,00 D 06/01/2024 PIX RECEBIDO 200,00 C 07/01/2024 PADARIA 15,00 D'
+    )
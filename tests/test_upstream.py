@@ -0,0 +1,69 @@
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from api import _upstream
+
+class FakeServer:
+    """Local server answering each GET with the next (status, delay) in a script"""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, delay = server.script[min(server.calls, len(server.script) - 1)]
+                server.calls += 1
+                time.sleep(delay)
+                self.send_response(status)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'[]')
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}/'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+@pytest.fixture
+def serve(monkeypatch):
+    monkeypatch.setattr(_upstream, 'BACKOFF_FACTOR', 0.01)
+    servers = []
+    def start(script):
+        servers.append(FakeServer(script))
+        return servers[-1]
+    yield start
+    for server in servers:
+        server.close()
+
+def test_retries_5xx_then_succeeds(serve):
+    server = serve([(503, 0), (502, 0), (200, 0)])
+    assert _upstream.get(server.url).status_code == 200
+    assert server.calls == 3
+
+def test_4xx_is_not_retried(serve):
+    server = serve([(404, 0), (200, 0)])
+    assert _upstream.get(server.url).status_code == 404
+    assert server.calls == 1
+
+def test_gives_up_after_max_retries_with_last_response(serve):
+    server = serve([(500, 0)])
+    assert _upstream.get(server.url).status_code == 500
+    assert server.calls == _upstream.MAX_RETRIES + 1
+
+def test_deadline_bounds_the_whole_call(serve):
+    from requests.exceptions import Timeout
+    server = serve([(200, 2)])
+    started = time.monotonic()
+    with pytest.raises(Timeout):
+        _upstream.get(server.url, deadline=0.5)
+    assert time.monotonic() - started < 1.5
@@ -0,0 +1,53 @@
+import io
+from api import _utils
+
+class FakeHandler:
+    def __init__(self, command, headers=None):
+        self.command = command
+        self.headers = headers or {}
+        self.status = None
+        self.sent_headers = {}
+        self.wfile = io.BytesIO()
+
+    def send_response(self, code, message=None):
+        self.status = code
+
+    def send_header(self, name, value):
+        self.sent_headers[name] = value
+
+    def end_headers(self):
+        pass
+
+def test_get_answers_matching_etag_with_304():
+    first = FakeHandler('GET')
+    _utils.send_json_response(first, {'data': [1, 2, 3]})
+    etag = first.sent_headers['ETag']
+
+    second = FakeHandler('GET', {'If-None-Match': etag})
+    _utils.send_json_response(second, {'data': [1, 2, 3]})
+    assert second.status == 304
+    assert second.wfile.getvalue() == b''
+
+def test_post_ignores_if_none_match():
+    handler = FakeHandler('POST', {'If-None-Match': '*'})
+    _utils.send_json_response(handler, {'data': [1, 2, 3]})
+    assert handler.status == 200
+    assert 'ETag' not in handler.sent_headers
+    assert handler.wfile.getvalue() == b'{"data":[1,2,3]}'
+
+def test_large_body_is_gzipped_with_matching_length():
+    import gzip
+    data = {'data': [{'valor': str(i)} for i in range(500)]}
+    handler = FakeHandler('GET', {'Accept-Encoding': 'gzip'})
+    _utils.send_json_response(handler, data)
+    body = handler.wfile.getvalue()
+    assert handler.sent_headers['Content-Encoding'] == 'gzip'
+    assert handler.sent_headers['Content-Length'] == str(len(body))
+    assert gzip.decompress(body) == _utils._json.dumps(data)
+
+def test_preflight_allows_the_authorization_header():
+    handler = FakeHandler('OPTIONS')
+    _utils.send_cors_preflight(handler)
+    assert handler.status == 200
+    allowed = [name.strip() for name in handler.sent_headers['Access-Control-Allow-Headers'].split(',')]
+    assert 'Authorization' in allowed and 'Content-Type' in allowed